@@ -0,0 +1,235 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+Benchmark suite comparing the counter handlers on three workloads:
+
+* ``increments``: a single thread incrementing the counter of a short name;
+* ``prov-reads``: random reads of the provenance counters of a large number of entities;
+* ``prov-increments``: random increments of the provenance counters of a large number of entities
+  (e.g. the text files of ``FilesystemCounterHandler``, which hold one record for each entity,
+  against the fixed-width binary records of ``MmapCounterHandler``);
+* ``contention``: several processes reserving IRIs (``reserve_block`` with blocks of one value)
+  for the same short name, after which the final counter value is checked against the number
+  of operations, so that lost updates are reported as well.
+
+For each handler and workload, the throughput (operations per second) and the 50th/99th percentiles
+of the latency are printed and, optionally, saved as JSON so that CI jobs can compare runs.
+Every workload stops after ``--max-seconds``, so that the slowest handlers do not dominate the run.
+
+Redis is benchmarked only when ``--redis`` is given: the selected database gets FLUSHED.
+
+Usage (from the root of the repository):
+    PYTHONPATH=. python benchmarks/bench_counter_backends.py [--handlers in_memory,filesystem,...]
+        [--operations N] [--identifiers N] [--processes N] [--max-seconds S]
+        [--redis host:port/db] [--json results.json] [--quick]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from oc_ocdm.counter_handler.counter_handler import CounterHandler
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from oc_ocdm.counter_handler.mmap_counter_handler import MmapCounterHandler
+from oc_ocdm.counter_handler.shared_mmap_counter_handler import SharedMmapCounterHandler
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
+
+HANDLERS = ("in_memory", "filesystem", "mmap", "shared_mmap", "sqlite", "redis")
+# The in-memory handler cannot be shared by different processes
+SHARED_HANDLERS = ("filesystem", "mmap", "shared_mmap", "sqlite", "redis")
+
+
+def make_counter_handler(kind: str, work_dir: str, redis_url: Optional[str]) -> CounterHandler:
+    if kind == "in_memory":
+        return InMemoryCounterHandler()
+    if kind == "filesystem":
+        return FilesystemCounterHandler(os.path.join(work_dir, "text") + os.sep)
+    if kind == "mmap":
+        return MmapCounterHandler(os.path.join(work_dir, "mmap") + os.sep)
+    if kind == "shared_mmap":
+        return SharedMmapCounterHandler(os.path.join(work_dir, "shared_mmap") + os.sep)
+    if kind == "sqlite":
+        return SqliteCounterHandler(os.path.join(work_dir, "counters.db"))
+    if kind == "redis":
+        from oc_ocdm.counter_handler.redis_counter_handler import RedisCounterHandler
+        address, _, db = redis_url.partition("/")
+        host, _, port = address.partition(":")
+        return RedisCounterHandler(host=host or "localhost", port=int(port or 6379), db=int(db or 0))
+    raise ValueError(f"Unknown counter handler: {kind}")
+
+
+def reset(counter_handler: CounterHandler) -> None:
+    if hasattr(counter_handler, "redis"):
+        counter_handler.redis.flushdb()
+
+
+def close(counter_handler: CounterHandler) -> None:
+    counter_handler.flush()
+    if hasattr(counter_handler, "close"):
+        counter_handler.close()
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "operations": len(latencies),
+        "ops_per_sec": len(latencies) / elapsed if elapsed > 0 else float("inf"),
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0,
+    }
+
+
+def timed_loop(operation: Callable[[int], object], operations: int, max_seconds: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    start: float = time.perf_counter()
+    deadline: float = start + max_seconds
+    for i in range(operations):
+        op_start: float = time.perf_counter()
+        operation(i)
+        op_end: float = time.perf_counter()
+        latencies.append(op_end - op_start)
+        if op_end > deadline:
+            break
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_increments(counter_handler: CounterHandler, args: argparse.Namespace) -> Dict[str, float]:
+    return timed_loop(lambda _: counter_handler.increment_counter("br", supplier_prefix="060"),
+                      args.operations, args.max_seconds)
+
+
+def fill_prov_counters(counter_handler: CounterHandler, args: argparse.Namespace) -> Dict[int, int]:
+    # The counters are filled in with the batch API, when available
+    values: Dict[int, int] = {identifier: random.randint(1, 9) for identifier in range(1, args.identifiers + 1)}
+    if hasattr(counter_handler, "set_counters_batch"):
+        counter_handler.set_counters_batch({("br", "se"): values}, "060")
+    elif hasattr(counter_handler, "batch_update_counters"):
+        counter_handler.batch_update_counters({"060": {("br", "se"): values}}, show_progress=False)
+    else:
+        for identifier, value in values.items():
+            counter_handler.set_counter(value, "br", "se", identifier, "060")
+    return values
+
+
+def bench_prov_reads(counter_handler: CounterHandler, args: argparse.Namespace) -> Dict[str, float]:
+    values: Dict[int, int] = fill_prov_counters(counter_handler, args)
+    identifiers: List[int] = [random.randint(1, args.identifiers) for _ in range(args.operations)]
+    result: Dict[str, float] = timed_loop(
+        lambda i: counter_handler.read_counter("br", "se", identifiers[i], "060"), args.operations, args.max_seconds)
+    checked: int = min(10, int(result["operations"]))
+    result["errors"] = sum(counter_handler.read_counter("br", "se", identifier, "060") != values[identifier]
+                           for identifier in identifiers[:checked])
+    return result
+
+
+def bench_prov_increments(counter_handler: CounterHandler, args: argparse.Namespace) -> Dict[str, float]:
+    values: Dict[int, int] = fill_prov_counters(counter_handler, args)
+    identifiers: List[int] = [random.randint(1, args.identifiers) for _ in range(args.operations)]
+    result: Dict[str, float] = timed_loop(
+        lambda i: counter_handler.increment_counter("br", "se", identifiers[i], "060"),
+        args.operations, args.max_seconds)
+    for identifier in identifiers[:int(result["operations"])]:
+        values[identifier] += 1
+    checked: List[int] = identifiers[:min(10, int(result["operations"]))]
+    result["errors"] = sum(counter_handler.read_counter("br", "se", identifier, "060") != values[identifier]
+                           for identifier in checked)
+    return result
+
+
+def _contention_worker(task: tuple) -> tuple:
+    kind, work_dir, redis_url, operations, max_seconds = task
+    counter_handler: CounterHandler = make_counter_handler(kind, work_dir, redis_url)
+    latencies: List[float] = []
+    start: float = time.perf_counter()
+    deadline: float = start + max_seconds
+    for _ in range(operations):
+        op_start: float = time.perf_counter()
+        counter_handler.reserve_block("ra", 1, "060")
+        op_end: float = time.perf_counter()
+        latencies.append(op_end - op_start)
+        if op_end > deadline:
+            break
+    elapsed: float = time.perf_counter() - start
+    close(counter_handler)
+    return latencies, elapsed
+
+
+def bench_contention(kind: str, work_dir: str, args: argparse.Namespace) -> Dict[str, float]:
+    tasks = [(kind, work_dir, args.redis, args.operations, args.max_seconds)] * args.processes
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        results = list(executor.map(_contention_worker, tasks))
+    # The throughput does not take into account the time needed to start the processes
+    latencies: List[float] = [latency for worker_latencies, _ in results for latency in worker_latencies]
+    result: Dict[str, float] = summarize(latencies, max(elapsed for _, elapsed in results))
+
+    counter_handler: CounterHandler = make_counter_handler(kind, work_dir, args.redis)
+    result["errors"] = abs(counter_handler.read_counter("ra", supplier_prefix="060") - len(latencies))
+    close(counter_handler)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--handlers", default=",".join(HANDLERS), help="comma-separated list of handlers")
+    parser.add_argument("--operations", type=int, default=5000, help="operations per workload (and per process)")
+    parser.add_argument("--identifiers", type=int, default=1000000, help="entities whose prov counters are read")
+    parser.add_argument("--processes", type=int, default=4, help="processes of the contention workload")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="time budget of each workload")
+    parser.add_argument("--redis", default=None, help="host:port/db of a Redis server (the db gets flushed!)")
+    parser.add_argument("--json", default=None, help="path of the JSON file where the results are saved")
+    parser.add_argument("--quick", action="store_true", help="small sizes, suitable for CI smoke runs")
+    args = parser.parse_args()
+    if args.quick:
+        args.operations, args.identifiers, args.processes, args.max_seconds = 200, 10000, 2, 2.0
+
+    handlers: List[str] = [handler for handler in args.handlers.split(",") if handler]
+    if "redis" in handlers and args.redis is None:
+        print("Skipping redis: no server given (use --redis host:port/db)")
+        handlers.remove("redis")
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    print(f"{'handler':<11} {'workload':<15} {'ops':>8} {'ops/sec':>12} {'p50 (ms)':>10} {'p99 (ms)':>10} {'errors':>7}")
+    for kind in handlers:
+        results[kind] = {}
+        workloads = [("increments", bench_increments), ("prov-reads", bench_prov_reads),
+                     ("prov-increments", bench_prov_increments)]
+        for workload, bench in workloads:
+            with tempfile.TemporaryDirectory() as work_dir:
+                counter_handler: CounterHandler = make_counter_handler(kind, work_dir, args.redis)
+                reset(counter_handler)
+                results[kind][workload] = bench(counter_handler, args)
+                close(counter_handler)
+        if kind in SHARED_HANDLERS:
+            with tempfile.TemporaryDirectory() as work_dir:
+                reset(make_counter_handler(kind, work_dir, args.redis))
+                results[kind]["contention"] = bench_contention(kind, work_dir, args)
+
+        for workload, result in results[kind].items():
+            print(f"{kind:<11} {workload:<15} {int(result['operations']):>8} {result['ops_per_sec']:>12.0f} "
+                  f"{result['p50_ms']:>10.4f} {result['p99_ms']:>10.4f} {int(result.get('errors', 0)):>7}")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+Benchmark of ``Reader.import_entities_from_graph`` on a graph of bibliographic resources and identifiers
+(about one million triples by default). The current single-pass import, which groups the triples by
+subject and dispatches each one through a type table, is compared with the previous implementation,
+which looked up the types of every subject, walked a chain of conditions and copied the triples of each
+entity into an intermediate graph.
+
+Usage (from the root of the repository):
+    PYTHONPATH=. python benchmarks/bench_import_entities.py [--triples N]
+"""
+import argparse
+import time
+from typing import List
+
+from rdflib import RDF, XSD, Graph, Literal, URIRef
+
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.reader import Reader
+
+BASE_IRI = "https://w3id.org/oc/meta/"
+RESP_AGENT = "https://orcid.org/0000-0000-0000-0000"
+TRIPLES_PER_ITEM = 9
+
+
+def build_graph(n_triples: int) -> Graph:
+    graph = Graph()
+    for i in range(1, n_triples // TRIPLES_PER_ITEM + 1):
+        br = URIRef(f"{BASE_IRI}br/060{i}")
+        identifier = URIRef(f"{BASE_IRI}id/060{i}")
+        graph.add((br, RDF.type, GraphEntity.iri_expression))
+        graph.add((br, RDF.type, GraphEntity.iri_journal_article))
+        graph.add((br, GraphEntity.iri_title, Literal(f"Title {i}", datatype=XSD.string)))
+        graph.add((br, GraphEntity.iri_has_publication_date, Literal("2020-05", datatype=XSD.gYearMonth)))
+        graph.add((br, GraphEntity.iri_has_identifier, identifier))
+        graph.add((br, GraphEntity.iri_part_of, URIRef(f"{BASE_IRI}br/0600")))
+        graph.add((identifier, RDF.type, GraphEntity.iri_identifier))
+        graph.add((identifier, GraphEntity.iri_uses_identifier_scheme, GraphEntity.iri_doi))
+        graph.add((identifier, GraphEntity.iri_has_literal_value, Literal(f"10.1000/{i}", datatype=XSD.string)))
+    return graph
+
+
+def legacy_import(g_set: GraphSet, graph: Graph) -> List[GraphEntity]:
+    imported_entities: List[GraphEntity] = []
+    for subject in Reader._extract_subjects(graph):
+        types = list(graph.objects(subject, RDF.type))
+        for entity_type, add_method in Reader.type_to_add_method:
+            if entity_type in types:
+                imported_entities.append(getattr(g_set, add_method)(
+                    resp_agent=RESP_AGENT, res=subject,
+                    preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
+                break
+    return imported_entities
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--triples", type=int, default=1000000, help="approximate number of triples imported")
+    args = parser.parse_args()
+
+    graph = build_graph(args.triples)
+    print(f"{len(graph)} triples")
+    for name, import_function in (("legacy", legacy_import),
+                                  ("single-pass", lambda g_set, g: Reader.import_entities_from_graph(
+                                      g_set, g, RESP_AGENT))):
+        g_set = GraphSet(BASE_IRI, wanted_label=False)
+        start = time.perf_counter()
+        imported_entities = import_function(g_set, graph)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {elapsed:8.2f} s ({len(imported_entities)} entities, "
+              f"{len(graph) / elapsed:.0f} triples/s)")
+
+
+if __name__ == "__main__":
+    main()
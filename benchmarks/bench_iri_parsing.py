@@ -0,0 +1,118 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+Benchmark of the decomposition of IRIs: the previous implementation, which matched the whole IRI
+against a regular expression in each of the ``get_*`` functions of ``oc_ocdm.support``, is compared
+with the current one, based on the cached ``parse_iri``. As it happens while generating provenance
+and storing data, each IRI of the workload is decomposed several times (short name, prefix, count,
+resource number and dataset check of both the entity and one of its snapshots).
+
+Usage (from the root of the repository):
+    PYTHONPATH=. python benchmarks/bench_iri_parsing.py [--entities N] [--rounds N]
+"""
+import argparse
+import re
+import time
+from typing import List
+
+from rdflib import URIRef
+
+from oc_ocdm.support import support
+from oc_ocdm.support.support import entity_regex, prov_regex
+
+
+def _get_match(regex: str, group: int, string: str) -> str:
+    match = re.match(regex, string)
+    return match.group(group) if match is not None else ""
+
+
+def legacy_get_short_name(res: URIRef) -> str:
+    string_iri = str(res)
+    if "/prov/" in string_iri:
+        return _get_match(prov_regex, 5, string_iri)
+    return _get_match(entity_regex, 2, string_iri)
+
+
+def legacy_get_prefix(res: URIRef) -> str:
+    string_iri = str(res)
+    if "/prov/" in string_iri:
+        return ""
+    return _get_match(entity_regex, 3, string_iri)
+
+
+def legacy_get_count(res: URIRef) -> str:
+    string_iri = str(res)
+    if "/prov/" in string_iri:
+        return _get_match(prov_regex, 6, string_iri)
+    return _get_match(entity_regex, 4, string_iri)
+
+
+def legacy_get_resource_number(res: URIRef) -> int:
+    string_iri = str(res)
+    if "/prov/" in string_iri:
+        return int(_get_match(prov_regex, 4, string_iri))
+    return int(_get_match(entity_regex, 4, string_iri))
+
+
+def legacy_is_dataset(res: URIRef) -> bool:
+    return re.search(r"^.+/[0-9]+(-[0-9]+)?(/[0-9]+)?$", str(res)) is None
+
+
+LEGACY = (legacy_get_short_name, legacy_get_prefix, legacy_get_count, legacy_get_resource_number, legacy_is_dataset)
+CURRENT = (support.get_short_name, support.get_prefix, support.get_count, support.get_resource_number,
+           support.is_dataset)
+
+
+def build_iris(n_entities: int) -> List[URIRef]:
+    iris: List[URIRef] = []
+    for i in range(1, n_entities + 1):
+        res = f"https://w3id.org/oc/meta/br/060{i}"
+        iris.append(URIRef(res))
+        iris.append(URIRef(f"{res}/prov/se/{i % 3 + 1}"))
+    return iris
+
+
+def run(functions: tuple, iris: List[URIRef], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for res in iris:
+            for function in functions:
+                function(res)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=20000,
+                        help="number of entities (each one contributes an entity IRI and a snapshot IRI)")
+    parser.add_argument("--rounds", type=int, default=10, help="number of times each IRI is decomposed")
+    args = parser.parse_args()
+
+    iris = build_iris(args.entities)
+    n_calls = len(iris) * args.rounds * len(CURRENT)
+    print(f"{len(iris)} distinct IRIs, {n_calls} calls")
+
+    results: List[tuple] = []
+    for name, functions in (("legacy", LEGACY), ("parse_iri", CURRENT)):
+        support._parse_iri.cache_clear()
+        elapsed = run(functions, iris, args.rounds)
+        results.append((name, elapsed))
+        print(f"{name:>10}: {elapsed:8.3f} s {n_calls / elapsed:>12.0f} calls/s")
+    print(f"speedup: {results[0][1] / results[1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+Benchmark of the JSON-LD output of the Storer: the previous path (rdflib serialization, followed
+by ``json.loads`` and a further ``json.dumps``) is compared with ``graph_to_json_ld`` followed by a
+single ``json.dumps``, on files containing a growing number of bibliographic resources.
+
+Usage (from the root of the repository):
+    PYTHONPATH=. python benchmarks/bench_json_ld.py [--repeat N]
+"""
+import argparse
+import json
+import timeit
+
+from rdflib import ConjunctiveGraph, Literal, URIRef, XSD
+
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.support.json_ld import graph_to_json_ld
+
+
+def build_graph(n_entities: int) -> ConjunctiveGraph:
+    cg = ConjunctiveGraph()
+    graph_iri = URIRef("https://w3id.org/oc/meta/br/")
+    prov_quads = []
+    for i in range(n_entities):
+        res = URIRef(f"https://w3id.org/oc/meta/br/060{i + 1}")
+        prov_graph_iri = URIRef(f"{res}/prov/")
+        cg.addN([
+            (res, GraphEntity.iri_has_identifier, URIRef(f"https://w3id.org/oc/meta/id/060{i + 1}"), graph_iri),
+            (res, GraphEntity.iri_title, Literal(f"Title {i}", datatype=XSD.string), graph_iri),
+            (res, GraphEntity.iri_has_publication_date, Literal("2020-05", datatype=XSD.gYearMonth), graph_iri),
+            (res, GraphEntity.iri_part_of, URIRef("https://w3id.org/oc/meta/br/0600"), graph_iri),
+        ])
+        prov_quads.append((URIRef(f"{res}/prov/se/1"), GraphEntity.DCTERMS.description,
+                           Literal(f"The entity '{res}' has been created."), prov_graph_iri))
+    cg.addN(prov_quads)
+    return cg
+
+
+def rdflib_json_ld(cg: ConjunctiveGraph) -> str:
+    return json.dumps(json.loads(cg.serialize(format="json-ld")), ensure_ascii=False)
+
+
+def direct_json_ld(cg: ConjunctiveGraph) -> str:
+    return json.dumps(graph_to_json_ld(cg), ensure_ascii=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="number of conversions timed for each size")
+    args = parser.parse_args()
+
+    print(f"{'entities':>8} {'rdflib (ms)':>12} {'direct (ms)':>12} {'speedup':>8}")
+    for n_entities in (10, 100, 1000, 5000):
+        cg = build_graph(n_entities)
+        t_rdflib = timeit.timeit(lambda: rdflib_json_ld(cg), number=args.repeat)
+        t_direct = timeit.timeit(lambda: direct_json_ld(cg), number=args.repeat)
+        print(f"{n_entities:>8} {t_rdflib / args.repeat * 1000:>12.2f} {t_direct / args.repeat * 1000:>12.2f} "
+              f"{t_rdflib / t_direct:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+Benchmark of ``Reader.load`` on the output tree of the ``Storer`` (graph and provenance files, in
+JSON-LD and N-Triples/N-Quads, both plain and zipped). The current reader, which detects the format
+of each file and parses it once, is compared with the previous strategy, which tried json-ld,
+rdfxml, turtle, trig, nt11 and nquads in sequence and serialized JSON-LD documents again before
+handing them over to rdflib. A few corrupted files are loaded as well, with and without ``fail_fast``.
+
+Usage (from the root of the repository):
+    PYTHONPATH=. python benchmarks/bench_reader_formats.py [--entities N] [--repeat N]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+from rdflib import ConjunctiveGraph
+
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.prov.prov_set import ProvSet
+from oc_ocdm.reader import Reader
+from oc_ocdm.storer import Storer
+from oc_ocdm.support.reporter import Reporter
+
+BASE_IRI = "https://w3id.org/oc/meta/"
+
+
+class LegacyReader(Reader):
+    """The previous loading strategy: every format is tried in a fixed order."""
+
+    def _get_formats(self, file_name: str, file_obj) -> List[str]:
+        return ["json-ld", "rdfxml", "turtle", "trig", "nt11", "nquads"]
+
+    def _parse_json_ld(self, graph: ConjunctiveGraph, data) -> None:
+        json_ld_file = json.loads(data)
+        if isinstance(json_ld_file, dict):
+            json_ld_file = [json_ld_file]
+        graph.parse(data=json.dumps(json_ld_file, ensure_ascii=False), format="json-ld")
+
+
+def build_tree(base_dir: str, n_entities: int) -> List[str]:
+    g_set = GraphSet(BASE_IRI, supplier_prefix="060", wanted_label=False)
+    for i in range(n_entities):
+        br = g_set.add_br("https://orcid.org/0000-0000-0000-0000")
+        br.has_title(f"Title {i}")
+        br.has_subtitle(f"Subtitle {i}")
+    p_set = ProvSet(g_set, BASE_IRI, wanted_label=False)
+    p_set.generate_provenance()
+
+    silent = Reporter(print_sentences=False)
+    file_paths: List[str] = []
+    for output_format in ("json-ld", "nt11"):
+        for zip_output in (False, True):
+            out_dir = os.path.join(base_dir, f"{output_format}{'_zip' if zip_output else ''}") + os.sep
+            for a_set in (g_set, p_set):
+                storer = Storer(a_set, repok=silent, reperr=silent, output_format=output_format,
+                                zip_output=zip_output, dir_split=1000, n_file_item=100)
+                file_paths.extend(storer.store_all(out_dir, BASE_IRI))
+    return file_paths
+
+
+def build_corrupted_files(base_dir: str, file_paths: List[str]) -> List[str]:
+    corrupted_paths: List[str] = []
+    for i, file_path in enumerate(path for path in file_paths if not path.endswith(".zip")):
+        if i >= 10:
+            break
+        corrupted_path = os.path.join(base_dir, f"corrupted_{i}{os.path.splitext(file_path)[1]}")
+        with open(file_path, "rt", encoding="utf-8") as f:
+            content = f.read()
+        with open(corrupted_path, "wt", encoding="utf-8") as f:
+            f.write(content[:len(content) // 2])
+        corrupted_paths.append(corrupted_path)
+    return corrupted_paths
+
+
+def time_loading(reader: Reader, file_paths: List[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for file_path in file_paths:
+            reader.load(file_path)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=2000, help="number of bibliographic resources stored")
+    parser.add_argument("--repeat", type=int, default=3, help="number of times each file is loaded")
+    args = parser.parse_args()
+
+    silent = Reporter(print_sentences=False)
+    with tempfile.TemporaryDirectory() as base_dir:
+        file_paths = build_tree(base_dir, args.entities)
+        corrupted_paths = build_corrupted_files(base_dir, file_paths)
+        print(f"{len(file_paths)} stored files, {len(corrupted_paths)} corrupted files")
+        print(f"{'reader':>18} {'stored (ms)':>12} {'corrupted (ms)':>15}")
+        for name, reader in (("legacy", LegacyReader(repok=silent, reperr=silent)),
+                             ("sniffing", Reader(repok=silent, reperr=silent)),
+                             ("sniffing+fail_fast", Reader(repok=silent, reperr=silent, fail_fast=True))):
+            t_stored = time_loading(reader, file_paths, args.repeat)
+            t_corrupted = time_loading(reader, corrupted_paths, args.repeat)
+            print(f"{name:>18} {t_stored * 1000:>12.1f} {t_corrupted * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+"""
+Micro-benchmark of the diff computed by ``get_update_query``: the set-based path
+used for graphs without blank nodes is compared with the isomorphic algorithm
+(``rdflib.compare.to_isomorphic`` + ``graph_diff``) on entities of growing size.
+
+Usage (from the root of the repository):
+    PYTHONPATH=. python benchmarks/bench_update_query.py [--repeat N]
+"""
+import argparse
+import timeit
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.compare import graph_diff, to_isomorphic
+
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.support.query_utils import get_graph_diff
+
+
+def build_graphs(n_triples: int):
+    res = URIRef("https://w3id.org/oc/meta/br/0601")
+    preexisting_graph = Graph(identifier=URIRef("https://w3id.org/oc/meta/br/"))
+    current_graph = Graph(identifier=URIRef("https://w3id.org/oc/meta/br/"))
+    for i in range(n_triples):
+        triple = (res, GraphEntity.iri_has_identifier, URIRef(f"https://w3id.org/oc/meta/id/060{i + 1}"))
+        preexisting_graph.add(triple)
+        current_graph.add(triple)
+    # A typical modification: one value replaced, one added
+    preexisting_graph.add((res, GraphEntity.iri_title, Literal("Old title")))
+    current_graph.add((res, GraphEntity.iri_title, Literal("New title")))
+    current_graph.add((res, GraphEntity.iri_has_publication_date, Literal("2024")))
+    return preexisting_graph, current_graph
+
+
+def isomorphic_diff(preexisting_graph: Graph, current_graph: Graph):
+    preexisting_iso = to_isomorphic(preexisting_graph)
+    current_iso = to_isomorphic(current_graph)
+    if preexisting_iso == current_iso:
+        return Graph(), Graph()
+    _, in_first, in_second = graph_diff(preexisting_iso, current_iso)
+    return in_first, in_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="number of diffs timed for each size")
+    args = parser.parse_args()
+
+    print(f"{'triples':>8} {'isomorphic (ms)':>16} {'set-based (ms)':>15} {'speedup':>8}")
+    for n_triples in (5, 20, 50, 100, 200, 500):
+        preexisting_graph, current_graph = build_graphs(n_triples)
+        assert {frozenset(g) for g in isomorphic_diff(preexisting_graph, current_graph)} == \
+               {frozenset(g) for g in get_graph_diff(preexisting_graph, current_graph)}
+        t_iso = timeit.timeit(lambda: isomorphic_diff(preexisting_graph, current_graph), number=args.repeat)
+        t_set = timeit.timeit(lambda: get_graph_diff(preexisting_graph, current_graph), number=args.repeat)
+        print(f"{n_triples:>8} {t_iso / args.repeat * 1000:>16.3f} {t_set / args.repeat * 1000:>15.3f} "
+              f"{t_iso / t_set:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,8 @@ class AbstractEntity(ABC):
         self.g: Graph = Graph()
         self.res: URIRef = URIRef("")
         self.short_name: str = ""
+        # Memoised result of oc_ocdm.support.query_utils.get_entity_delta
+        self._delta_cache: Optional[Tuple[Tuple, Tuple]] = None
 
     def remove_every_triple(self) -> None:
         """
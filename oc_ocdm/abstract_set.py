@@ -21,10 +21,79 @@ from typing import TYPE_CHECKING
 from oc_ocdm.abstract_entity import AbstractEntity
 
 if TYPE_CHECKING:
-    from typing import List, ClassVar, Dict, Optional
+    from typing import List, ClassVar, Dict, Optional, Tuple, Iterable, Any
     from rdflib import URIRef, Graph
 
 
+class EntityDict(dict):
+    """
+    A dictionary mapping a URIRef with the related entity which also keeps, for each
+    short name, a secondary index of the entities of the corresponding type. Both indexes
+    are updated whenever the dictionary is modified, so that typed lookups cost
+    O(k) in the number of matching entities instead of requiring a full scan.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super(EntityDict, self).__init__()
+        self._short_name_to_entities: Dict[str, Dict[URIRef, AbstractEntity]] = {}
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, res: URIRef, entity: AbstractEntity) -> None:
+        if res in self:
+            self._remove_from_index(res, dict.__getitem__(self, res))
+        dict.__setitem__(self, res, entity)
+        self._short_name_to_entities.setdefault(entity.short_name, {})[res] = entity
+
+    def __delitem__(self, res: URIRef) -> None:
+        entity: AbstractEntity = dict.__getitem__(self, res)
+        dict.__delitem__(self, res)
+        self._remove_from_index(res, entity)
+
+    def pop(self, res: URIRef, *default: Any) -> Any:
+        if res in self:
+            entity: AbstractEntity = dict.pop(self, res)
+            self._remove_from_index(res, entity)
+            return entity
+        return dict.pop(self, res, *default)
+
+    def popitem(self) -> Tuple[URIRef, AbstractEntity]:
+        res, entity = dict.popitem(self)
+        self._remove_from_index(res, entity)
+        return res, entity
+
+    def setdefault(self, res: URIRef, default: AbstractEntity = None) -> AbstractEntity:
+        if res not in self:
+            self[res] = default
+        return dict.__getitem__(self, res)
+
+    def update(self, *args, **kwargs) -> None:
+        for res, entity in dict(*args, **kwargs).items():
+            self[res] = entity
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self._short_name_to_entities.clear()
+
+    def get_by_short_name(self, short_name: str) -> Tuple[AbstractEntity, ...]:
+        """
+        It returns the entities whose type is identified by the given short name,
+        in order of insertion.
+
+        :param short_name: The short name associated to the type of the requested entities
+        :type short_name: str
+        :return: A tuple containing the requested entities
+        """
+        entities: Optional[Dict[URIRef, AbstractEntity]] = self._short_name_to_entities.get(short_name)
+        if entities is None:
+            return tuple()
+        return tuple(entities.values())
+
+    def _remove_from_index(self, res: URIRef, entity: AbstractEntity) -> None:
+        entities: Optional[Dict[URIRef, AbstractEntity]] = self._short_name_to_entities.get(entity.short_name)
+        if entities is not None:
+            entities.pop(res, None)
+
+
 class AbstractSet(ABC):
     """
     Abstract class which represents a generic set of entities.
@@ -37,7 +106,7 @@ class AbstractSet(ABC):
         """
         Constructor of the ``AbstractSet`` class.
         """
-        self.res_to_entity: Dict[URIRef, AbstractEntity] = {}
+        self.res_to_entity: EntityDict = EntityDict()
 
     def graphs(self) -> List[Graph]:
         """
@@ -14,6 +14,10 @@
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 
+from oc_ocdm.counter_handler.cached_counter_handler import CachedCounterHandler
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
+from oc_ocdm.counter_handler.counter_reconstruction import rebuild_counters
 from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
 from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from oc_ocdm.counter_handler.mmap_counter_handler import MmapCounterHandler
+from oc_ocdm.counter_handler.shared_mmap_counter_handler import SharedMmapCounterHandler
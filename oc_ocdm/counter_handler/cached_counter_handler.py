@@ -0,0 +1,368 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import atexit
+import threading
+from typing import TYPE_CHECKING
+
+from oc_ocdm.counter_handler.counter_handler import CounterHandler
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+    CounterKey = Tuple[str, str, int, str]
+    MetadataCounterKey = Tuple[str, str]
+
+
+class CachedCounterHandler(CounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that wraps another counter handler
+    (the backend) with a write-back cache: counter values are kept in memory, reads and increments are
+    served locally and the modified values are written to the backend in bulk only when ``flush``
+    is called.
+
+    Each value is read from the backend at most once, the first time it is requested. The modified
+    values are then written using the bulk operations offered by the backend, if any
+    (``set_counters_batch`` for ``FilesystemCounterHandler``, ``MmapCounterHandler`` and ``SqliteCounterHandler``
+    and a Redis pipeline for ``RedisCounterHandler``), and one by one otherwise.
+
+    Since the wrapper assumes to be the only writer of the counters it holds, the backend must not be
+    modified by others until the cache gets flushed.
+    """
+
+    def __init__(self, counter_handler: CounterHandler, flush_interval: Optional[float] = None,
+                 flush_at_exit: bool = True) -> None:
+        """
+        Constructor of the ``CachedCounterHandler`` class.
+
+        :param counter_handler: The counter handler whose values must be cached
+        :type counter_handler: CounterHandler
+        :param flush_interval: If specified, the number of seconds after which the modified values
+          are periodically flushed by a background thread
+        :type flush_interval: Optional[float]
+        :param flush_at_exit: Whether the modified values must be flushed when the interpreter exits
+        :type flush_at_exit: bool
+        """
+        self.counter_handler: CounterHandler = counter_handler
+        self.flush_interval: Optional[float] = flush_interval
+        self.flush_at_exit: bool = flush_at_exit
+
+        self._counters: Dict[CounterKey, int] = {}
+        self._dirty_counters: Set[CounterKey] = set()
+        self._metadata_counters: Dict[MetadataCounterKey, int] = {}
+        self._dirty_metadata_counters: Set[MetadataCounterKey] = set()
+        # The background timer flushes the cache from another thread
+        self._lock: threading.RLock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._closed: bool = False
+
+        if self.flush_interval is not None:
+            if self.flush_interval <= 0:
+                raise ValueError("flush_interval must be a positive number!")
+            self._schedule_flush()
+        if self.flush_at_exit:
+            atexit.register(self.flush)
+
+    def set_counter(self, new_value: int, entity_short_name: str, prov_short_name: str = "",
+                    identifier: int = 1, supplier_prefix: str = "") -> None:
+        """
+        It allows to set the counter value of graph and provenance entities.
+        The new value is written to the backend at the next flush.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :raises ValueError: if ``new_value`` is a negative integer.
+        :return: None
+        """
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+        key: CounterKey = self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix)
+        with self._lock:
+            self._counters[key] = new_value
+            self._dirty_counters.add(key)
+
+    def read_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = "") -> int:
+        """
+        It allows to read the counter value of graph and provenance entities.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :return: The requested counter value.
+        """
+        key: CounterKey = self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix)
+        with self._lock:
+            return self._get_counter(key)
+
+    def increment_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = "") -> int:
+        """
+        It allows to increment the counter value of graph and provenance entities by one unit.
+        The new value is written to the backend at the next flush.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :return: The newly-updated (already incremented) counter value.
+        """
+        key: CounterKey = self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix)
+        with self._lock:
+            count: int = self._get_counter(key) + 1
+            self._counters[key] = count
+            self._dirty_counters.add(key)
+            return count
+
+    def read_counters(self, keys: Iterable[CounterKey]) -> List[int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once.
+        The values which are not cached yet are read from the backend through a single call
+        to its ``read_counters`` method, so that this method can also be used to prefetch them.
+
+        :param keys: The keys of the requested counter values, each one being a tuple
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :return: The requested counter values, in the same order as the keys.
+        """
+        cache_keys: List[CounterKey] = [self._get_key(*key) for key in keys]
+        with self._lock:
+            missing_keys: List[CounterKey] = list(dict.fromkeys(key for key in cache_keys if key not in self._counters))
+            if missing_keys:
+                values: List[int] = self.counter_handler.read_counters(missing_keys)
+                self._counters.update(zip(missing_keys, values))
+            return [self._counters[key] for key in cache_keys]
+
+    def increment_counters(self, keys: Iterable[CounterKey]) -> List[int]:
+        """
+        It allows to increment by one unit many counter values of graph and provenance entities at once.
+        The new values are written to the backend at the next flush.
+
+        :param keys: The keys of the counter values to be incremented, each one being a tuple
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :return: The newly-updated (already incremented) counter values, in the same order as the keys.
+        """
+        cache_keys: List[CounterKey] = [self._get_key(*key) for key in keys]
+        with self._lock:
+            # The missing values are read all together
+            self.read_counters(cache_keys)
+            result: List[int] = []
+            for key in cache_keys:
+                self._counters[key] += 1
+                self._dirty_counters.add(key)
+                result.append(self._counters[key])
+            return result
+
+    def reserve_block(self, entity_short_name: str, n: int, supplier_prefix: str = "") -> int:
+        """
+        It allows to reserve a block of ``n`` consecutive counter values for graph entities.
+        The reservation is delegated to the backend (after having written the cached value, if modified),
+        so that it is as safe as the one of the backend. The reserved values range from the
+        returned one to the returned one plus ``n`` minus one.
+
+        :param entity_short_name: The short name associated to the type of the entities
+        :type entity_short_name: str
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``n`` is less than or equal to zero.
+        :return: The first counter value of the reserved block.
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+        key: CounterKey = self._get_key(entity_short_name, "", 1, supplier_prefix)
+        with self._lock:
+            if key in self._dirty_counters:
+                self._flush_counters({key: self._counters[key]})
+                self._dirty_counters.discard(key)
+            first_value: int = self.counter_handler.reserve_block(entity_short_name, n, supplier_prefix)
+            self._counters[key] = first_value + n - 1
+            return first_value
+
+    def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str) -> None:
+        """
+        It allows to set the counter value of metadata entities.
+        The new value is written to the backend at the next flush.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``new_value`` is a negative integer or ``dataset_name`` is None.
+        :return: None
+        """
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+        with self._lock:
+            self._metadata_counters[(entity_short_name, dataset_name)] = new_value
+            self._dirty_metadata_counters.add((entity_short_name, dataset_name))
+
+    def read_metadata_counter(self, entity_short_name: str, dataset_name: str) -> int:
+        """
+        It allows to read the counter value of metadata entities.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None.
+        :return: The requested counter value.
+        """
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+        with self._lock:
+            return self._get_metadata_counter((entity_short_name, dataset_name))
+
+    def increment_metadata_counter(self, entity_short_name: str, dataset_name: str) -> int:
+        """
+        It allows to increment the counter value of metadata entities by one unit.
+        The new value is written to the backend at the next flush.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None.
+        :return: The newly-updated (already incremented) counter value.
+        """
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+        key: MetadataCounterKey = (entity_short_name, dataset_name)
+        with self._lock:
+            count: int = self._get_metadata_counter(key) + 1
+            self._metadata_counters[key] = count
+            self._dirty_metadata_counters.add(key)
+            return count
+
+    def flush(self) -> None:
+        """
+        It writes every counter value modified since the last flush to the backend, and then
+        it flushes the backend itself. If the backend raises an exception, the values which
+        could not be written are kept, so that they are written again at the next flush.
+
+        :return: None
+        """
+        with self._lock:
+            if self._dirty_counters:
+                self._flush_counters({key: self._counters[key] for key in self._dirty_counters})
+                self._dirty_counters.clear()
+            if self._dirty_metadata_counters:
+                for key in list(self._dirty_metadata_counters):
+                    entity_short_name, dataset_name = key
+                    self.counter_handler.set_metadata_counter(self._metadata_counters[key],
+                                                              entity_short_name, dataset_name)
+                    self._dirty_metadata_counters.discard(key)
+            self.counter_handler.flush()
+
+    def clear(self) -> None:
+        """
+        It flushes the modified values and then it empties the cache, so that every value
+        will be read again from the backend the next time it is requested.
+
+        :return: None
+        """
+        with self._lock:
+            self.flush()
+            self._counters.clear()
+            self._metadata_counters.clear()
+
+    def close(self) -> None:
+        """
+        It flushes the modified values and stops the background thread, if any.
+        The handler can still be used afterwards, but it must then be flushed explicitly.
+
+        :return: None
+        """
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self.flush_at_exit:
+                atexit.unregister(self.flush)
+            self.flush()
+
+    def _flush_counters(self, values: Dict[CounterKey, int]) -> None:
+        backend: CounterHandler = self.counter_handler
+        updates: Dict[str, Dict[Tuple[str, str], Dict[int, int]]] = {}
+        for (entity_short_name, prov_short_name, identifier, supplier_prefix), value in values.items():
+            updates.setdefault(supplier_prefix, {}).setdefault(
+                (entity_short_name, prov_short_name), {})[identifier] = value
+
+        if hasattr(backend, "set_counters_batch"):
+            for supplier_prefix, prefix_updates in updates.items():
+                backend.set_counters_batch(prefix_updates, supplier_prefix)
+        elif hasattr(backend, "batch_update_counters"):
+            backend.batch_update_counters(updates, show_progress=False)
+        else:
+            for (entity_short_name, prov_short_name, identifier, supplier_prefix), value in values.items():
+                backend.set_counter(value, entity_short_name, prov_short_name, identifier, supplier_prefix)
+
+    def _get_counter(self, key: CounterKey) -> int:
+        count: Optional[int] = self._counters.get(key)
+        if count is None:
+            count = self.counter_handler.read_counter(*key)
+            self._counters[key] = count
+        return count
+
+    def _get_metadata_counter(self, key: MetadataCounterKey) -> int:
+        count: Optional[int] = self._metadata_counters.get(key)
+        if count is None:
+            count = self.counter_handler.read_metadata_counter(*key)
+            self._metadata_counters[key] = count
+        return count
+
+    def _schedule_flush(self) -> None:
+        self._timer = threading.Timer(self.flush_interval, self._flush_periodically)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_periodically(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self.flush()
+            finally:
+                self._schedule_flush()
+
+    @staticmethod
+    def _get_key(entity_short_name: str, prov_short_name: str, identifier: int, supplier_prefix: str) -> CounterKey:
+        return entity_short_name, prov_short_name, identifier, supplier_prefix
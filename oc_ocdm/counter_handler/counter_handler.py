@@ -13,7 +13,15 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Iterable, List, Tuple
+
+    CounterKey = Tuple[str, str, int, str]
 
 
 class CounterHandler(ABC):
@@ -128,3 +136,71 @@ class CounterHandler(ABC):
         :return: The newly-updated (already incremented) counter value.
         """
         raise NotImplementedError
+
+    def read_counters(self, keys: Iterable[CounterKey]) -> List[int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once.
+        Each key is a tuple made of the parameters that ``read_counter`` would receive, that is
+        ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``.
+
+        The default implementation calls ``read_counter`` for each key: it should be overridden
+        by the counter handlers which can read many values with a single access to their storage.
+
+        :param keys: The keys of the requested counter values
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :return: The requested counter values, in the same order as the keys.
+        """
+        return [self.read_counter(entity_short_name, prov_short_name, identifier, supplier_prefix)
+                for entity_short_name, prov_short_name, identifier, supplier_prefix in keys]
+
+    def increment_counters(self, keys: Iterable[CounterKey]) -> List[int]:
+        """
+        It allows to increment by one unit many counter values of graph and provenance entities at once.
+        Each key is a tuple made of the parameters that ``increment_counter`` would receive, that is
+        ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``. A key which appears
+        more than once is incremented once per occurrence.
+
+        The default implementation calls ``increment_counter`` for each key: it should be overridden
+        by the counter handlers which can update many values with a single access to their storage.
+
+        :param keys: The keys of the counter values to be incremented
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :return: The newly-updated (already incremented) counter values, in the same order as the keys.
+        """
+        return [self.increment_counter(entity_short_name, prov_short_name, identifier, supplier_prefix)
+                for entity_short_name, prov_short_name, identifier, supplier_prefix in keys]
+
+    def reserve_block(self, entity_short_name: str, n: int, supplier_prefix: str = "") -> int:
+        """
+        It allows to reserve a block of ``n`` consecutive counter values for graph entities,
+        by incrementing the counter value by ``n`` units at once. The reserved values range from the
+        returned one to the returned one plus ``n`` minus one.
+
+        The default implementation reads the counter value and then sets it, hence it is not atomic:
+        it should be overridden by the counter handlers that can be shared by several processes.
+
+        :param entity_short_name: The short name associated to the type of the entities
+        :type entity_short_name: str
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``n`` is less than or equal to zero.
+        :return: The first counter value of the reserved block.
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+        first_value: int = self.read_counter(entity_short_name, supplier_prefix=supplier_prefix) + 1
+        self.set_counter(first_value + n - 1, entity_short_name, supplier_prefix=supplier_prefix)
+        return first_value
+
+    def flush(self) -> None:
+        """
+        It makes sure that every counter value set so far has been persisted by the underlying
+        storage. The default implementation does nothing, since most of the concrete counter handlers
+        write each value as soon as it gets modified: it should be overridden by those which
+        postpone their writes.
+
+        :return: None
+        """
+        pass
@@ -0,0 +1,158 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+from rdflib import ConjunctiveGraph, URIRef
+
+from oc_ocdm.counter_handler.cached_counter_handler import CachedCounterHandler
+from oc_ocdm.support.support import entity_regex, find_stored_files, prov_regex
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+
+    from oc_ocdm.counter_handler.counter_handler import CounterHandler
+
+    CounterKey = Tuple[str, str, int, str]
+
+_entity_pattern: re.Pattern = re.compile(entity_regex)
+_prov_pattern: re.Pattern = re.compile(prov_regex)
+
+
+def rebuild_counters(base_dir: str, counter_handler: CounterHandler, workers: Optional[int] = None,
+                     overwrite: bool = False, context_map: Dict[str, Any] = None,
+                     short_names: Tuple[str, ...] = ("an", "ar", "be", "br", "ci", "de", "id", "pl", "ra", "re", "rp"),
+                     chunk_size: int = 100) -> Dict[CounterKey, int]:
+    """
+    It rebuilds the counters of graph and provenance entities from the RDF files stored inside
+    the given folder (typically by ``Storer.store_all``, following the layout defined by ``find_paths``).
+    Every file (zipped or not, along with its pending journal, if any) is parsed and the IRIs
+    of its subjects are inspected, so as to find:
+
+    * for each short name and supplier prefix, the greatest count of the graph entities (including
+      the deleted ones, whose IRIs can still be found in the subjects of their snapshots);
+    * for each graph entity, the greatest count of its snapshots.
+
+    The resulting values are then written into the given counter handler through its batch API,
+    if it offers one (see ``CachedCounterHandler``).
+
+    :param base_dir: The path of the folder containing the stored files
+    :type base_dir: str
+    :param counter_handler: The counter handler to be updated
+    :type counter_handler: CounterHandler
+    :param workers: If greater than one, the number of processes parsing the files in parallel
+    :type workers: Optional[int]
+    :param overwrite: If True, the counters are set to the values found even if they are currently
+      greater (which could lead to the reuse of some IRIs). Otherwise, they are only increased.
+    :type overwrite: bool
+    :param context_map: The mapping from remote JSON-LD contexts to local ones, passed to the ``Reader``
+    :type context_map: Dict[str, Any]
+    :param short_names: The short names of the graph entities whose counters must be rebuilt
+    :type short_names: Tuple[str, ...]
+    :param chunk_size: The number of files sent to a worker process at once
+    :type chunk_size: int
+    :raises IOError: if any of the files cannot be parsed. In this case, no counter gets updated.
+    :return: A dictionary mapping each counter found, identified by the tuple
+      ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``, to its rebuilt value
+    """
+    tasks: List[Tuple[Optional[str], Optional[str]]] = list(find_stored_files(base_dir))
+    chunks: List[List[Tuple[Optional[str], Optional[str]]]] = [tasks[i:i + chunk_size]
+                                                               for i in range(0, len(tasks), chunk_size)]
+    args: List[Tuple[List[Tuple[Optional[str], Optional[str]]], Dict[str, Any], Tuple[str, ...]]] = \
+        [(chunk, context_map, short_names) for chunk in chunks]
+
+    if workers is not None and workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_scan_files, args))
+    else:
+        results = [_scan_files(arg) for arg in args]
+
+    counters: Dict[CounterKey, int] = {}
+    failed_files: List[str] = []
+    for chunk_counters, chunk_failed_files in results:
+        failed_files.extend(chunk_failed_files)
+        for key, value in chunk_counters.items():
+            if value > counters.get(key, 0):
+                counters[key] = value
+    if failed_files:
+        raise IOError(f"Unable to rebuild the counters, since the following files cannot be parsed: "
+                      f"{', '.join(sorted(failed_files))}")
+
+    keys: List[CounterKey] = list(counters.keys())
+    if not overwrite and keys:
+        current_values: List[int] = counter_handler.read_counters(keys)
+        keys = [key for key, current_value in zip(keys, current_values) if counters[key] > current_value]
+
+    # The cache takes care of writing the values through the batch API of the counter handler
+    cache: CachedCounterHandler = CachedCounterHandler(counter_handler, flush_at_exit=False)
+    for key in keys:
+        cache.set_counter(counters[key], *key)
+    cache.flush()
+    return counters
+
+
+def _scan_files(arg: Tuple[List[Tuple[Optional[str], Optional[str]]], Dict[str, Any], Tuple[str, ...]]) \
+        -> Tuple[Dict[CounterKey, int], List[str]]:
+    # The import is delayed, since the Reader depends on (and is
+    # therefore imported after) the counter handlers
+    from oc_ocdm.reader import Reader
+
+    files, context_map, short_names = arg
+    reader: Reader = Reader(context_map=context_map)
+    counters: Dict[CounterKey, int] = {}
+    failed_files: List[str] = []
+    for file_path, journal_path in files:
+        if file_path is not None:
+            graph: Optional[ConjunctiveGraph] = reader.load(file_path, with_journal=False)
+            if graph is None:
+                failed_files.append(file_path)
+                continue
+        else:
+            graph: ConjunctiveGraph = ConjunctiveGraph()
+        if journal_path is not None:
+            Reader.apply_journal(graph, journal_path)
+
+        for subject in set(graph.subjects()):
+            if isinstance(subject, URIRef):
+                for key, value in _get_counters(str(subject), short_names):
+                    if value > counters.get(key, 0):
+                        counters[key] = value
+    return counters, failed_files
+
+
+def _get_counters(iri: str, short_names: Tuple[str, ...]) -> List[Tuple[CounterKey, int]]:
+    if "/prov/" in iri:
+        match: Optional[re.Match] = _prov_pattern.match(iri)
+        if match is None or match.group(5) != "se" or not match.group(4).isdigit():
+            return []
+        short_name, supplier_prefix, count, snapshot_count = match.group(2, 3, 4, 6)
+        if short_name not in short_names:
+            return []
+        # The snapshots of a deleted entity are still part of the provenance, even if its
+        # triples were removed from the data files: its count must not be reused either
+        return [((short_name, "se", int(count), supplier_prefix or ""), int(snapshot_count)),
+                ((short_name, "", 1, supplier_prefix or ""), int(count))]
+
+    match: Optional[re.Match] = _entity_pattern.match(iri)
+    if match is None or not match.group(4).isdigit():
+        return []
+    short_name, supplier_prefix, count = match.group(2, 3, 4)
+    if short_name not in short_names:
+        return []
+    return [((short_name, "", 1, supplier_prefix or ""), int(count))]
@@ -20,8 +20,10 @@ from shutil import copymode, move
 from tempfile import mkstemp
 from typing import TYPE_CHECKING
 
+from filelock import FileLock
+
 if TYPE_CHECKING:
-    from typing import BinaryIO, Tuple, List, Dict
+    from typing import BinaryIO, Tuple, List, Dict, Iterable, Set
 
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 from oc_ocdm.support.support import is_string_empty
@@ -119,6 +121,31 @@ class FilesystemCounterHandler(CounterHandler):
         with open(file_path, 'w') as file:
             file.writelines(lines)
 
+    def read_counters(self, keys: Iterable[Tuple[str, str, int, str]]) -> List[int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once,
+        reading each involved file only once.
+
+        :param keys: The keys of the requested counter values, each one being a tuple
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :raises ValueError: if any ``identifier`` is less than or equal to zero.
+        :return: The requested counter values, in the same order as the keys.
+        """
+        locations: List[Tuple[str, int]] = []
+        line_numbers: Dict[str, Set[int]] = {}
+        for entity_short_name, prov_short_name, identifier, supplier_prefix in keys:
+            if prov_short_name == "se":
+                file_path: str = self._get_prov_path(entity_short_name, supplier_prefix)
+            else:
+                file_path: str = self._get_info_path(entity_short_name, supplier_prefix)
+            locations.append((file_path, identifier))
+            line_numbers.setdefault(file_path, set()).add(identifier)
+
+        numbers: Dict[str, Dict[int, int]] = {file_path: self._read_numbers(file_path, file_line_numbers)
+                                              for file_path, file_line_numbers in line_numbers.items()}
+        return [numbers[file_path][identifier] for file_path, identifier in locations]
+
     def read_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = "") -> int:
         """
         It allows to read the counter value of graph and provenance entities.
@@ -163,6 +190,35 @@ class FilesystemCounterHandler(CounterHandler):
             file_path: str = self._get_info_path(entity_short_name, supplier_prefix)
         return self._add_number(file_path, identifier)
 
+    def reserve_block(self, entity_short_name: str, n: int, supplier_prefix: str = "") -> int:
+        """
+        It allows to reserve a block of ``n`` consecutive counter values for graph entities.
+        The counter file is updated while holding a ``FileLock`` on it, so that the blocks reserved
+        by different processes never overlap. The reserved values range from the
+        returned one to the returned one plus ``n`` minus one.
+
+        **NOTE: the plain counter updates do not acquire the lock, hence every process sharing
+        the counters must reserve its values through this method.**
+
+        :param entity_short_name: The short name associated to the type of the entities
+        :type entity_short_name: str
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``n`` is less than or equal to zero.
+        :return: The first counter value of the reserved block.
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+
+        file_path: str = self._get_info_path(entity_short_name, supplier_prefix)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with FileLock(f"{file_path}.lock"):
+            first_value: int = self._read_number(file_path, 1) + 1
+            self._set_number(first_value + n - 1, file_path, 1)
+        return first_value
+
     def _get_info_path(self, short_name: str, supplier_prefix: str) -> str:
         supplier_prefix = "" if supplier_prefix is None else supplier_prefix
         directory = self.info_dir if supplier_prefix == self.supplier_prefix or not self.supplier_prefix else self.info_dir.replace(self.supplier_prefix, supplier_prefix, 1)
@@ -208,6 +264,23 @@ class FilesystemCounterHandler(CounterHandler):
             print(f"Unexpected error: {e}")
         return cur_number
 
+    def _read_numbers(self, file_path: str, line_numbers: Set[int]) -> Dict[int, int]:
+        if any(line_number <= 0 for line_number in line_numbers):
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        numbers: Dict[int, int] = {line_number: 0 for line_number in line_numbers}
+        if not os.path.isfile(file_path):
+            return numbers
+        with open(file_path, 'r') as file:
+            for i, line in enumerate(file, 1):
+                if i in numbers:
+                    line = line.strip()
+                    try:
+                        numbers[i] = int(line) if line else 0
+                    except ValueError as e:
+                        print(f"ValueError: {e}")
+        return numbers
+
     def _add_number(self, file_path: str, line_number: int = 1) -> int:
         if line_number <= 0:
             raise ValueError("line_number must be a positive non-zero integer number!")
@@ -0,0 +1,198 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import struct
+from array import array
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import BinaryIO, ClassVar, Dict, List, Optional, Set, Tuple
+
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+
+
+class MmapCounterHandler(FilesystemCounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that persistently stores
+    the counter values within the filesystem, using binary files made of fixed-width records.
+
+    The counter associated to the identifier ``n`` is stored as an unsigned 64-bit little-endian
+    integer at offset ``(n - 1) * 8`` of the file, which is accessed through ``mmap``: reading, setting
+    and incrementing a counter cost O(1), regardless of the size of the file. Missing records are
+    considered as zero-valued counters.
+
+    Files are organized exactly as the ones of ``FilesystemCounterHandler``, with the ``.bin``
+    extension in place of ``.txt``. Existing text files can be converted through ``convert_text_files``.
+
+    **NOTE: modified records are written in the page cache of the operating system, which writes them
+    back to the disk even if the process terminates abruptly. Call** ``flush`` **to force writing them
+    (e.g. for protecting them against a crash of the whole system).**
+    """
+
+    _record: ClassVar[struct.Struct] = struct.Struct("<Q")
+    _min_file_size: ClassVar[int] = 64 * 1024
+    _text_file_pattern: ClassVar[re.Pattern] = re.compile(r"^(info_file_|prov_file_|metadata_).+\.txt$")
+
+    def __init__(self, info_dir: str, supplier_prefix: str = "") -> None:
+        """
+        Constructor of the ``MmapCounterHandler`` class.
+
+        :param info_dir: The path to the folder that does/will contain the counter values.
+        :type info_dir: str
+        :raises ValueError: if ``info_dir`` is None or an empty string.
+        """
+        super(MmapCounterHandler, self).__init__(info_dir, supplier_prefix)
+        self.info_files: Dict[str, str] = {key: ("info_file_" + key + ".bin")
+                                           for key in self.short_names}
+        self.prov_files: Dict[str, str] = {key: ("prov_file_" + key + ".bin")
+                                           for key in self.short_names}
+        self._maps: Dict[str, Tuple[BinaryIO, mmap.mmap]] = {}
+
+    def _get_metadata_path(self, short_name: str, dataset_name: str) -> str:
+        return self.datasets_dir + dataset_name + os.sep + 'metadata_' + short_name + '.bin'
+
+    def _get_map(self, file_path: str, min_size: int, grow: bool) -> Optional[mmap.mmap]:
+        entry: Optional[Tuple[BinaryIO, mmap.mmap]] = self._maps.get(file_path)
+        if entry is not None and len(entry[1]) >= min_size:
+            return entry[1]
+
+        if entry is None:
+            if not os.path.isfile(file_path):
+                if not grow:
+                    return None
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                open(file_path, 'ab').close()
+            file: BinaryIO = open(file_path, 'r+b')
+        else:
+            file, old_map = entry
+            size: int = os.fstat(file.fileno()).st_size
+            if not grow and size <= len(old_map):
+                return old_map
+            # The file was enlarged (either by this or by another handler): it must be mapped again
+            old_map.close()
+            del self._maps[file_path]
+
+        size: int = os.fstat(file.fileno()).st_size
+        if grow and size < min_size:
+            # The file is enlarged geometrically, so that it must be mapped again only a few times
+            size = max(min_size, 2 * size, self._min_file_size)
+            file.truncate(size)
+        if size == 0:
+            file.close()
+            return None
+        new_map: mmap.mmap = mmap.mmap(file.fileno(), size)
+        self._maps[file_path] = (file, new_map)
+        return new_map
+
+    def _read_number(self, file_path: str, line_number: int) -> int:
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        offset: int = (line_number - 1) * self._record.size
+        cur_map: Optional[mmap.mmap] = self._get_map(file_path, offset + self._record.size, False)
+        if cur_map is None or len(cur_map) < offset + self._record.size:
+            return 0
+        return self._record.unpack_from(cur_map, offset)[0]
+
+    def _read_numbers(self, file_path: str, line_numbers: Set[int]) -> Dict[int, int]:
+        return {line_number: self._read_number(file_path, line_number) for line_number in line_numbers}
+
+    def _add_number(self, file_path: str, line_number: int = 1) -> int:
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        new_value: int = self._read_number(file_path, line_number) + 1
+        self._set_number(new_value, file_path, line_number)
+        return new_value
+
+    def _set_number(self, new_value: int, file_path: str, line_number: int = 1) -> None:
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        offset: int = (line_number - 1) * self._record.size
+        cur_map: mmap.mmap = self._get_map(file_path, offset + self._record.size, True)
+        self._record.pack_into(cur_map, offset, new_value)
+
+    def _set_numbers(self, file_path: str, updates: Dict[int, int]) -> None:
+        if not updates:
+            return
+        # The file is enlarged (at most) once, according to the greatest identifier
+        cur_map: mmap.mmap = self._get_map(file_path, max(updates.keys()) * self._record.size, True)
+        for line_number, new_value in updates.items():
+            if new_value < 0:
+                raise ValueError("new_value must be a non negative integer!")
+            if line_number <= 0:
+                raise ValueError("line_number must be a positive non-zero integer number!")
+            self._record.pack_into(cur_map, (line_number - 1) * self._record.size, new_value)
+
+    def flush(self) -> None:
+        """
+        It forces the modified records of every open file to be written to the disk.
+
+        :return: None
+        """
+        for _, cur_map in self._maps.values():
+            cur_map.flush()
+
+    def close(self) -> None:
+        """
+        It writes the modified records to the disk and closes every open file.
+        The handler can still be used afterwards, since files are opened again when needed.
+
+        :return: None
+        """
+        for file, cur_map in self._maps.values():
+            cur_map.flush()
+            cur_map.close()
+            file.close()
+        self._maps.clear()
+
+    @classmethod
+    def convert_text_files(cls, info_dir: str) -> List[str]:
+        """
+        It converts every counter file written by ``FilesystemCounterHandler`` inside the given
+        folder (and its subfolders) into the binary format used by this class. Each binary file is
+        written next to the related text file, which is left untouched.
+
+        **NOTE: this is a class method!**
+
+        :param info_dir: The path to the folder that contains the counter values.
+        :type info_dir: str
+        :return: The sorted list of the paths of the binary files that were written.
+        """
+        written_files: List[str] = []
+        for dir_path, _, file_names in os.walk(info_dir):
+            for file_name in file_names:
+                if cls._text_file_pattern.match(file_name):
+                    text_file_path: str = os.path.join(dir_path, file_name)
+                    binary_file_path: str = text_file_path[:-len(".txt")] + ".bin"
+                    records: array = array("Q")
+                    with open(text_file_path, 'r') as text_file:
+                        for line in text_file:
+                            line = line.strip()
+                            records.append(int(line) if line.isdigit() else 0)
+                    if records and array("Q", [1]).tobytes() != cls._record.pack(1):
+                        records.byteswap()  # Records are always stored in little-endian order
+                    with open(binary_file_path, 'wb') as binary_file:
+                        records.tofile(binary_file)
+                    written_files.append(binary_file_path)
+        return sorted(written_files)
@@ -14,7 +14,7 @@
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 
-from typing import Dict, Optional, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 import redis
 from tqdm import tqdm
@@ -26,7 +26,8 @@ class RedisCounterHandler(CounterHandler):
     """A concrete implementation of the ``CounterHandler`` interface that persistently stores
     the counter values within a Redis database."""
 
-    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, password: Optional[str] = None) -> None:
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 batch_size: int = 10000) -> None:
         """
         Constructor of the ``RedisCounterHandler`` class.
 
@@ -38,7 +39,11 @@ class RedisCounterHandler(CounterHandler):
         :type db: int
         :param password: Redis password (if required)
         :type password: Optional[str]
+        :param batch_size: The maximum number of keys sent within a single command (or pipeline)
+          by ``read_counters`` and ``increment_counters``
+        :type batch_size: int
         """
+        self.batch_size: int = batch_size
         self.redis = redis.Redis(host=host, port=port, db=db, password=password, decode_responses=True)
 
     def set_counter(self, new_value: int, entity_short_name: str, prov_short_name: str = "",
@@ -109,6 +114,64 @@ class RedisCounterHandler(CounterHandler):
         key = self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix)
         return self.redis.incr(key)
 
+    def read_counters(self, keys: Iterable[Tuple[str, str, int, str]]) -> List[int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once,
+        through ``MGET`` commands each one retrieving up to ``batch_size`` values.
+
+        :param keys: The keys of the requested counter values, each one being a tuple
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :return: The requested counter values, in the same order as the keys.
+        """
+        redis_keys: List[str] = [self._get_key(*key) for key in keys]
+        result: List[int] = []
+        for i in range(0, len(redis_keys), self.batch_size):
+            values = self.redis.mget(redis_keys[i:i + self.batch_size])
+            result.extend(int(value) if value is not None else 0 for value in values)
+        return result
+
+    def increment_counters(self, keys: Iterable[Tuple[str, str, int, str]]) -> List[int]:
+        """
+        It allows to increment by one unit many counter values of graph and provenance entities
+        at once, by sending the ``INCR`` commands through pipelines each one containing up to
+        ``batch_size`` of them.
+
+        :param keys: The keys of the counter values to be incremented, each one being a tuple
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :return: The newly-updated (already incremented) counter values, in the same order as the keys.
+        """
+        redis_keys: List[str] = [self._get_key(*key) for key in keys]
+        result: List[int] = []
+        for i in range(0, len(redis_keys), self.batch_size):
+            pipeline = self.redis.pipeline(transaction=False)
+            for redis_key in redis_keys[i:i + self.batch_size]:
+                pipeline.incr(redis_key)
+            result.extend(pipeline.execute())
+        return result
+
+    def reserve_block(self, entity_short_name: str, n: int, supplier_prefix: str = "") -> int:
+        """
+        It allows to reserve a block of ``n`` consecutive counter values for graph entities
+        through a single (atomic) ``INCRBY`` command. The reserved values range from the
+        returned one to the returned one plus ``n`` minus one.
+
+        :param entity_short_name: The short name associated to the type of the entities
+        :type entity_short_name: str
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``n`` is less than or equal to zero.
+        :return: The first counter value of the reserved block.
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+
+        key = self._get_key(entity_short_name, supplier_prefix=supplier_prefix)
+        return self.redis.incrby(key, n) - n + 1
+
     def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str) -> None:
         """
         It allows to set the counter value of metadata entities.
@@ -189,7 +252,8 @@ class RedisCounterHandler(CounterHandler):
             key_parts.append(prov_short_name)
         return ':'.join(filter(None, key_parts))
 
-    def batch_update_counters(self, updates: Dict[str, Dict[Tuple[str, str], Dict[int, int]]]) -> None:
+    def batch_update_counters(self, updates: Dict[str, Dict[Tuple[str, str], Dict[int, int]]],
+                              show_progress: bool = True) -> None:
         """
         Perform batch updates of counters, processing 1 million at a time with a progress bar.
 
@@ -203,6 +267,8 @@ class RedisCounterHandler(CounterHandler):
                 }
             }
         :type updates: Dict[str, Dict[Tuple[str, str], Dict[int, int]]]
+        :param show_progress: Whether the progress bar should be displayed or not
+        :type show_progress: bool
         """
         all_updates = []
         for supplier_prefix, value in updates.items():
@@ -214,7 +280,7 @@ class RedisCounterHandler(CounterHandler):
         total_updates = len(all_updates)
         batch_size = 1_000_000
 
-        with tqdm(total=total_updates, desc="Updating counters") as pbar:
+        with tqdm(total=total_updates, desc="Updating counters", disable=not show_progress) as pbar:
             for i in range(0, total_updates, batch_size):
                 batch = all_updates[i:i+batch_size]
                 pipeline = self.redis.pipeline()
@@ -0,0 +1,205 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from filelock import FileLock
+
+from oc_ocdm.counter_handler.mmap_counter_handler import MmapCounterHandler
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterator, Optional
+
+
+class SharedMmapCounterHandler(MmapCounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that allows several processes
+    running on the same host (e.g. the workers of a process pool) to share the same counters.
+
+    Counters are stored exactly as the ones of ``MmapCounterHandler``: since every process maps the same
+    files, the values written by one of them are immediately visible to the others through the page cache.
+    Each read-modify-write operation (increments and block reservations) holds a POSIX byte-range lock
+    on the 8 bytes of the related record only, so that processes updating different counters never wait
+    for each other. Files are only enlarged while holding a ``FileLock`` on them.
+
+    Instances can be pickled (e.g. passed as arguments to the workers of a process pool): the copy
+    opens the same files again. Modified records are written back to the disk by the operating system,
+    and can be forced to it at regular intervals through the ``checkpoint_interval`` parameter.
+
+    **NOTE: POSIX locks belong to processes, hence two instances of this class referring to the same
+    folder should not be used within the same process.**
+    """
+
+    def __init__(self, info_dir: str, supplier_prefix: str = "", checkpoint_interval: Optional[float] = None) -> None:
+        """
+        Constructor of the ``SharedMmapCounterHandler`` class.
+
+        :param info_dir: The path to the folder that does/will contain the counter values.
+        :type info_dir: str
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :param checkpoint_interval: If specified, the number of seconds after which the modified records
+          are periodically written to the disk by a background thread
+        :type checkpoint_interval: Optional[float]
+        :raises ValueError: if ``info_dir`` is None or an empty string, or ``checkpoint_interval``
+          is not a positive number.
+        :raises NotImplementedError: if the platform does not support POSIX locks.
+        """
+        if fcntl is None:
+            raise NotImplementedError("SharedMmapCounterHandler requires POSIX file locks (fcntl)!")
+        if checkpoint_interval is not None and checkpoint_interval <= 0:
+            raise ValueError("checkpoint_interval must be a positive number!")
+        super(SharedMmapCounterHandler, self).__init__(info_dir, supplier_prefix)
+        self.checkpoint_interval: Optional[float] = checkpoint_interval
+        self._init_process_state()
+
+    def _init_process_state(self) -> None:
+        # The threads of a process are serialized by a lock, while
+        # different processes are serialized by the record locks
+        self._lock: threading.RLock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._closed: bool = False
+        if self.checkpoint_interval is not None:
+            self._schedule_checkpoint()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = self.__dict__.copy()
+        for key in ("_maps", "_lock", "_timer", "_closed"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._maps = {}
+        self._init_process_state()
+
+    def reserve_block(self, entity_short_name: str, n: int, supplier_prefix: str = "") -> int:
+        """
+        It allows to reserve a block of ``n`` consecutive counter values for graph entities,
+        while holding the lock on the related record. The reserved values range from the
+        returned one to the returned one plus ``n`` minus one.
+
+        :param entity_short_name: The short name associated to the type of the entities
+        :type entity_short_name: str
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``n`` is less than or equal to zero.
+        :return: The first counter value of the reserved block.
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+        return self._add_to_number(self._get_info_path(entity_short_name, supplier_prefix), 1, n) - n + 1
+
+    def checkpoint(self) -> None:
+        """
+        It forces the modified records of every open file to be written to the disk.
+        It is called periodically if ``checkpoint_interval`` was specified.
+
+        :return: None
+        """
+        self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            super(SharedMmapCounterHandler, self).flush()
+
+    def close(self) -> None:
+        """
+        It stops the periodic checkpoints, writes the modified records to the disk and closes every open file.
+        The handler can still be used afterwards, since files are opened again when needed.
+
+        :return: None
+        """
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            super(SharedMmapCounterHandler, self).close()
+
+    def _get_map(self, file_path: str, min_size: int, grow: bool) -> Optional[mmap.mmap]:
+        with self._lock:
+            entry = self._maps.get(file_path)
+            if grow and (entry is None or len(entry[1]) < min_size):
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                # The size of the file is read again while holding the lock, hence two
+                # processes can never shrink what the other one has just enlarged
+                with FileLock(f"{file_path}.lock"):
+                    return super(SharedMmapCounterHandler, self)._get_map(file_path, min_size, grow)
+            return super(SharedMmapCounterHandler, self)._get_map(file_path, min_size, grow)
+
+    @contextmanager
+    def _locked_record(self, file_path: str, line_number: int) -> Iterator[mmap.mmap]:
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+        offset: int = (line_number - 1) * self._record.size
+        with self._lock:
+            cur_map: mmap.mmap = self._get_map(file_path, offset + self._record.size, True)
+            fd: int = self._maps[file_path][0].fileno()
+            fcntl.lockf(fd, fcntl.LOCK_EX, self._record.size, offset, os.SEEK_SET)
+            try:
+                yield cur_map
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN, self._record.size, offset, os.SEEK_SET)
+
+    def _add_to_number(self, file_path: str, line_number: int, n: int) -> int:
+        offset: int = (line_number - 1) * self._record.size
+        with self._locked_record(file_path, line_number) as cur_map:
+            new_value: int = self._record.unpack_from(cur_map, offset)[0] + n
+            self._record.pack_into(cur_map, offset, new_value)
+        return new_value
+
+    def _read_number(self, file_path: str, line_number: int) -> int:
+        with self._lock:
+            return super(SharedMmapCounterHandler, self)._read_number(file_path, line_number)
+
+    def _add_number(self, file_path: str, line_number: int = 1) -> int:
+        return self._add_to_number(file_path, line_number, 1)
+
+    def _set_number(self, new_value: int, file_path: str, line_number: int = 1) -> None:
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+        with self._locked_record(file_path, line_number) as cur_map:
+            self._record.pack_into(cur_map, (line_number - 1) * self._record.size, new_value)
+
+    def _set_numbers(self, file_path: str, updates: Dict[int, int]) -> None:
+        for line_number, new_value in updates.items():
+            self._set_number(new_value, file_path, line_number)
+
+    def _schedule_checkpoint(self) -> None:
+        self._timer = threading.Timer(self.checkpoint_interval, self._checkpoint_periodically)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _checkpoint_periodically(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self.checkpoint()
+            finally:
+                self._schedule_checkpoint()
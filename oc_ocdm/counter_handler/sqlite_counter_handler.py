@@ -14,83 +14,352 @@
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 
+from __future__ import annotations
+
 import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, Iterator, List, Tuple
 
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
+from oc_ocdm.support.support import get_count, get_prefix, get_short_name
 
 
 class SqliteCounterHandler(CounterHandler):
     """A concrete implementation of the ``CounterHandler`` interface that persistently stores
-    the counter values within a SQLite database."""
+    the counter values within a SQLite database.
+
+    The database is opened in WAL mode and every statement is parameterised. Increments are
+    performed by a single atomic ``UPSERT`` statement, so that several processes can safely share
+    the same database. Each modification is committed on its own, unless it is performed within a
+    ``transaction`` block, in which case all the modifications are committed together at its end."""
+
+    # RETURNING clauses are supported since SQLite 3.35.0
+    _supports_returning: bool = sqlite3.sqlite_version_info >= (3, 35, 0)
 
-    def __init__(self, database: str) -> None:
+    def __init__(self, database: str, timeout: float = 30.0) -> None:
         """
         Constructor of the ``SqliteCounterHandler`` class.
 
-        :param database: The name of the database
-        :type info_dir: str
+        If the database contains counters written by previous versions of this class
+        (which identified them by means of the IRI of the related graph entity),
+        they are migrated to the current layout.
+
+        :param database: The path of the database
+        :type database: str
+        :param timeout: How many seconds a connection waits for the lock held by another one
+        :type timeout: float
+        """
+        # Transactions are explicitly managed by the class itself
+        self.con: sqlite3.Connection = sqlite3.connect(database, timeout=timeout, isolation_level=None,
+                                                       check_same_thread=False)
+        self._lock: threading.RLock = threading.RLock()
+        self._transaction_depth: int = 0
+
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        with self.transaction():
+            self.con.execute("""CREATE TABLE IF NOT EXISTS counters(
+                entity_short_name TEXT NOT NULL,
+                prov_short_name TEXT NOT NULL,
+                identifier INTEGER NOT NULL,
+                supplier_prefix TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (entity_short_name, prov_short_name, identifier, supplier_prefix)) WITHOUT ROWID""")
+            self.con.execute("""CREATE TABLE IF NOT EXISTS metadata_counters(
+                entity_short_name TEXT NOT NULL,
+                dataset_name TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (entity_short_name, dataset_name)) WITHOUT ROWID""")
+            self._migrate_legacy_counters()
+
+    @contextmanager
+    def transaction(self) -> Iterator[SqliteCounterHandler]:
+        """
+        It returns a context manager which groups every modification performed within it
+        into a single transaction, committed when the block ends (or rolled back if it raises
+        an exception). Transactions can be nested: only the outermost one is actually committed.
+
+        :return: A context manager yielding the counter handler itself
         """
-        sqlite3.threadsafety = 3
-        self.con = sqlite3.connect(database)
-        self.cur = self.con.cursor()
-        self.cur.execute("""CREATE TABLE IF NOT EXISTS info(
-            entity TEXT PRIMARY KEY, 
-            count INTEGER)""")
+        with self._lock:
+            if self._transaction_depth == 0:
+                # The write lock is acquired immediately, so that read-then-write
+                # sequences cannot be interleaved with the ones of other processes
+                self.con.execute("BEGIN IMMEDIATE")
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self.con.execute("ROLLBACK")
+                raise
+            else:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self.con.execute("COMMIT")
 
-    def set_counter(self, new_value: int, entity_name: str) -> None:
+    def set_counter(self, new_value: int, entity_short_name: str, prov_short_name: str = "",
+                    identifier: int = 1, supplier_prefix: str = "") -> None:
         """
-        It allows to set the counter value of provenance entities.
+        It allows to set the counter value of graph and provenance entities.
 
         :param new_value: The new counter value to be set
         :type new_value: int
-        :param entity_name: The entity name
-        :type entity_name: str
-        :raises ValueError: if ``new_value`` is a negative integer.
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``new_value`` is a negative integer or ``identifier`` is less than or equal to zero.
         :return: None
         """
-        entity_name = str(entity_name)
         if new_value < 0:
             raise ValueError("new_value must be a non negative integer!")
-        self.cur.execute(f"INSERT OR REPLACE INTO info (entity, count) VALUES ('{entity_name}', {new_value})")
-        self.con.commit()
+        with self.transaction():
+            self.con.execute("INSERT OR REPLACE INTO counters VALUES (?, ?, ?, ?, ?)",
+                             (*self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix), new_value))
+
+    def set_counters_batch(self, updates: Dict[Tuple[str, str], Dict[int, int]], supplier_prefix: str) -> None:
+        """
+        It allows to set many counter values of graph and provenance entities within a single transaction.
+
+        :param updates: A dictionary mapping each tuple ``(entity_short_name, prov_short_name)``
+          to a dictionary which maps the identifiers to the new counter values
+        :type updates: Dict[Tuple[str, str], Dict[int, int]]
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if any of the new values is a negative integer or any identifier
+          is less than or equal to zero.
+        :return: None
+        """
+        rows: List[Tuple[str, str, int, str, int]] = []
+        for (entity_short_name, prov_short_name), counters in updates.items():
+            for identifier, new_value in counters.items():
+                if new_value < 0:
+                    raise ValueError("new_value must be a non negative integer!")
+                rows.append((*self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix), new_value))
+        with self.transaction():
+            self.con.executemany("INSERT OR REPLACE INTO counters VALUES (?, ?, ?, ?, ?)", rows)
 
-    def read_counter(self, entity_name: str) -> int:
+    def read_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = "") -> int:
         """
-        It allows to read the counter value of provenance entities.
+        It allows to read the counter value of graph and provenance entities.
 
-        :param entity_name: The entity name
-        :type entity_name: str
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``identifier`` is less than or equal to zero.
         :return: The requested counter value.
         """
-        entity_name = str(entity_name)
-        result = self.cur.execute(f"SELECT count FROM info WHERE entity='{entity_name}'")
-        rows = result.fetchall()
-        if len(rows) == 1:
-            return rows[0][0]
-        elif len(rows) == 0:
-            return 0
-        else:
-            raise(Exception("There is more than one counter for this entity. The databse id broken"))
+        with self._lock:
+            row = self.con.execute("""SELECT count FROM counters WHERE entity_short_name = ? AND prov_short_name = ?
+                AND identifier = ? AND supplier_prefix = ?""",
+                                   self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix)).fetchone()
+        return row[0] if row is not None else 0
+
+    def read_counters(self, keys: Iterable[Tuple[str, str, int, str]]) -> List[int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once,
+        within a single read transaction.
 
-    def increment_counter(self, entity_name: str) -> int:
+        :param keys: The keys of the requested counter values, each one being a tuple
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :raises ValueError: if any ``identifier`` is less than or equal to zero.
+        :return: The requested counter values, in the same order as the keys.
         """
-        It allows to increment the counter value of graph and provenance entities by one unit.
+        with self._lock:
+            in_transaction: bool = self._transaction_depth > 0
+            if not in_transaction:
+                self.con.execute("BEGIN")
+            try:
+                return [self.read_counter(*key) for key in keys]
+            finally:
+                if not in_transaction:
+                    self.con.execute("COMMIT")
 
-        :param entity_name: The entity name
-        :type entity_name: str
+    def increment_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1, supplier_prefix: str = "") -> int:
+        """
+        It allows to increment the counter value of graph and provenance entities by one unit,
+        through a single atomic statement.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``identifier`` is less than or equal to zero.
         :return: The newly-updated (already incremented) counter value.
         """
-        entity_name = str(entity_name)
-        cur_count = self.read_counter(entity_name)
-        count = cur_count + 1
-        self.set_counter(count, entity_name)
-        return count
-
-    def increment_metadata_counter(self):
-        pass
-    
-    def read_metadata_counter(self):
-        pass
-    
-    def set_metadata_counter(self):
-        pass
\ No newline at end of file
+        with self.transaction():
+            return self._add(self._get_key(entity_short_name, prov_short_name, identifier, supplier_prefix), 1)
+
+    def increment_counters(self, keys: Iterable[Tuple[str, str, int, str]]) -> List[int]:
+        """
+        It allows to increment by one unit many counter values of graph and provenance entities
+        within a single transaction.
+
+        :param keys: The keys of the counter values to be incremented, each one being a tuple
+          ``(entity_short_name, prov_short_name, identifier, supplier_prefix)``
+        :type keys: Iterable[Tuple[str, str, int, str]]
+        :raises ValueError: if any ``identifier`` is less than or equal to zero.
+        :return: The newly-updated (already incremented) counter values, in the same order as the keys.
+        """
+        with self.transaction():
+            return [self._add(self._get_key(*key), 1) for key in keys]
+
+    def reserve_block(self, entity_short_name: str, n: int, supplier_prefix: str = "") -> int:
+        """
+        It allows to reserve a block of ``n`` consecutive counter values for graph entities,
+        through a single atomic statement. The reserved values range from the
+        returned one to the returned one plus ``n`` minus one.
+
+        :param entity_short_name: The short name associated to the type of the entities
+        :type entity_short_name: str
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param supplier_prefix: The supplier prefix
+        :type supplier_prefix: str
+        :raises ValueError: if ``n`` is less than or equal to zero.
+        :return: The first counter value of the reserved block.
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+        with self.transaction():
+            return self._add(self._get_key(entity_short_name, "", 1, supplier_prefix), n) - n + 1
+
+    def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str) -> None:
+        """
+        It allows to set the counter value of metadata entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``new_value`` is a negative integer or ``dataset_name`` is None.
+        :return: None
+        """
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+        with self.transaction():
+            self.con.execute("INSERT OR REPLACE INTO metadata_counters VALUES (?, ?, ?)",
+                             (entity_short_name, dataset_name, new_value))
+
+    def read_metadata_counter(self, entity_short_name: str, dataset_name: str) -> int:
+        """
+        It allows to read the counter value of metadata entities.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None.
+        :return: The requested counter value.
+        """
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+        with self._lock:
+            row = self.con.execute("SELECT count FROM metadata_counters WHERE entity_short_name = ? AND dataset_name = ?",
+                                   (entity_short_name, dataset_name)).fetchone()
+        return row[0] if row is not None else 0
+
+    def increment_metadata_counter(self, entity_short_name: str, dataset_name: str) -> int:
+        """
+        It allows to increment the counter value of metadata entities by one unit,
+        through a single atomic statement.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None.
+        :return: The newly-updated (already incremented) counter value.
+        """
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+        with self.transaction():
+            upsert: str = """INSERT INTO metadata_counters VALUES (?, ?, 1)
+                ON CONFLICT (entity_short_name, dataset_name) DO UPDATE SET count = count + 1"""
+            if self._supports_returning:
+                return self.con.execute(upsert + " RETURNING count", (entity_short_name, dataset_name)).fetchone()[0]
+            self.con.execute(upsert, (entity_short_name, dataset_name))
+            return self.read_metadata_counter(entity_short_name, dataset_name)
+
+    def close(self) -> None:
+        """
+        It closes the connection to the database.
+
+        :return: None
+        """
+        with self._lock:
+            self.con.close()
+
+    def _add(self, key: Tuple[str, str, int, str], n: int) -> int:
+        # It must be called within a transaction
+        upsert: str = """INSERT INTO counters VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (entity_short_name, prov_short_name, identifier, supplier_prefix)
+            DO UPDATE SET count = count + excluded.count"""
+        if self._supports_returning:
+            return self.con.execute(upsert + " RETURNING count", (*key, n)).fetchone()[0]
+        self.con.execute(upsert, (*key, n))
+        return self.read_counter(*key)
+
+    def _migrate_legacy_counters(self) -> None:
+        # Previous versions stored only the snapshot counters, each one identified
+        # by the IRI of the related graph entity, within the 'info' table
+        legacy_table = self.con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'info'").fetchone()
+        if legacy_table is None:
+            return
+
+        migrated: List[Tuple[str]] = []
+        rows: List[Tuple[str, str, int, str, int]] = []
+        for entity, count in self.con.execute("SELECT entity, count FROM info").fetchall():
+            entity_short_name: str = get_short_name(entity)
+            entity_count: str = get_count(entity)
+            if "/prov/" in entity or not entity_short_name or not entity_count.isdigit() or int(entity_count) <= 0:
+                # Rows which cannot be interpreted are left untouched
+                continue
+            rows.append((entity_short_name, "se", int(entity_count), get_prefix(entity) or "", count))
+            migrated.append((entity,))
+        self.con.executemany("INSERT OR REPLACE INTO counters VALUES (?, ?, ?, ?, ?)", rows)
+        self.con.executemany("DELETE FROM info WHERE entity = ?", migrated)
+        if self.con.execute("SELECT COUNT(*) FROM info").fetchone()[0] == 0:
+            self.con.execute("DROP TABLE info")
+
+    @staticmethod
+    def _get_key(entity_short_name: str, prov_short_name: str, identifier: int,
+                 supplier_prefix: str) -> Tuple[str, str, int, str]:
+        identifier = int(identifier)
+        if identifier <= 0:
+            raise ValueError("identifier must be a positive non-zero integer number!")
+        return entity_short_name, prov_short_name, identifier, "" if supplier_prefix is None else supplier_prefix
@@ -21,7 +21,9 @@ from oc_ocdm.abstract_entity import AbstractEntity
 from rdflib import Graph, Namespace, URIRef
 
 if TYPE_CHECKING:
-    from typing import ClassVar, Dict, List, Optional, Tuple
+    from typing import ClassVar, Dict, Iterable, List, Optional, Tuple
+
+    from rdflib.term import Node
 
     from oc_ocdm.graph.graph_set import GraphSet
 
@@ -193,7 +195,8 @@ class GraphEntity(AbstractEntity):
 
     def __init__(self, g: Graph, g_set: GraphSet, res: URIRef = None, res_type: URIRef = None,
                  resp_agent: str = None, source: str = None, count: str = None, label: str = None,
-                 short_name: str = "", preexisting_graph: Graph = None) -> None:
+                 short_name: str = "",
+                 preexisting_graph: Graph|Iterable[Tuple[Node, Node]] = None) -> None:
         super(GraphEntity, self).__init__()
         self.g: Graph = g
         self.resp_agent: str = resp_agent
@@ -217,6 +220,7 @@ class GraphEntity(AbstractEntity):
             # If not already done, register this GraphEntity instance inside the GraphSet
             if self.res not in g_set.res_to_entity:
                 g_set.res_to_entity[self.res] = self
+                g_set._track_references(self)
 
         if preexisting_graph is not None:
             # Triples inside self.g are entirely replaced by triples from preexisting_graph.
@@ -225,9 +229,12 @@ class GraphEntity(AbstractEntity):
             # allowing the user to set this value later through a method would mean that the user could
             # set the preexisting graph AFTER having modified self.g (which would not make sense).
             self.remove_every_triple()
-            for p, o in preexisting_graph.predicate_objects(self.res):
-                self.g.add((self.res, p, o))
-                self.preexisting_graph.add((self.res, p, o))
+            # The triples of the entity can also be given directly, as (predicate, object) pairs
+            if isinstance(preexisting_graph, Graph):
+                preexisting_graph = preexisting_graph.predicate_objects(self.res)
+            triples: List[Tuple[URIRef, Node, Node]] = [(self.res, p, o) for p, o in preexisting_graph]
+            self.g.addN((s, p, o, self.g) for s, p, o in triples)
+            self.preexisting_graph.addN((s, p, o, self.preexisting_graph) for s, p, o in triples)
         else:
             # Add mandatory information to the entity graph
             self._create_type(res_type)
@@ -253,8 +260,8 @@ class GraphEntity(AbstractEntity):
     def mark_as_to_be_deleted(self) -> None:
         # Here we must REMOVE triples pointing
         # to 'self' [THIS CANNOT BE UNDONE]:
-        for res, entity in self.g_set.res_to_entity.items():
-            triples_list: List[Tuple] = list(entity.g.triples((res, None, self.res)))
+        for entity in self.g_set.get_referencing_entities(self.res):
+            triples_list: List[Tuple] = list(entity.g.triples((entity.res, None, self.res)))
             for triple in triples_list:
                 entity.g.remove(triple)
 
@@ -275,8 +282,8 @@ class GraphEntity(AbstractEntity):
 
         # Here we must REDIRECT triples pointing
         # to 'other' to make them point to 'self':
-        for res, entity in self.g_set.res_to_entity.items():
-            triples_list: List[Tuple] = list(entity.g.triples((res, None, other.res)))
+        for entity in self.g_set.get_referencing_entities(other.res):
+            triples_list: List[Tuple] = list(entity.g.triples((entity.res, None, other.res)))
             for triple in triples_list:
                 entity.g.remove(triple)
                 new_triple = (triple[0], triple[1], self.res)
@@ -299,6 +306,7 @@ class GraphEntity(AbstractEntity):
         other.mark_as_to_be_deleted()
 
     def commit_changes(self):
+        self._delta_cache = None
         self.preexisting_graph = Graph(identifier=self.g.identifier)
         if self._to_be_deleted:
             self.remove_every_triple()
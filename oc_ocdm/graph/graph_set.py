@@ -20,11 +20,13 @@ from typing import TYPE_CHECKING
 from oc_ocdm.abstract_set import AbstractSet
 from oc_ocdm.reader import Reader
 from oc_ocdm.support.support import get_count, get_prefix, get_short_name
+from oc_ocdm.support.tracked_graph import TrackedGraph
 from SPARQLWrapper import RDFXML, SPARQLWrapper
 
 if TYPE_CHECKING:
     from typing import Dict, ClassVar, Tuple, Optional, List, Set
     from rdflib import ConjunctiveGraph
+    from rdflib import term
 
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 from oc_ocdm.counter_handler.filesystem_counter_handler import \
@@ -51,6 +53,7 @@ from oc_ocdm.graph.entities.bibliographic.responsible_agent import \
 from oc_ocdm.graph.entities.identifier import Identifier
 from oc_ocdm.graph.graph_entity import GraphEntity
 from rdflib import Graph, Namespace, URIRef
+from rdflib.namespace import NamespaceManager
 
 
 class GraphSet(AbstractSet):
@@ -70,14 +73,24 @@ class GraphSet(AbstractSet):
     }
 
     def __init__(self, base_iri: str, info_dir: str = "", supplier_prefix: str = "",
-                 wanted_label: bool = True, custom_counter_handler: CounterHandler = None) -> None:
+                 wanted_label: bool = True, custom_counter_handler: CounterHandler = None,
+                 id_block_size: int = 1) -> None:
         super(GraphSet, self).__init__()
-        # The following variable maps a URIRef with the related graph entity
-        self.res_to_entity: Dict[URIRef, GraphEntity] = {}
+        # The following variable maps a URIRef with the URIRefs of the entities
+        # whose graph contains at least one triple pointing to it
+        self._incoming_refs: Dict[URIRef, Set[URIRef]] = {}
         self.base_iri: str = base_iri
         self.info_dir: str = info_dir
         self.supplier_prefix: str = supplier_prefix
         self.wanted_label: bool = wanted_label
+        # When greater than one, the counter values of the new entities are taken from blocks
+        # of this size reserved in advance, which are mapped by (short name, supplier prefix)
+        # to the next value to be used and to the last one of the block
+        if id_block_size <= 0:
+            raise ValueError("id_block_size must be a positive non-zero integer number!")
+        self.id_block_size: int = id_block_size
+        self._id_blocks: Dict[Tuple[str, str], List[int]] = {}
+        self._namespace_manager: Optional[NamespaceManager] = None
         # Graphs
         # The following structure of URL is quite important for the other classes
         # developed and should not be changed. The only part that can change is the
@@ -228,7 +241,7 @@ class GraphSet(AbstractSet):
                                   preexisting_graph)
 
     def _add(self, graph_url: str, short_name: str, res: URIRef = None) -> Tuple[Graph, Optional[str], Optional[str]]:
-        cur_g: Graph = Graph(identifier=graph_url)
+        cur_g: Graph = TrackedGraph(identifier=graph_url)
         self._set_ns(cur_g)
 
         count: Optional[str] = None
@@ -241,15 +254,69 @@ class GraphSet(AbstractSet):
                 res_count: int = -1
             if res_count > self.counter_handler.read_counter(short_name, supplier_prefix=supplier_prefix):
                 self.counter_handler.set_counter(res_count, short_name, supplier_prefix=supplier_prefix)
+            id_block: Optional[List[int]] = self._id_blocks.get((short_name, supplier_prefix))
+            if id_block is not None and id_block[0] <= res_count:
+                # The values of the block up to the given one cannot be used anymore
+                id_block[0] = res_count + 1
             return cur_g, count, label
 
-        count = supplier_prefix + str(self.counter_handler.increment_counter(short_name, supplier_prefix=supplier_prefix))
+        if self.id_block_size > 1:
+            count = supplier_prefix + str(self._next_id_from_block(short_name, supplier_prefix))
+        else:
+            count = supplier_prefix + str(self.counter_handler.increment_counter(short_name, supplier_prefix=supplier_prefix))
 
         if self.wanted_label:
             label = "%s %s [%s/%s]" % (self.labels[short_name], count, short_name, count)
 
         return cur_g, count, label
 
+    def _next_id_from_block(self, short_name: str, supplier_prefix: str) -> int:
+        id_block: Optional[List[int]] = self._id_blocks.get((short_name, supplier_prefix))
+        if id_block is None or id_block[0] > id_block[1]:
+            first_value: int = self.counter_handler.reserve_block(short_name, self.id_block_size, supplier_prefix)
+            id_block = [first_value, first_value + self.id_block_size - 1]
+            self._id_blocks[(short_name, supplier_prefix)] = id_block
+        next_value: int = id_block[0]
+        id_block[0] += 1
+        return next_value
+
+    def get_referencing_entities(self, res: URIRef) -> List[GraphEntity]:
+        """
+        It returns the entities of the set whose graph contains at least
+        one triple having the given URI as its object.
+
+        :param res: The URI of the referenced entity
+        :type res: URIRef
+        :return: The list of the entities pointing to ``res``
+        """
+        result: List[GraphEntity] = []
+        for entity_res in self._incoming_refs.get(res, ()):
+            entity: Optional[GraphEntity] = self.get_entity(entity_res)
+            if entity is not None:
+                result.append(entity)
+        return result
+
+    def _track_references(self, entity: GraphEntity) -> None:
+        if isinstance(entity.g, TrackedGraph):
+            entity_res: URIRef = entity.res
+
+            def observer(g: Graph, triple: Tuple[term.Node, term.Node, term.Node], added: bool) -> None:
+                s, p, o = triple
+                if s != entity_res or type(o) != URIRef:
+                    return
+                if added:
+                    self._incoming_refs.setdefault(o, set()).add(entity_res)
+                elif (entity_res, None, o) not in g:
+                    referencing: Optional[Set[URIRef]] = self._incoming_refs.get(o)
+                    if referencing is not None:
+                        referencing.discard(entity_res)
+                        if not referencing:
+                            del self._incoming_refs[o]
+
+            entity.g.observers.append(observer)
+            for triple in entity.g.triples((entity_res, None, None)):
+                observer(entity.g, triple, True)
+
     def get_orphans(self) -> List[GraphEntity]:
         full_set_of_entities: Set[URIRef] = set(self.res_to_entity.keys())
         referenced_entities: Set[URIRef] = set()
@@ -284,124 +351,81 @@ class GraphSet(AbstractSet):
                         imported_entity.g.remove((imported_entity.res, None, entity_res))
 
     def commit_changes(self):
-        for res, entity in self.res_to_entity.items():
+        for res, entity in list(self.res_to_entity.items()):
+            # The flag must be read before committing, since
+            # entity.commit_changes() resets it
+            to_be_deleted: bool = entity.to_be_deleted
             entity.commit_changes()
-            if entity.to_be_deleted:
+            if to_be_deleted:
                 del self.res_to_entity[res]
+        # Counter handlers which postpone their writes
+        # must persist them along with the entities
+        self.counter_handler.flush()
 
     def _set_ns(self, g: Graph) -> None:
-        g.namespace_manager.bind("an", Namespace(self.g_an))
-        g.namespace_manager.bind("ar", Namespace(self.g_ar))
-        g.namespace_manager.bind("be", Namespace(self.g_be))
-        g.namespace_manager.bind("ci", Namespace(self.g_ci))
-        g.namespace_manager.bind("de", Namespace(self.g_de))
-        g.namespace_manager.bind("br", Namespace(self.g_br))
-        g.namespace_manager.bind("id", Namespace(self.g_id))
-        g.namespace_manager.bind("pl", Namespace(self.g_pl))
-        g.namespace_manager.bind("ra", Namespace(self.g_ra))
-        g.namespace_manager.bind("re", Namespace(self.g_re))
-        g.namespace_manager.bind("rp", Namespace(self.g_rp))
-        g.namespace_manager.bind("biro", GraphEntity.BIRO)
-        g.namespace_manager.bind("co", GraphEntity.CO)
-        g.namespace_manager.bind("c4o", GraphEntity.C4O)
-        g.namespace_manager.bind("cito", GraphEntity.CITO)
-        g.namespace_manager.bind("datacite", GraphEntity.DATACITE)
-        g.namespace_manager.bind("dcterms", GraphEntity.DCTERMS)
-        g.namespace_manager.bind("deo", GraphEntity.DEO)
-        g.namespace_manager.bind("doco", GraphEntity.DOCO)
-        g.namespace_manager.bind("fabio", GraphEntity.FABIO)
-        g.namespace_manager.bind("foaf", GraphEntity.FOAF)
-        g.namespace_manager.bind("frbr", GraphEntity.FRBR)
-        g.namespace_manager.bind("literal", GraphEntity.LITERAL)
-        g.namespace_manager.bind("oa", GraphEntity.OA)
-        g.namespace_manager.bind("oco", GraphEntity.OCO)
-        g.namespace_manager.bind("prism", GraphEntity.PRISM)
-        g.namespace_manager.bind("pro", GraphEntity.PRO)
+        # The namespaces are bound only once, in a manager which is then shared
+        # by the graphs of all the entities, since binding them is quite expensive
+        if self._namespace_manager is None:
+            namespace_manager: NamespaceManager = NamespaceManager(Graph())
+            namespace_manager.bind("an", Namespace(self.g_an))
+            namespace_manager.bind("ar", Namespace(self.g_ar))
+            namespace_manager.bind("be", Namespace(self.g_be))
+            namespace_manager.bind("ci", Namespace(self.g_ci))
+            namespace_manager.bind("de", Namespace(self.g_de))
+            namespace_manager.bind("br", Namespace(self.g_br))
+            namespace_manager.bind("id", Namespace(self.g_id))
+            namespace_manager.bind("pl", Namespace(self.g_pl))
+            namespace_manager.bind("ra", Namespace(self.g_ra))
+            namespace_manager.bind("re", Namespace(self.g_re))
+            namespace_manager.bind("rp", Namespace(self.g_rp))
+            namespace_manager.bind("biro", GraphEntity.BIRO)
+            namespace_manager.bind("co", GraphEntity.CO)
+            namespace_manager.bind("c4o", GraphEntity.C4O)
+            namespace_manager.bind("cito", GraphEntity.CITO)
+            namespace_manager.bind("datacite", GraphEntity.DATACITE)
+            namespace_manager.bind("dcterms", GraphEntity.DCTERMS)
+            namespace_manager.bind("deo", GraphEntity.DEO)
+            namespace_manager.bind("doco", GraphEntity.DOCO)
+            namespace_manager.bind("fabio", GraphEntity.FABIO)
+            namespace_manager.bind("foaf", GraphEntity.FOAF)
+            namespace_manager.bind("frbr", GraphEntity.FRBR)
+            namespace_manager.bind("literal", GraphEntity.LITERAL)
+            namespace_manager.bind("oa", GraphEntity.OA)
+            namespace_manager.bind("oco", GraphEntity.OCO)
+            namespace_manager.bind("prism", GraphEntity.PRISM)
+            namespace_manager.bind("pro", GraphEntity.PRO)
+            self._namespace_manager = namespace_manager
+        g.namespace_manager = self._namespace_manager
 
     def get_an(self) -> Tuple[ReferenceAnnotation]:
-        result: Tuple[ReferenceAnnotation] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, ReferenceAnnotation):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("an")
 
     def get_ar(self) -> Tuple[AgentRole]:
-        result: Tuple[AgentRole] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, AgentRole):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("ar")
 
     def get_be(self) -> Tuple[BibliographicReference]:
-        result: Tuple[BibliographicReference] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, BibliographicReference):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("be")
 
     def get_br(self) -> Tuple[BibliographicResource]:
-        result: Tuple[BibliographicResource] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, BibliographicResource):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("br")
 
     def get_ci(self) -> Tuple[Citation]:
-        result: Tuple[Citation] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, Citation):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("ci")
 
     def get_de(self) -> Tuple[DiscourseElement]:
-        result: Tuple[DiscourseElement] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, DiscourseElement):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("de")
 
     def get_id(self) -> Tuple[Identifier]:
-        result: Tuple[Identifier] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, Identifier):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("id")
 
     def get_pl(self) -> Tuple[PointerList]:
-        result: Tuple[PointerList] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, PointerList):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("pl")
 
     def get_rp(self) -> Tuple[ReferencePointer]:
-        result: Tuple[ReferencePointer] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, ReferencePointer):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("rp")
 
     def get_ra(self) -> Tuple[ResponsibleAgent]:
-        result: Tuple[ResponsibleAgent] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, ResponsibleAgent):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("ra")
 
     def get_re(self) -> Tuple[ResourceEmbodiment]:
-        result: Tuple[ResourceEmbodiment] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, ResourceEmbodiment):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("re")
@@ -21,7 +21,8 @@ from oc_ocdm.abstract_entity import AbstractEntity
 from rdflib import URIRef, Namespace, Graph
 
 if TYPE_CHECKING:
-    from typing import ClassVar, Dict
+    from typing import ClassVar, Dict, Iterable
+    from rdflib.term import Node
     from oc_ocdm.metadata.metadata_set import MetadataSet
 
 
@@ -56,7 +57,7 @@ class MetadataEntity(AbstractEntity):
     def __init__(self, g: Graph, base_iri: str, dataset_name: str, m_set: MetadataSet,
                  res: URIRef = None, res_type: URIRef = None, resp_agent: str = None,
                  source: str = None, count: str = None, label: str = None, short_name: str = "",
-                 preexisting_graph: Graph = None) -> None:
+                 preexisting_graph: Graph|Iterable[Tuple[Node, Node]] = None) -> None:
         super(MetadataEntity, self).__init__()
         self.g: Graph = g
         self.base_iri: str = base_iri
@@ -93,9 +94,12 @@ class MetadataEntity(AbstractEntity):
             # allowing the user to set this value later through a method would mean that the user could
             # set the preexisting graph AFTER having modified self.g (which would not make sense).
             self.remove_every_triple()
-            for p, o in preexisting_graph.predicate_objects(self.res):
-                self.g.add((self.res, p, o))
-                self.preexisting_graph.add((self.res, p, o))
+            # The triples of the entity can also be given directly, as (predicate, object) pairs
+            if isinstance(preexisting_graph, Graph):
+                preexisting_graph = preexisting_graph.predicate_objects(self.res)
+            triples: List[Tuple[URIRef, Node, Node]] = [(self.res, p, o) for p, o in preexisting_graph]
+            self.g.addN((s, p, o, self.g) for s, p, o in triples)
+            self.preexisting_graph.addN((s, p, o, self.preexisting_graph) for s, p, o in triples)
         else:
             # Add mandatory information to the entity graph
             self._create_type(res_type)
@@ -170,6 +174,7 @@ class MetadataEntity(AbstractEntity):
         other.mark_as_to_be_deleted()
 
     def commit_changes(self):
+        self._delta_cache = None
         self.preexisting_graph = Graph(identifier=self.g.identifier)
         if self._to_be_deleted:
             self.remove_every_triple()
@@ -23,6 +23,7 @@ from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHan
 from oc_ocdm.metadata.entities.dataset import Dataset
 from oc_ocdm.metadata.entities.distribution import Distribution
 from oc_ocdm.support.support import get_count, is_dataset, get_short_name
+from oc_ocdm.support.tracked_graph import TrackedGraph
 
 if TYPE_CHECKING:
     from typing import Dict, Optional, Tuple, ClassVar
@@ -42,8 +43,6 @@ class MetadataSet(AbstractSet):
 
     def __init__(self, base_iri: str, info_dir: str = "", wanted_label: bool = True) -> None:
         super(MetadataSet, self).__init__()
-        # The following variable maps a URIRef with the related metadata entity
-        self.res_to_entity: Dict[URIRef, MetadataEntity] = {}
         self.base_iri: str = base_iri
         if self.base_iri[-1] != '/':
             self.base_iri += '/'
@@ -85,7 +84,7 @@ class MetadataSet(AbstractSet):
 
     def _add_metadata(self, short_name: str, dataset_name: str,
                       res: URIRef = None) -> Tuple[Graph, Optional[str], Optional[str]]:
-        cur_g: Graph = Graph()
+        cur_g: Graph = TrackedGraph()
         self._set_ns(cur_g)
 
         count: Optional[str] = None
@@ -110,10 +109,16 @@ class MetadataSet(AbstractSet):
         return cur_g, count, label
 
     def commit_changes(self):
-        for res, entity in self.res_to_entity.items():
+        for res, entity in list(self.res_to_entity.items()):
+            # The flag must be read before committing, since
+            # entity.commit_changes() resets it
+            to_be_deleted: bool = entity.to_be_deleted
             entity.commit_changes()
-            if entity.to_be_deleted:
+            if to_be_deleted:
                 del self.res_to_entity[res]
+        # Counter handlers which postpone their writes
+        # must persist them along with the entities
+        self.counter_handler.flush()
 
     @staticmethod
     def _set_ns(g: Graph) -> None:
@@ -122,17 +127,7 @@ class MetadataSet(AbstractSet):
         g.namespace_manager.bind("void", MetadataEntity.VOID)
 
     def get_dataset(self) -> Tuple[Dataset]:
-        result: Tuple[Dataset] = tuple()
-        for ref in self.res_to_entity:
-            entity: MetadataEntity = self.res_to_entity[ref]
-            if isinstance(entity, Dataset):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("_dataset_")
 
     def get_di(self) -> Tuple[Distribution]:
-        result: Tuple[Distribution] = tuple()
-        for ref in self.res_to_entity:
-            entity: MetadataEntity = self.res_to_entity[ref]
-            if isinstance(entity, Distribution):
-                result += (entity, )
-        return result
+        return self.res_to_entity.get_by_short_name("di")
@@ -29,15 +29,17 @@ if TYPE_CHECKING:
 
 from rdflib import Graph, URIRef
 
+from oc_ocdm.counter_handler.cached_counter_handler import \
+    CachedCounterHandler
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 from oc_ocdm.counter_handler.filesystem_counter_handler import \
     FilesystemCounterHandler
 from oc_ocdm.counter_handler.in_memory_counter_handler import \
     InMemoryCounterHandler
-from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.prov_entity import ProvEntity
 from oc_ocdm.support.support import (get_count, get_prefix, get_short_name)
+from oc_ocdm.support.tracked_graph import TrackedGraph
 
 
 class ProvSet(AbstractSet):
@@ -51,8 +53,6 @@ class ProvSet(AbstractSet):
                  supplier_prefix: str = "") -> None:
         super(ProvSet, self).__init__()
         self.prov_g: GraphSet = prov_subj_graph_set
-        # The following variable maps a URIRef with the related provenance entity
-        self.res_to_entity: Dict[URIRef, ProvEntity] = {}
         self.base_iri: str = base_iri
         self.wanted_label: bool = wanted_label
         self.info_dir = info_dir
@@ -110,14 +110,60 @@ class ProvSet(AbstractSet):
         merge_description += "."
         return merge_description
 
-    def generate_provenance(self, c_time: float = None) -> set:
-        modified_entities = set()
-
+    def generate_provenance(self, c_time: float = None, batch_counters: bool = False) -> set:
+        """
+        It generates the snapshots of the entities of the ``GraphSet`` which were created,
+        modified, merged or deleted.
+
+        If ``batch_counters`` is True, the snapshot counters are read all together in advance and
+        written all together at the end, instead of accessing the counter handler once per entity.
+        The new values are set rather than incremented: this is only safe when no other process
+        modifies the same counters while the provenance is being generated, since otherwise
+        two processes may produce the same snapshot. The same happens, whatever the value of
+        ``batch_counters``, when the counter handler of the set is a ``CachedCounterHandler``.
+
+        :param c_time: The timestamp used for the generation time of the snapshots (now, if not specified)
+        :type c_time: float, optional
+        :param batch_counters: If True, the snapshot counters are read and written in batch
+        :type batch_counters: bool
+        :return: The set of the IRIs of the entities whose snapshots were generated
+        """
         if c_time is None:
             cur_time: str = datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
         else:
             cur_time: str = datetime.fromtimestamp(c_time, tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
 
+        counter_handler: CounterHandler = self.counter_handler
+        if not batch_counters and not isinstance(counter_handler, CachedCounterHandler):
+            return self._generate_snapshots(cur_time)
+
+        if not isinstance(counter_handler, CachedCounterHandler):
+            self.counter_handler = CachedCounterHandler(counter_handler, flush_at_exit=False)
+        try:
+            self.counter_handler.read_counters(self._get_snapshot_counter_keys())
+            return self._generate_snapshots(cur_time)
+        finally:
+            self.counter_handler.flush()
+            self.counter_handler = counter_handler
+
+    def _get_snapshot_counter_keys(self) -> List[Tuple[str, str, int, str]]:
+        keys: List[Tuple[str, str, int, str]] = []
+        for cur_subj in self.prov_g.res_to_entity.values():
+            if cur_subj is None:
+                continue
+            for entity in [cur_subj, *cur_subj.merge_list]:
+                try:
+                    count: int = int(get_count(entity.res))
+                except ValueError:
+                    # Invalid IRIs are reported later, by _retrieve_last_snapshot
+                    continue
+                if count > 0:
+                    keys.append((get_short_name(entity.res), "se", count, get_prefix(str(entity.res))))
+        return keys
+
+    def _generate_snapshots(self, cur_time: str) -> set:
+        modified_entities = set()
+
         # MERGED ENTITIES
         for cur_subj in self.prov_g.res_to_entity.values():
             if cur_subj is None or (not cur_subj.was_merged or cur_subj.to_be_deleted):
@@ -203,7 +249,7 @@ class ProvSet(AbstractSet):
     
     def _add_prov(self, graph_url: str, short_name: str, prov_subject: GraphEntity,
                 res: URIRef = None, supplier_prefix: str = "") -> Tuple[Graph, Optional[str], Optional[str]]:
-        cur_g: Graph = Graph(identifier=graph_url)
+        cur_g: Graph = TrackedGraph(identifier=graph_url)
         self._set_ns(cur_g)
 
         count: Optional[str] = None
@@ -215,22 +261,12 @@ class ProvSet(AbstractSet):
             except ValueError:
                 res_count: int = -1
             
-            if isinstance(self.counter_handler, SqliteCounterHandler):
-                cur_count: int = self.counter_handler.read_counter(prov_subject)
-            else:
-                cur_count: int = self.counter_handler.read_counter(prov_subject.short_name, "se", int(get_count(prov_subject.res)), supplier_prefix=supplier_prefix)
-            
+            cur_count: int = self.counter_handler.read_counter(prov_subject.short_name, "se", int(get_count(prov_subject.res)), supplier_prefix=supplier_prefix)
             if res_count > cur_count:
-                if isinstance(self.counter_handler, SqliteCounterHandler):
-                    self.counter_handler.set_counter(int(get_count(prov_subject.res)), prov_subject)
-                else:
-                    self.counter_handler.set_counter(res_count, prov_subject.short_name, "se", int(get_count(prov_subject.res)), supplier_prefix=supplier_prefix)
+                self.counter_handler.set_counter(res_count, prov_subject.short_name, "se", int(get_count(prov_subject.res)), supplier_prefix=supplier_prefix)
             return cur_g, count, label
 
-        if isinstance(self.counter_handler, SqliteCounterHandler):
-            count = str(self.counter_handler.increment_counter(prov_subject))
-        else:
-            count = str(self.counter_handler.increment_counter(prov_subject.short_name, "se", int(get_count(prov_subject.res)), supplier_prefix=supplier_prefix))
+        count = str(self.counter_handler.increment_counter(prov_subject.short_name, "se", int(get_count(prov_subject.res)), supplier_prefix=supplier_prefix))
 
         if self.wanted_label:
             cur_short_name = prov_subject.short_name
@@ -262,10 +298,7 @@ class ProvSet(AbstractSet):
 
         supplier_prefix = get_prefix(str(prov_subject))
 
-        if isinstance(self.counter_handler, SqliteCounterHandler):
-            last_snapshot_count: str = str(self.counter_handler.read_counter(prov_subject))
-        else:
-            last_snapshot_count: str = str(self.counter_handler.read_counter(subj_short_name, "se", int(subj_count), supplier_prefix=supplier_prefix))
+        last_snapshot_count: str = str(self.counter_handler.read_counter(subj_short_name, "se", int(subj_count), supplier_prefix=supplier_prefix))
 
         if int(last_snapshot_count) <= 0:
             return None
@@ -273,9 +306,4 @@ class ProvSet(AbstractSet):
             return URIRef(str(prov_subject) + '/prov/se/' + last_snapshot_count)
 
     def get_se(self) -> Tuple[SnapshotEntity]:
-        result: Tuple[SnapshotEntity] = tuple()
-        for ref in self.res_to_entity:
-            entity: ProvEntity = self.res_to_entity[ref]
-            if isinstance(entity, SnapshotEntity):
-                result += (entity, )
-        return result
\ No newline at end of file
+        return self.res_to_entity.get_by_short_name("se")
\ No newline at end of file
@@ -18,25 +18,72 @@ from __future__ import annotations
 import time
 import json
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import TYPE_CHECKING
 from zipfile import ZipFile
 
 from rdflib import RDF, ConjunctiveGraph, Graph, URIRef
+from rdflib.parser import PythonInputSource
 from SPARQLWrapper import JSON, SPARQLWrapper
 
 from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.support.reporter import Reporter
-from oc_ocdm.support.support import build_graph_from_results
+from oc_ocdm.support.sparql_session import SparqlSession
+from oc_ocdm.support.support import (build_graph_from_results, find_stored_files, get_short_name,
+                                     get_triples_from_results, journal_extension)
 if TYPE_CHECKING:
-    from typing import Any, Dict, List, Optional, Set
+    from concurrent.futures import Future
+    from typing import Any, ClassVar, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+    from rdflib.term import Node
+
     from oc_ocdm.graph.graph_set import GraphSet
+    from oc_ocdm.support.entity_cache import EntityCache
 
 from pyshacl import validate
 
 
 class Reader(object):
 
-    def __init__(self, repok: Reporter = None, reperr: Reporter = None, context_map: Dict[str, Any] = None) -> None:
+    # The formats tried, in order, when the one of a file cannot be detected
+    formats: ClassVar[Tuple[str, ...]] = ("json-ld", "xml", "turtle", "trig", "nt11", "nquads")
+    extension_to_format: ClassVar[Dict[str, str]] = {
+        ".json": "json-ld", ".jsonld": "json-ld", ".rdf": "xml", ".xml": "xml", ".owl": "xml",
+        ".ttl": "turtle", ".trig": "trig", ".nt": "nt11", ".nq": "nquads"
+    }
+
+    # The types of the entities recognized by import_entities_from_graph, in order of priority,
+    # along with the name of the GraphSet method that creates them
+    type_to_add_method: ClassVar[Tuple[Tuple[URIRef, str], ...]] = (
+        (GraphEntity.iri_note, "add_an"),  # ReferenceAnnotation
+        (GraphEntity.iri_role_in_time, "add_ar"),  # AgentRole
+        (GraphEntity.iri_bibliographic_reference, "add_be"),  # BibliographicReference
+        (GraphEntity.iri_expression, "add_br"),  # BibliographicResource
+        (GraphEntity.iri_citation, "add_ci"),  # Citation
+        (GraphEntity.iri_discourse_element, "add_de"),  # DiscourseElement
+        (GraphEntity.iri_identifier, "add_id"),  # Identifier
+        (GraphEntity.iri_singleloc_pointer_list, "add_pl"),  # PointerList
+        (GraphEntity.iri_agent, "add_ra"),  # ResponsibleAgent
+        (GraphEntity.iri_manifestation, "add_re"),  # ResourceEmbodiment
+        (GraphEntity.iri_intextref_pointer, "add_rp")  # ReferencePointer
+    )
+
+    def __init__(self, repok: Reporter = None, reperr: Reporter = None, context_map: Dict[str, Any] = None,
+                 fail_fast: bool = False) -> None:
+        """
+        Constructor of the ``Reader`` class.
+
+        The format of each file is detected from its extension (or from the one of the zip member)
+        and, when it is unknown, from its first characters, so that a single parser is used.
+
+        :param context_map: The mapping from remote JSON-LD contexts to local files or dictionaries
+        :type context_map: Dict[str, Any], optional
+        :param fail_fast: If True, files which cannot be parsed with their detected format are
+          reported as not loadable. Otherwise, every other supported format is tried before giving up.
+        :type fail_fast: bool
+        """
+        self.fail_fast: bool = fail_fast
 
         if context_map is not None:
             self.context_map: Dict[str, Any] = context_map
@@ -59,11 +106,24 @@ class Reader(object):
         else:
             self.reperr: Reporter = reperr
 
-    def load(self, rdf_file_path: str) -> Optional[ConjunctiveGraph]:
+    def load(self, rdf_file_path: str, with_journal: bool = True) -> Optional[ConjunctiveGraph]:
+        """
+        It loads the given file. If a journal (written by a ``Storer`` in journaled mode) is found
+        next to it, its changes are applied to the loaded graph, so that the current content of the
+        file is returned even if it was not compacted yet (or even if only the journal exists).
+
+        :param rdf_file_path: The path of the file
+        :type rdf_file_path: str
+        :param with_journal: If False, the journal of the file (if any) is ignored
+        :type with_journal: bool
+        :return: The loaded graph, or None if the file cannot be loaded
+        """
         self.repok.new_article()
         self.reperr.new_article()
 
         loaded_graph: Optional[ConjunctiveGraph] = None
+        journal_file_path: str = rdf_file_path + journal_extension
+        has_journal: bool = with_journal and os.path.isfile(journal_file_path)
         if os.path.isfile(rdf_file_path):
 
             try:
@@ -73,14 +133,157 @@ class Reader(object):
                                          "It was impossible to handle the format used for "
                                          "storing the file (stored in the temporary path) "
                                          f"'{rdf_file_path}'. Additional details: {e}")
+                return None
+        elif has_journal:
+            loaded_graph = ConjunctiveGraph()
         else:
             self.reperr.add_sentence("[2] "
                                      f"The file specified ('{rdf_file_path}') doesn't exist.")
 
+        if has_journal:
+            Reader.apply_journal(loaded_graph, journal_file_path)
         return loaded_graph
 
+    def load_tree(self, base_dir: str, workers: int = None, short_names: Iterable[str] = None,
+                  supplier_prefixes: Iterable[str] = None, include_prov: bool = False, chunk_size: int = 100,
+                  max_in_flight: int = None) -> Iterator[ConjunctiveGraph]:
+        """
+        It loads every file stored inside the given folder following the layout defined by ``find_paths``
+        (i.e. ``base_dir/<short name>/<supplier prefix>/...``), applying the pending journals, if any.
+
+        The files are grouped in chunks of ``chunk_size`` files, which can be parsed by a pool of processes
+        by means of the ``workers`` parameter. The quads of each chunk are sent back and yielded, in the order
+        in which the files are found, as a single graph, so that they can be imported into a ``GraphSet``
+        (e.g. with ``import_entities_from_graph``) without holding the whole corpus in memory:
+        at most ``max_in_flight`` chunks are being parsed or waiting to be consumed at any time.
+
+        Files which cannot be loaded are reported through ``reperr`` and skipped.
+
+        :param base_dir: The path of the directory where the files were stored
+        :type base_dir: str
+        :param workers: The number of processes used for parsing the files (a sequential
+          execution is performed when it is not specified or lower than 2)
+        :type workers: int, optional
+        :param short_names: If specified, only the files of the entities having these short names are loaded
+        :type short_names: Iterable[str], optional
+        :param supplier_prefixes: If specified, only the files stored in the folders of these supplier
+          prefixes (or default directories, such as ``_``) are loaded
+        :type supplier_prefixes: Iterable[str], optional
+        :param include_prov: If True, the provenance files of the entities are loaded as well
+        :type include_prov: bool
+        :param chunk_size: The number of files parsed by a worker at once
+        :type chunk_size: int
+        :param max_in_flight: The maximum number of chunks submitted to the workers and not yet
+          consumed (twice the number of workers, if not specified)
+        :type max_in_flight: int, optional
+        :raises ValueError: if ``chunk_size`` or ``max_in_flight`` are not positive numbers.
+        :return: An iterator over the graphs containing the quads of each chunk of files
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive non-zero integer number!")
+        if max_in_flight is not None and max_in_flight <= 0:
+            raise ValueError("max_in_flight must be a positive non-zero integer number!")
+
+        self.repok.new_article()
+        self.reperr.new_article()
+
+        chunks: Iterator[List[Tuple[Optional[str], Optional[str]]]] = self._chunk_tree(
+            base_dir, None if short_names is None else set(short_names),
+            None if supplier_prefixes is None else set(supplier_prefixes), include_prov, chunk_size)
+        task_args: Tuple[Dict[str, Any], bool] = (self.context_map, self.fail_fast)
+
+        if workers is None or workers < 2:
+            for chunk in chunks:
+                yield self._graph_from_chunk(_load_files_worker((task_args, chunk)))
+            return
+
+        if max_in_flight is None:
+            max_in_flight = 2 * workers
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: Deque[Future] = deque()
+            try:
+                for chunk in chunks:
+                    if len(pending) >= max_in_flight:
+                        yield self._graph_from_chunk(pending.popleft().result())
+                    pending.append(executor.submit(_load_files_worker, (task_args, chunk)))
+                while pending:
+                    yield self._graph_from_chunk(pending.popleft().result())
+            finally:
+                # The consumer may stop iterating early
+                for future in pending:
+                    future.cancel()
+
+    @staticmethod
+    def _chunk_tree(base_dir: str, short_names: Optional[Set[str]], supplier_prefixes: Optional[Set[str]],
+                    include_prov: bool, chunk_size: int) -> Iterator[List[Tuple[Optional[str], Optional[str]]]]:
+        chunk: List[Tuple[Optional[str], Optional[str]]] = []
+        if not os.path.isdir(base_dir):
+            return
+        for short_name in sorted(os.listdir(base_dir)):
+            short_name_dir: str = os.path.join(base_dir, short_name)
+            if (short_names is not None and short_name not in short_names) or not os.path.isdir(short_name_dir):
+                continue
+            for prefix in sorted(os.listdir(short_name_dir)):
+                prefix_dir: str = os.path.join(short_name_dir, prefix)
+                if (supplier_prefixes is not None and prefix not in supplier_prefixes) or not os.path.isdir(prefix_dir):
+                    continue
+                for file_path, journal_path in find_stored_files(prefix_dir):
+                    cur_dir: str = os.path.dirname(file_path if file_path is not None else journal_path)
+                    if not include_prov and os.path.basename(cur_dir) == "prov":
+                        continue
+                    chunk.append((file_path, journal_path))
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+        if chunk:
+            yield chunk
+
+    def _graph_from_chunk(self, result: Tuple[List[Tuple], List[str], List[str]]) -> ConjunctiveGraph:
+        quads, loaded_files, errors = result
+        for sentence in errors:
+            self.reperr.add_sentence(sentence)
+        for file_path in loaded_files:
+            self.repok.add_sentence(f"File '{file_path}' loaded.")
+        graph: ConjunctiveGraph = ConjunctiveGraph()
+        contexts: Dict[Any, Graph] = {}
+        for s, p, o, c in quads:
+            context: Optional[Graph] = contexts.get(c)
+            if context is None:
+                context = contexts[c] = graph.get_context(c)
+            context.add((s, p, o))
+        return graph
+
+    @staticmethod
+    def apply_journal(graph: ConjunctiveGraph, journal_file_path: str) -> ConjunctiveGraph:
+        """
+        It replays, in order, the change records stored inside a journal (produced by a ``Storer``
+        in journaled mode) on the given graph. Each record is either a deletion line
+        ``D <IRI>`` (meaning that every quad having such IRI as subject must be removed) or a quad
+        serialized in N-Quads which must be added to the graph.
+
+        **NOTE: this is a static function!**
+
+        :param graph: The graph to be updated
+        :type graph: ConjunctiveGraph
+        :param journal_file_path: The path of the journal
+        :type journal_file_path: str
+        :return: The updated graph
+        """
+        pending_quads: List[str] = []
+        with open(journal_file_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("D <"):
+                    if pending_quads:
+                        graph.parse(data="".join(pending_quads), format="nquads")
+                        pending_quads = []
+                    graph.remove((URIRef(line[3:].rstrip().rstrip('>')), None, None, None))
+                elif line.strip() != "":
+                    pending_quads.append(line)
+        if pending_quads:
+            graph.parse(data="".join(pending_quads), format="nquads")
+        return graph
+
     def _load_graph(self, file_path: str) -> ConjunctiveGraph:
-        formats = ["json-ld", "rdfxml", "turtle", "trig", "nt11", "nquads"]
         loaded_graph = ConjunctiveGraph()
 
         if file_path.endswith('.zip'):
@@ -88,40 +291,82 @@ class Reader(object):
                 with ZipFile(file=file_path, mode="r") as archive:
                     for zf_name in archive.namelist():
                         with archive.open(zf_name) as f:
-                            if self._try_parse(loaded_graph, f, formats):
+                            if self._try_parse(loaded_graph, f, self._get_formats(zf_name, f)):
                                 return loaded_graph
             except Exception as e:
                 raise IOError(f"Error opening or reading zip file '{file_path}': {e}")
         else:
             try:
                 with open(file_path, 'rt', encoding='utf-8') as f:
-                    if self._try_parse(loaded_graph, f, formats):
+                    if self._try_parse(loaded_graph, f, self._get_formats(file_path, f)):
                         return loaded_graph
             except Exception as e:
                 raise IOError(f"Error opening or reading file '{file_path}': {e}")
 
         raise IOError(f"It was impossible to load the file '{file_path}' with supported formats.")
 
+    def _get_formats(self, file_name: str, file_obj) -> List[str]:
+        detected_format: Optional[str] = self.extension_to_format.get(os.path.splitext(file_name)[1].lower())
+        if detected_format is None:
+            detected_format = self._sniff_format(file_obj)
+        if detected_format is None:
+            return [] if self.fail_fast else list(self.formats)
+        if self.fail_fast:
+            return [detected_format]
+        return [detected_format] + [cur_format for cur_format in self.formats if cur_format != detected_format]
+
+    @staticmethod
+    def _sniff_format(file_obj) -> Optional[str]:
+        head: Union[str, bytes] = file_obj.read(1024)
+        file_obj.seek(0)
+        if isinstance(head, bytes):
+            head = head.decode('utf-8', errors='ignore')
+        head = head.lstrip('\ufeff \t\r\n')
+        if head.startswith(('{', '[')):
+            return "json-ld"
+        elif head.startswith(('<?xml', '<rdf:RDF')):
+            return "xml"
+        elif head[:7].lower() in ('@prefix', 'prefix ') or head[:5].lower() in ('@base', 'base '):
+            return "trig"
+        elif head.startswith(('<', '_:')):
+            # N-Triples documents are valid N-Quads documents
+            return "nquads"
+        return None
+
     def _try_parse(self, graph: ConjunctiveGraph, file_obj, formats: List[str]) -> bool:
+        # Some parsers close the file when they fail: the content is read only once,
+        # so that it can be parsed again with the other formats
+        data: Union[str, bytes] = file_obj.read() if formats else ""
         for cur_format in formats:
-            file_obj.seek(0)  # Reset file pointer to the beginning for each new attempt
+            # A parser may fail halfway through the file, after having added some triples: the attempt
+            # is performed on an empty graph, so that they can be discarded
+            attempt_g: ConjunctiveGraph = graph if len(graph) == 0 else ConjunctiveGraph()
             try:
                 if cur_format == "json-ld":
-                    json_ld_file = json.load(file_obj)
-                    if isinstance(json_ld_file, dict):
-                        json_ld_file = [json_ld_file]
-                    for json_ld_resource in json_ld_file:
-                        if "@context" in json_ld_resource and json_ld_resource["@context"] in self.context_map:
-                            json_ld_resource["@context"] = self.context_map[json_ld_resource["@context"]]["@context"]
-                    data = json.dumps(json_ld_file, ensure_ascii=False)
-                    graph.parse(data=data, format=cur_format)
+                    self._parse_json_ld(attempt_g, data)
                 else:
-                    graph.parse(file=file_obj, format=cur_format)
-                return True  # Success, no need to try other formats
+                    attempt_g.parse(data=data, format=cur_format)
             except Exception as e:
+                if len(attempt_g) > 0:
+                    attempt_g.remove((None, None, None))
+                if self.fail_fast:
+                    raise ValueError(f"the content is not valid {cur_format} ({e})")
                 continue  # Try the next format
+            if attempt_g is not graph:
+                graph.addN((s, p, o, c.identifier) for s, p, o, c in attempt_g.quads())
+            return True  # Success, no need to try other formats
         return False  # None of the formats succeeded
 
+    def _parse_json_ld(self, graph: ConjunctiveGraph, data: Union[str, bytes]) -> None:
+        json_ld_file = json.loads(data)
+        if isinstance(json_ld_file, dict):
+            json_ld_file = [json_ld_file]
+        for json_ld_resource in json_ld_file:
+            if "@context" in json_ld_resource and json_ld_resource["@context"] in self.context_map:
+                json_ld_resource["@context"] = self.context_map[json_ld_resource["@context"]]["@context"]
+        # The parsed document is handed over to rdflib as it is, without serializing it again
+        graph.parse(source=PythonInputSource(json_ld_file), format="json-ld")
+
     @staticmethod
     def get_graph_from_subject(graph: Graph, subject: URIRef) -> Graph:
         g: Graph = Graph(identifier=graph.identifier)
@@ -166,64 +411,47 @@ class Reader(object):
     @staticmethod
     def import_entities_from_graph(g_set: GraphSet, results: List[Dict]|Graph, resp_agent: str,
                                    enable_validation: bool = False, closed: bool = False) -> List[GraphEntity]:
-        graph = build_graph_from_results(results) if isinstance(results, list) else results
-        if enable_validation:
-            reader = Reader()
-            graph = reader.graph_validation(graph, closed)
+        if isinstance(results, list) and not enable_validation:
+            triples: Iterable[Tuple[Node, Node, Node]] = get_triples_from_results(results)
+        else:
+            graph = build_graph_from_results(results) if isinstance(results, list) else results
+            if enable_validation:
+                reader = Reader()
+                graph = reader.graph_validation(graph, closed)
+            triples: Iterable[Tuple[Node, Node, Node]] = graph.triples((None, None, None))
+
+        # The triples are grouped by subject in a single pass, and each entity
+        # receives its own (predicate, object) pairs without building a new graph
+        subject_to_pairs: Dict[Node, List[Tuple[Node, Node]]] = {}
+        for s, p, o in triples:
+            pairs: Optional[List[Tuple[Node, Node]]] = subject_to_pairs.get(s)
+            if pairs is None:
+                pairs = subject_to_pairs[s] = []
+            pairs.append((p, o))
+
         imported_entities: List[GraphEntity] = []
-        for subject in Reader._extract_subjects(graph):
-            types = []
-            for o in graph.objects(subject, RDF.type):
-                types.append(o)
-            # ReferenceAnnotation
-            if GraphEntity.iri_note in types:
-                imported_entities.append(g_set.add_an(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # AgentRole
-            elif GraphEntity.iri_role_in_time in types:
-                imported_entities.append(g_set.add_ar(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # BibliographicReference
-            elif GraphEntity.iri_bibliographic_reference in types:
-                imported_entities.append(g_set.add_be(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # BibliographicResource
-            elif GraphEntity.iri_expression in types:
-                imported_entities.append(g_set.add_br(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # Citation
-            elif GraphEntity.iri_citation in types:
-                imported_entities.append(g_set.add_ci(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # DiscourseElement
-            elif GraphEntity.iri_discourse_element in types:
-                imported_entities.append(g_set.add_de(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # Identifier
-            elif GraphEntity.iri_identifier in types:
-                imported_entities.append(g_set.add_id(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # PointerList
-            elif GraphEntity.iri_singleloc_pointer_list in types:
-                imported_entities.append(g_set.add_pl(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # ResponsibleAgent
-            elif GraphEntity.iri_agent in types:
-                imported_entities.append(g_set.add_ra(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # ResourceEmbodiment
-            elif GraphEntity.iri_manifestation in types:
-                imported_entities.append(g_set.add_re(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
-            # ReferencePointer
-            elif GraphEntity.iri_intextref_pointer in types:
-                imported_entities.append(g_set.add_rp(resp_agent=resp_agent, res=subject,
-                                         preexisting_graph=Reader.get_graph_from_subject(graph, subject)))
+        for subject, pairs in subject_to_pairs.items():
+            types: Set[Node] = {o for p, o in pairs if p == RDF.type}
+            for entity_type, add_method in Reader.type_to_add_method:
+                if entity_type in types:
+                    imported_entities.append(getattr(g_set, add_method)(resp_agent=resp_agent, res=subject,
+                                                                         preexisting_graph=pairs))
+                    break
         return imported_entities
 
     @staticmethod
     def import_entity_from_triplestore(g_set: GraphSet, ts_url: str, res: URIRef, resp_agent: str,
-                                       enable_validation: bool = False) -> GraphEntity:
+                                       enable_validation: bool = False,
+                                       entity_cache: EntityCache = None) -> GraphEntity:
+        if entity_cache is not None:
+            # The triplestore is not queried at all if the entity was recently retrieved
+            cached_result: Optional[List[Dict]] = entity_cache.get(res)
+            if cached_result is not None:
+                imported_entities: List[GraphEntity] = Reader.import_entities_from_graph(
+                    g_set, cached_result, resp_agent, enable_validation)
+                if len(imported_entities) > 0:
+                    return imported_entities[0]
+
         query: str = f"SELECT ?s ?p ?o WHERE {{BIND (<{res}> AS ?s). ?s ?p ?o.}}"
         attempt = 0
         max_attempts = 3
@@ -238,6 +466,8 @@ class Reader(object):
                 result = sparql.queryAndConvert()['results']['bindings']
                 
                 if result:
+                    if entity_cache is not None:
+                        entity_cache.put(res, result)
                     imported_entities: List[GraphEntity] = Reader.import_entities_from_graph(g_set, result, resp_agent, enable_validation)
                     if len(imported_entities) <= 0:
                         raise ValueError("The requested entity was not found or was not recognized as a proper OCDM entity.")
@@ -255,4 +485,164 @@ class Reader(object):
                     print(f"[3] All {max_attempts} attempts failed. Could not import entity due to communication problems: {e}")
                     raise
 
-        raise Exception("Max attempts reached. Failed to import entity from triplestore.")
\ No newline at end of file
+        raise Exception("Max attempts reached. Failed to import entity from triplestore.")
+
+    @staticmethod
+    def import_entities_from_triplestore(g_set: GraphSet, ts_url: str, res_list: Iterable[URIRef], resp_agent: str,
+                                         enable_validation: bool = False, batch_size: int = 100,
+                                         workers: int = None, max_depth: int = 0,
+                                         entity_cache: EntityCache = None) -> List[GraphEntity]:
+        """
+        It imports many entities from a triplestore, retrieving the triples of (at most) ``batch_size``
+        entities with a single ``VALUES`` query. The queries can be distributed over a pool of ``workers``
+        threads, each one having its own persistent connection to the triplestore.
+
+        If ``max_depth`` is greater than zero, the entities referenced by the imported ones which are not
+        yet part of the ``GraphSet`` are imported as well, in breadth-first waves, up to the given
+        distance (e.g. with a depth of 3: bibliographic resources, then their agent roles, then
+        the responsible agents, then their identifiers).
+
+        The entities which are already part of the ``GraphSet`` are not retrieved again, while
+        the ones which are not found in the triplestore are ignored. If an ``entity_cache`` is specified,
+        the entities found in it are not retrieved either, and the retrieved ones are added to it.
+
+        **NOTE: this is a static function!**
+
+        :param g_set: The ``GraphSet`` where the entities must be imported
+        :type g_set: GraphSet
+        :param ts_url: The URL of the SPARQL endpoint
+        :type ts_url: str
+        :param res_list: The IRIs of the entities to be imported
+        :type res_list: Iterable[URIRef]
+        :param resp_agent: The responsible agent of the imported entities
+        :type resp_agent: str
+        :param enable_validation: If True, the triples of each wave are validated against the SHACL shapes
+        :type enable_validation: bool
+        :param batch_size: The maximum number of entities retrieved by a single query
+        :type batch_size: int
+        :param workers: The number of concurrent queries (a sequential execution is performed when
+          it is not specified or lower than 2)
+        :type workers: int, optional
+        :param max_depth: The maximum distance of the referenced entities to be imported from the given ones
+        :type max_depth: int
+        :param entity_cache: The cache of the entities retrieved from the triplestore, if specified
+        :type entity_cache: EntityCache, optional
+        :raises ValueError: if ``batch_size`` is not a positive number.
+        :return: The list of the requested entities and of the referenced ones which were imported
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive non-zero integer number!")
+
+        requested: Set[URIRef] = set()
+        wave: List[URIRef] = []
+        imported_entities: List[GraphEntity] = []
+        for res in res_list:
+            res = URIRef(res)
+            if res in requested:
+                continue
+            requested.add(res)
+            entity: Optional[GraphEntity] = g_set.get_entity(res)
+            if entity is not None:
+                imported_entities.append(entity)
+            else:
+                wave.append(res)
+
+        depth: int = 0
+        while wave:
+            results: List[Dict] = []
+            if entity_cache is not None:
+                to_be_retrieved: List[URIRef] = []
+                for res in wave:
+                    cached_result: Optional[List[Dict]] = entity_cache.get(res)
+                    if cached_result is not None:
+                        results.extend(cached_result)
+                    else:
+                        to_be_retrieved.append(res)
+                wave = to_be_retrieved
+
+            chunks: List[List[URIRef]] = [wave[i:i + batch_size] for i in range(0, len(wave), batch_size)]
+            n_lanes: int = min(workers, len(chunks)) if workers is not None and workers > 1 else 1
+            if not chunks:
+                retrieved_results: List[Dict] = []
+            elif n_lanes == 1:
+                retrieved_results: List[Dict] = Reader._query_chunks(ts_url, chunks)
+            else:
+                with ThreadPoolExecutor(max_workers=n_lanes) as executor:
+                    retrieved_results: List[Dict] = [binding for lane_results in executor.map(
+                        Reader._query_chunks, [ts_url] * n_lanes, [chunks[i::n_lanes] for i in range(n_lanes)])
+                        for binding in lane_results]
+            if entity_cache is not None and retrieved_results:
+                res_to_bindings: Dict[str, List[Dict]] = {}
+                for binding in retrieved_results:
+                    res_to_bindings.setdefault(binding['s']['value'], []).append(binding)
+                entity_cache.put_many(res_to_bindings)
+            results.extend(retrieved_results)
+
+            wave_entities: List[GraphEntity] = Reader.import_entities_from_graph(
+                g_set, results, resp_agent, enable_validation) if results else []
+            imported_entities.extend(wave_entities)
+
+            depth += 1
+            wave = []
+            if depth <= max_depth:
+                for entity in wave_entities:
+                    for o in entity.g.objects(entity.res, None):
+                        if isinstance(o, URIRef) and o not in requested and \
+                                str(o).startswith(g_set.base_iri) and get_short_name(o) in GraphEntity.short_name_to_type_iri:
+                            requested.add(o)
+                            if g_set.get_entity(o) is None:
+                                wave.append(o)
+        return imported_entities
+
+    @staticmethod
+    def _query_chunks(ts_url: str, chunks: List[List[URIRef]]) -> List[Dict]:
+        # Each lane of import_entities_from_triplestore sends its queries on its own connection
+        results: List[Dict] = []
+        with SparqlSession(ts_url) as session:
+            for chunk in chunks:
+                values: str = " ".join(res.n3() for res in chunk)
+                query: str = f"SELECT ?s ?p ?o WHERE {{ VALUES ?s {{ {values} }} ?s ?p ?o . }}"
+                attempt: int = 0
+                max_attempts: int = 3
+                wait_time: int = 5  # Initial wait time in seconds
+                while True:
+                    try:
+                        results.extend(json.loads(session.query(query))['results']['bindings'])
+                        break
+                    except Exception as e:
+                        attempt += 1
+                        if attempt >= max_attempts:
+                            print(f"[3] All {max_attempts} attempts failed. Could not import entities due to "
+                                  f"communication problems: {e}")
+                            raise
+                        print(f"[3] Attempt {attempt} failed. Could not import entities due to communication "
+                              f"problems: {e}")
+                        print(f"Retrying in {wait_time} seconds...")
+                        time.sleep(wait_time)
+                        wait_time *= 2  # Double the wait time for the next attempt
+        return results
+
+
+def _load_files_worker(task: Tuple[Tuple[Dict[str, Any], bool], List[Tuple[Optional[str], Optional[str]]]]) \
+        -> Tuple[List[Tuple], List[str], List[str]]:
+    # Executed by the worker processes of Reader.load_tree: it returns the quads of the
+    # given files, along with the files loaded and the sentences reported while loading them
+    (context_map, fail_fast), files = task
+    reader: Reader = Reader(repok=Reporter(print_sentences=False), reperr=Reporter(print_sentences=False),
+                            context_map=context_map, fail_fast=fail_fast)
+    quads: List[Tuple] = []
+    loaded_files: List[str] = []
+    errors: List[str] = []
+    for file_path, journal_path in files:
+        if file_path is not None:
+            graph: Optional[ConjunctiveGraph] = reader.load(file_path, with_journal=False)
+            errors.extend(reader.reperr.last_article)
+            if graph is None:
+                continue
+        else:
+            graph: ConjunctiveGraph = ConjunctiveGraph()
+        if journal_path is not None:
+            Reader.apply_journal(graph, journal_path)
+        quads.extend((s, p, o, c.identifier) for s, p, o, c in graph.quads())
+        loaded_files.append(file_path if file_path is not None else journal_path)
+    return quads, loaded_files, errors
\ No newline at end of file
@@ -18,6 +18,8 @@ from __future__ import annotations
 import json
 import os
 import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from typing import TYPE_CHECKING
 from zipfile import ZIP_DEFLATED, ZipFile
@@ -27,9 +29,11 @@ from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.metadata.metadata_entity import MetadataEntity
 from oc_ocdm.prov.prov_entity import ProvEntity
 from oc_ocdm.reader import Reader
-from oc_ocdm.support.query_utils import get_update_query
+from oc_ocdm.support.json_ld import graph_to_json_ld
+from oc_ocdm.support.query_utils import get_batch_update_query, get_entity_delta, get_update_query
 from oc_ocdm.support.reporter import Reporter
-from oc_ocdm.support.support import find_paths
+from oc_ocdm.support.sparql_session import SparqlSession
+from oc_ocdm.support.support import find_paths, find_paths_batch, journal_extension
 from rdflib import ConjunctiveGraph, URIRef
 from SPARQLWrapper import SPARQLWrapper
 
@@ -38,13 +42,15 @@ if TYPE_CHECKING:
 
     from oc_ocdm.abstract_entity import AbstractEntity
     from oc_ocdm.abstract_set import AbstractSet
+    from oc_ocdm.support.entity_cache import EntityCache
 
 
 class Storer(object):
 
     def __init__(self, abstract_set: AbstractSet, repok: Reporter = None, reperr: Reporter = None,
                  context_map: Dict[str, Any] = None, default_dir: str = "_", dir_split: int = 0,
-                 n_file_item: int = 1, output_format: str = "json-ld", zip_output: bool = False, modified_entities: set = None) -> None:
+                 n_file_item: int = 1, output_format: str = "json-ld", zip_output: bool = False, modified_entities: set = None,
+                 journaled: bool = False, entity_cache: EntityCache = None) -> None:
         # We only accept format strings that:
         # 1. are supported by rdflib
         # 2. correspond to an output format which is effectively either NT or NQ
@@ -57,11 +63,19 @@ class Storer(object):
         else:
             self.output_format: str = output_format
         self.zip_output = zip_output
+        # In journaled mode, store_all appends the changes of the entities to a journal placed next to
+        # each file (see compact_journal) instead of loading and rewriting the whole file every time
+        if journaled and (self.output_format == "json-ld" or self.zip_output):
+            raise ValueError("The journaled mode is only available for N-Triples and N-Quads "
+                             "output formats without zip compression.")
+        self.journaled: bool = journaled
         self.dir_split: int = dir_split
         self.n_file_item: int = n_file_item
         self.default_dir: str = default_dir if default_dir != "" else "_"
         self.a_set: AbstractSet = abstract_set
         self.modified_entities = modified_entities
+        # The entities uploaded to the triplestore are removed from the cache used to import them
+        self.entity_cache: Optional[EntityCache] = entity_cache
 
         if context_map is not None:
             self.context_map: Dict[str, Any] = context_map
@@ -95,35 +109,41 @@ class Storer(object):
         for g in self.a_set.graphs():
             cg.addN([item + (g.identifier,) for item in list(g)])
 
-        self._store_in_file(cg, file_path, context_path)
+        self._replace_file(cg, file_path, context_path)
 
-    def _store_in_file(self, cur_g: ConjunctiveGraph, cur_file_path: str, context_path: str = None) -> None:
-        # Note: the following lines from here and until 'cur_json_ld' are a sort of hack for including all
-        # the triples of the input graph into the final stored file. Somehow, some of them are not written
-        # in such file otherwise - in particular the provenance ones.
-        new_g: ConjunctiveGraph = ConjunctiveGraph()
-        for s, p, o in cur_g.triples((None, None, None)):
-            g_iri: Optional[URIRef] = None
-            for g_context in cur_g.contexts((s, p, o)):
-                g_iri = g_context.identifier
-                break
-            new_g.addN([(s, p, o, g_iri)])
+    def _get_output_path(self, cur_file_path: str) -> str:
+        return cur_file_path.replace(os.path.splitext(cur_file_path)[1], ".zip") if self.zip_output else cur_file_path
+
+    def _get_lock_path(self, cur_file_path: str) -> str:
+        # Every method which reads or writes a file (or its journal) must hold the lock built by this method
+        return f"{self._get_output_path(cur_file_path)}.lock"
 
+    def _replace_file(self, cur_g: ConjunctiveGraph, cur_file_path: str, context_path: str = None) -> None:
+        # The whole content of the file is replaced: the pending journal (if any)
+        # must be removed, otherwise it would be applied on top of the new content
+        with FileLock(self._get_lock_path(cur_file_path)):
+            self._store_in_file(cur_g, cur_file_path, context_path)
+            journal_file_path: str = self.get_journal_path(cur_file_path)
+            if os.path.exists(journal_file_path):
+                os.remove(journal_file_path)
+
+    def _store_in_file(self, cur_g: ConjunctiveGraph, cur_file_path: str, context_path: str = None) -> None:
+        # The graph is serialized as it is: every quad already carries the identifier of its named graph
         zip_file_path = cur_file_path.replace(os.path.splitext(cur_file_path)[1], ".zip")
         
         if self.zip_output:
             with ZipFile(zip_file_path, mode="w", compression=ZIP_DEFLATED, allowZip64=True) as zip_file:
-                self._write_graph(new_g, zip_file, cur_file_path, context_path)
+                self._write_graph(cur_g, zip_file, cur_file_path, context_path)
         else:
             # Handle non-zipped output directly to a file
-            self._write_graph(new_g, None, cur_file_path, context_path)
+            self._write_graph(cur_g, None, cur_file_path, context_path)
 
         self.repok.add_sentence(f"File '{cur_file_path}' added.")
 
     def _write_graph(self, graph: ConjunctiveGraph, zip_file: ZipFile, cur_file_path, context_path):
         if self.output_format == "json-ld":
-            # Serialize the graph in JSON-LD format
-            cur_json_ld = json.loads(graph.serialize(format="json-ld", context=self.context_map.get(context_path)))
+            # Convert the graph in JSON-LD format
+            cur_json_ld = graph_to_json_ld(graph, self.context_map.get(context_path))
             if context_path is not None and context_path in self.context_map:
                 if isinstance(cur_json_ld, dict):
                     cur_json_ld["@context"] = context_path
@@ -146,74 +166,243 @@ class Storer(object):
             else:
                 graph.serialize(destination=cur_file_path, format=self.output_format, encoding="utf-8")
 
-    def store_all(self, base_dir: str, base_iri: str, context_path: str = None, process_id: int|str = None) -> List[str]:
+    def store_all(self, base_dir: str, base_iri: str, context_path: str = None, process_id: int|str = None,
+                  workers: int = None) -> List[str]:
+        """
+        It stores every relevant entity of the set inside the file it belongs to. Each file
+        is loaded (if it already exists), updated with the entities that it must contain and
+        finally serialized again, while holding a ``FileLock`` on it.
+
+        In journaled mode, the changes are instead appended to the journal of each file (see
+        ``get_journal_path``), and the file itself is only written by ``compact_journal``.
+        Therefore, the returned paths may refer to files which do not exist yet: their current
+        content is returned by ``Reader.load``, which applies the pending journal of the file.
+
+        Since the files are independent from each other, their processing can be distributed
+        over a pool of processes by means of the ``workers`` parameter. In such case only the
+        triples of the entities are sent to the worker processes, and the result is identical
+        to the one obtained by a sequential execution.
+
+        :param base_dir: The path of the directory where the files will be stored
+        :type base_dir: str
+        :param base_iri: The base IRI of the entities
+        :type base_iri: str
+        :param context_path: The IRI of the JSON-LD context, if any
+        :type context_path: str, optional
+        :param process_id: An identifier which is appended to the name of the files, if specified
+        :type process_id: int|str, optional
+        :param workers: The number of processes used for storing the files (a sequential
+          execution is performed when it is not specified or lower than 2)
+        :type workers: int, optional
+        :return: The list of the paths of the stored files (even in journaled mode)
+        """
         self.repok.new_article()
         self.reperr.new_article()
 
         self.repok.add_sentence("Starting the process")
 
+        relevant_entities: List[AbstractEntity] = [
+            entity for entity in self.a_set.res_to_entity.values()
+            if self.modified_entities is None or URIRef(entity.res.split('/prov/se/')[0]) in self.modified_entities]
+        # The paths of all the entities are computed at once, and each directory is created only once
         relevant_paths: Dict[str, list] = dict()
-        for entity in self.a_set.res_to_entity.values():
-            is_relevant = True
-            if self.modified_entities is not None and URIRef(entity.res.split('/prov/se/')[0]) not in self.modified_entities:
-                is_relevant = False
-            if is_relevant:
-                cur_dir_path, cur_file_path = self._dir_and_file_paths(entity.res, base_dir, base_iri, process_id)
-                if not os.path.exists(cur_dir_path):
-                    os.makedirs(cur_dir_path)
-                relevant_paths.setdefault(cur_file_path, list())
-                relevant_paths[cur_file_path].append(entity)
-
-        for relevant_path, entities_in_path in relevant_paths.items():
-            stored_g = None
-            # Here we try to obtain a reference to the currently stored graph
-            output_filepath = relevant_path.replace(os.path.splitext(relevant_path)[1], ".zip") if self.zip_output else relevant_path
-            lock = FileLock(f"{output_filepath}.lock")
-            with lock:
-                if os.path.exists(output_filepath):
-                    stored_g = Reader(context_map=self.context_map).load(output_filepath)
-                if stored_g is None:
-                    stored_g = ConjunctiveGraph()
-                for entity_in_path in entities_in_path:
-                    self.store(entity_in_path, stored_g, relevant_path, context_path, False)
-                self._store_in_file(stored_g, relevant_path, context_path)
+        existing_dirs: Set[str] = set()
+        for entity, (cur_dir_path, cur_file_path) in zip(
+                relevant_entities, self._dir_and_file_paths_batch(relevant_entities, base_dir, base_iri, process_id)):
+            if cur_dir_path not in existing_dirs:
+                os.makedirs(cur_dir_path, exist_ok=True)
+                existing_dirs.add(cur_dir_path)
+            relevant_paths.setdefault(cur_file_path, list())
+            relevant_paths[cur_file_path].append(entity)
+
+        if workers is None or workers < 2 or len(relevant_paths) < 2:
+            for relevant_path, entities_in_path in relevant_paths.items():
+                changes: List[Tuple[URIRef, bool, List[Tuple]]] = [
+                    self._get_changes(entity) for entity in entities_in_path]
+                self._store_changes_in_file(changes, relevant_path, context_path)
+        else:
+            storer_args: Dict[str, Any] = {
+                "context_map": self.context_map,
+                "default_dir": self.default_dir,
+                "dir_split": self.dir_split,
+                "n_file_item": self.n_file_item,
+                "output_format": self.output_format,
+                "zip_output": self.zip_output,
+                "journaled": self.journaled
+            }
+            tasks: List[Tuple[Dict[str, Any], List[Tuple[URIRef, bool, List[Tuple]]], str, Optional[str]]] = []
+            for relevant_path, entities_in_path in relevant_paths.items():
+                changes: List[Tuple[URIRef, bool, List[Tuple]]] = [
+                    self._get_changes(entity) for entity in entities_in_path]
+                tasks.append((storer_args, changes, relevant_path, context_path))
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                # Results are collected in the same order of the tasks, so that
+                # the reports are identical to the ones of a sequential execution
+                for repok_sentences, reperr_sentences in executor.map(_store_changes_in_file_worker, tasks):
+                    for sentence in repok_sentences:
+                        self.repok.add_sentence(sentence)
+                    for sentence in reperr_sentences:
+                        self.reperr.add_sentence(sentence)
 
         return list(relevant_paths.keys())
 
+    def _store_changes_in_file(self, changes: List[Tuple[URIRef, bool, List[Tuple]]],
+                               cur_file_path: str, context_path: str = None) -> None:
+        stored_g = None
+        # Here we try to obtain a reference to the currently stored graph
+        output_filepath = self._get_output_path(cur_file_path)
+        journal_file_path: str = self.get_journal_path(cur_file_path)
+        lock = FileLock(self._get_lock_path(cur_file_path))
+        with lock:
+            if self.journaled:
+                self._append_changes_to_journal(changes, journal_file_path)
+                self.repok.add_sentence(f"Changes to file '{cur_file_path}' appended to '{journal_file_path}'.")
+                return
+
+            if os.path.exists(output_filepath):
+                stored_g = Reader(context_map=self.context_map).load(output_filepath, with_journal=False)
+            if stored_g is None:
+                stored_g = ConjunctiveGraph()
+            if os.path.exists(journal_file_path):
+                # Changes stored in journaled mode must be applied before the new ones
+                Reader.apply_journal(stored_g, journal_file_path)
+            for res, to_be_removed, quads in changes:
+                try:
+                    self._apply_changes(stored_g, res, to_be_removed, quads)
+                except Exception as e:
+                    self.reperr.add_sentence(f"[1] It was impossible to store the RDF statements in {cur_file_path}. {e}")
+            self._store_in_file(stored_g, cur_file_path, context_path)
+            if os.path.exists(journal_file_path):
+                os.remove(journal_file_path)
+
+    @staticmethod
+    def get_journal_path(cur_file_path: str) -> str:
+        """
+        It returns the path of the journal associated to the given file.
+
+        **NOTE: this is a static function!**
+
+        :param cur_file_path: The path of the file
+        :type cur_file_path: str
+        :return: The path of the journal
+        """
+        return cur_file_path + journal_extension
+
+    @staticmethod
+    def _append_changes_to_journal(changes: List[Tuple[URIRef, bool, List[Tuple]]], journal_file_path: str) -> None:
+        # Since each entity appears at most once in 'changes' and every quad has the
+        # related entity as subject, all the deletions can be written before all the quads
+        deletions: List[str] = [f"D <{res}>\n" for res, to_be_removed, _ in changes if to_be_removed]
+        quads_g: ConjunctiveGraph = ConjunctiveGraph()
+        for _, _, quads in changes:
+            if len(quads) > 0:
+                quads_g.addN(quads)
+        with open(journal_file_path, 'at', encoding='utf-8') as f:
+            f.writelines(deletions)
+            if len(quads_g) > 0:
+                f.write(quads_g.serialize(format="nquads"))
+
+    def compact_journal(self, cur_file_path: str, context_path: str = None) -> bool:
+        """
+        It folds the journal associated to the given file (if any) into the file itself,
+        which is rewritten according to the output format of the ``Storer``. The journal
+        is removed afterwards.
+
+        :param cur_file_path: The path of the file
+        :type cur_file_path: str
+        :param context_path: The IRI of the JSON-LD context, if any
+        :type context_path: str, optional
+        :return: True if a journal was found and compacted, False otherwise
+        """
+        journal_file_path: str = self.get_journal_path(cur_file_path)
+        lock = FileLock(self._get_lock_path(cur_file_path))
+        with lock:
+            if not os.path.exists(journal_file_path):
+                return False
+            stored_g = None
+            if os.path.exists(cur_file_path):
+                stored_g = Reader(context_map=self.context_map).load(cur_file_path, with_journal=False)
+            if stored_g is None:
+                stored_g = ConjunctiveGraph()
+            Reader.apply_journal(stored_g, journal_file_path)
+            self._store_in_file(stored_g, cur_file_path, context_path)
+            os.remove(journal_file_path)
+        return True
+
+    def compact_all_journals(self, base_dir: str, context_path: str = None) -> List[str]:
+        """
+        It folds every journal found inside the given directory (and its subdirectories) into
+        the related file, as done by ``compact_journal``.
+
+        :param base_dir: The path of the directory containing the stored files
+        :type base_dir: str
+        :param context_path: The IRI of the JSON-LD context, if any
+        :type context_path: str, optional
+        :return: The sorted list of the paths of the compacted files
+        """
+        compacted_paths: List[str] = []
+        for dir_path, _, file_names in os.walk(base_dir):
+            for file_name in file_names:
+                if file_name.endswith(journal_extension):
+                    cur_file_path: str = os.path.join(dir_path, file_name[:-len(journal_extension)])
+                    if self.compact_journal(cur_file_path, context_path):
+                        compacted_paths.append(cur_file_path)
+        return sorted(compacted_paths)
+
+    @staticmethod
+    def _get_changes(entity: AbstractEntity) -> Tuple[URIRef, bool, List[Tuple]]:
+        """
+        It describes how the stored graph must be updated in order to contain the current
+        state of the given entity, i.e. whether the quads having the entity as subject must be
+        removed and which quads must be (subsequently) added.
+
+        :param entity: The entity to be stored
+        :type entity: AbstractEntity
+        :return: A tuple containing the URI of the entity, a flag which is True when its
+          stored quads must be removed and the list of quads to be added
+        """
+        to_be_removed: bool = False
+        quads: List[Tuple] = []
+        if isinstance(entity, ProvEntity):
+            graph_identifier: URIRef = entity.g.identifier
+            for triple in entity.g.triples((entity.res, None, None)):
+                quads.append((*triple, graph_identifier))
+        elif isinstance(entity, GraphEntity) or isinstance(entity, MetadataEntity):
+            if entity.to_be_deleted:
+                to_be_removed = True
+            else:
+                if len(entity.preexisting_graph) > 0:
+                    """
+                    We're not in 'append mode', so we need to remove
+                    the entity that we're going to overwrite.
+                    """
+                    to_be_removed = True
+                """
+                Here we copy data from the entity into the stored graph.
+                If the entity was marked as to be deleted, then we're
+                done because we already removed all of its triples.
+                """
+                graph_identifier: URIRef = entity.g.identifier
+                for triple in entity.g.triples((entity.res, None, None)):
+                    quads.append((*triple, graph_identifier))
+        return entity.res, to_be_removed, quads
+
+    @staticmethod
+    def _apply_changes(destination_g: ConjunctiveGraph, res: URIRef, to_be_removed: bool, quads: List[Tuple]) -> None:
+        if to_be_removed:
+            destination_g.remove((res, None, None, None))
+        if len(quads) > 0:
+            destination_g.addN(quads)
+
     def store(self, entity: AbstractEntity, destination_g: ConjunctiveGraph, cur_file_path: str, context_path: str = None, store_now: bool = True) -> ConjunctiveGraph:
         self.repok.new_article()
         self.reperr.new_article()
 
         try:
-            if isinstance(entity, ProvEntity):
-                quads: List[Tuple] = []
-                graph_identifier: URIRef = entity.g.identifier
-                for triple in entity.g.triples((entity.res, None, None)):
-                    quads.append((*triple, graph_identifier))
-                destination_g.addN(quads)
-            elif isinstance(entity, GraphEntity) or isinstance(entity, MetadataEntity):
-                if entity.to_be_deleted:
-                    destination_g.remove((entity.res, None, None, None))
-                else:
-                    if len(entity.preexisting_graph) > 0:
-                        """
-                        We're not in 'append mode', so we need to remove
-                        the entity that we're going to overwrite.
-                        """
-                        destination_g.remove((entity.res, None, None, None))
-                    """
-                    Here we copy data from the entity into the stored graph.
-                    If the entity was marked as to be deleted, then we're
-                    done because we already removed all of its triples.
-                    """
-                    quads: List[Tuple] = []
-                    graph_identifier: URIRef = entity.g.identifier
-                    for triple in entity.g.triples((entity.res, None, None)):
-                        quads.append((*triple, graph_identifier))
-                    destination_g.addN(quads)
+            self._apply_changes(destination_g, *self._get_changes(entity))
 
             if store_now:
-                self._store_in_file(destination_g, cur_file_path, context_path)
+                self._replace_file(destination_g, cur_file_path, context_path)
 
             return destination_g
         except Exception as e:
@@ -241,6 +430,12 @@ class Storer(object):
         is_json: bool = (self.output_format == "json-ld")
         return find_paths(res, base_dir, base_iri, self.default_dir, self.dir_split, self.n_file_item, is_json=is_json, process_id=process_id)
 
+    def _dir_and_file_paths_batch(self, entities: List[AbstractEntity], base_dir: str, base_iri: str,
+                                  process_id: int|str = None) -> List[Tuple[str, str]]:
+        is_json: bool = (self.output_format == "json-ld")
+        return find_paths_batch((entity.res for entity in entities), base_dir, base_iri, self.default_dir,
+                                self.dir_split, self.n_file_item, is_json=is_json, process_id=process_id)
+
     @staticmethod
     def _class_to_entity_type(entity: AbstractEntity) -> Optional[str]:
         if isinstance(entity, GraphEntity):
@@ -252,56 +447,103 @@ class Storer(object):
         else:
             return None
 
-    def upload_all(self, triplestore_url: str, base_dir: str = None, batch_size: int = 10, save_queries: bool = False) -> bool:
+    def upload_all(self, triplestore_url: str, base_dir: str = None, batch_size: int = 10, save_queries: bool = False,
+                   workers: int = None, max_triples: int = None, max_bytes: int = None) -> bool:
+        """
+        It uploads the changes of every entity of the set into the triplestore, by means of
+        SPARQL Update requests each one grouping the changes of (at most) ``batch_size`` entities.
+        The size of each request can be further limited through a budget of triples (``max_triples``)
+        and of bytes of serialized statements (``max_bytes``): an entity whose changes alone exceed
+        the budget is sent in its own request. Inside a request, the statements targeting the same named
+        graph are merged in a single block. Requests are sent on persistent HTTP connections.
+
+        The upload can be distributed over a pool of ``workers`` threads, each one having its own
+        connection and handling its own retries. The updates of an entity are always sent by the same
+        worker (which is chosen according to the IRI of the entity) and in the same order in which
+        they would be sent by a sequential upload.
+
+        :param triplestore_url: The URL of the SPARQL endpoint
+        :type triplestore_url: str
+        :param base_dir: The directory where the requests that could not be uploaded are saved, if specified
+        :type base_dir: str, optional
+        :param batch_size: The maximum number of entities whose changes are grouped in the same request
+        :type batch_size: int, optional
+        :param max_triples: The maximum number of added and removed triples of a request, if specified
+        :type max_triples: int, optional
+        :param max_bytes: The maximum size (in bytes) of the statements of a request, if specified
+        :type max_bytes: int, optional
+        :param save_queries: If True, the requests are saved inside ``base_dir`` instead of being uploaded
+        :type save_queries: bool, optional
+        :param workers: The number of concurrent workers (a sequential upload is performed when
+          it is not specified or lower than 2)
+        :type workers: int, optional
+        :return: True if every request was successfully uploaded, False otherwise
+        """
         self.repok.new_article()
         self.reperr.new_article()
 
         if batch_size <= 0:
             batch_size = 10
 
-        query_string: str = ""
-        added_statements: int = 0
-        removed_statements: int = 0
-        skipped_queries: int = 0
-        result: bool = True
-
-        if save_queries:
-            to_be_uploaded_dir = os.path.join(base_dir, "to_be_uploaded")
-            os.makedirs(to_be_uploaded_dir, exist_ok=True)
-
-        for idx, entity in enumerate(self.a_set.res_to_entity.values()):
-            update_query, n_added, n_removed = get_update_query(entity, entity_type=self._class_to_entity_type(entity))
-
-            if update_query == "":
-                skipped_queries += 1
-            else:
-                index = idx - skipped_queries
-                if index == 0:
-                    # First query
-                    query_string = update_query
-                    added_statements = n_added
-                    removed_statements = n_removed
-                elif index % batch_size == 0:
-                    # batch_size-multiple query
-                    if save_queries:
-                        self._save_query(query_string, to_be_uploaded_dir, added_statements, removed_statements)
-                    else:
-                        result &= self._query(query_string, triplestore_url, base_dir, added_statements, removed_statements)
-                    query_string = update_query
-                    added_statements = n_added
-                    removed_statements = n_removed
-                else:
-                    # Accumulated query
-                    query_string += " ; " + update_query
-                    added_statements += n_added
-                    removed_statements += n_removed
+        n_lanes: int = workers if workers is not None and workers > 1 and not save_queries else 1
+        lanes: List[List[Tuple[URIRef, str, str, int, int]]] = [[] for _ in range(n_lanes)]
+        modified_res: List[URIRef] = []
+        for entity in self.a_set.res_to_entity.values():
+            delta: Tuple[URIRef, str, str, int, int] = get_entity_delta(
+                entity, entity_type=self._class_to_entity_type(entity))
+            if delta[3] > 0 or delta[4] > 0:
+                modified_res.append(entity.res)
+                lane: int = zlib.crc32(str(entity.res).encode("utf-8")) % n_lanes if n_lanes > 1 else 0
+                lanes[lane].append(delta)
+
+        lanes_batches: List[List[Tuple[str, int, int]]] = []
+        for lane_deltas in lanes:
+            batches: List[Tuple[str, int, int]] = []
+            batch: List[Tuple[URIRef, str, str, int, int]] = []
+            batch_triples: int = 0
+            batch_bytes: int = 0
+            for delta in lane_deltas:
+                delta_triples: int = delta[3] + delta[4]
+                delta_bytes: int = len(delta[1].encode("utf-8")) + len(delta[2].encode("utf-8")) \
+                    if max_bytes is not None else 0
+                if batch and (len(batch) >= batch_size or
+                              (max_triples is not None and batch_triples + delta_triples > max_triples) or
+                              (max_bytes is not None and batch_bytes + delta_bytes > max_bytes)):
+                    batches.append(get_batch_update_query(batch))
+                    batch, batch_triples, batch_bytes = [], 0, 0
+                batch.append(delta)
+                batch_triples += delta_triples
+                batch_bytes += delta_bytes
+            if batch:
+                batches.append(get_batch_update_query(batch))
+            lanes_batches.append(batches)
 
-        if query_string != "":
+        try:
             if save_queries:
-                self._save_query(query_string, to_be_uploaded_dir, added_statements, removed_statements)
+                to_be_uploaded_dir = os.path.join(base_dir, "to_be_uploaded")
+                os.makedirs(to_be_uploaded_dir, exist_ok=True)
+                for query_string, added_statements, removed_statements in lanes_batches[0]:
+                    self._save_query(query_string, to_be_uploaded_dir, added_statements, removed_statements)
+                return True
+            elif n_lanes == 1:
+                return self._upload_batches(lanes_batches[0], triplestore_url, base_dir)
             else:
-                result &= self._query(query_string, triplestore_url, base_dir, added_statements, removed_statements)
-
+                with ThreadPoolExecutor(max_workers=n_lanes) as executor:
+                    futures = [executor.submit(self._upload_batches, batches, triplestore_url, base_dir)
+                               for batches in lanes_batches if batches]
+                    return all([future.result() for future in futures])
+        finally:
+            # The cached entities are invalidated once the triplestore was updated (even
+            # partially), so that they cannot be cached again with their previous content
+            if self.entity_cache is not None:
+                self.entity_cache.invalidate(modified_res)
+
+    def _upload_batches(self, batches: List[Tuple[str, int, int]], triplestore_url: str, base_dir: str = None) -> bool:
+        result: bool = True
+        with SparqlSession(triplestore_url) as session:
+            for query_string, added_statements, removed_statements in batches:
+                result &= self._query(query_string, triplestore_url, base_dir, added_statements, removed_statements,
+                                      session)
         return result
 
     def _save_query(self, query_string: str, directory: str, added_statements: int, removed_statements: int) -> None:
@@ -317,7 +559,11 @@ class Storer(object):
 
         update_query, n_added, n_removed = get_update_query(entity, entity_type=self._class_to_entity_type(entity))
 
-        return self._query(update_query, triplestore_url, base_dir, n_added, n_removed)
+        try:
+            return self._query(update_query, triplestore_url, base_dir, n_added, n_removed)
+        finally:
+            if self.entity_cache is not None and update_query != "":
+                self.entity_cache.invalidate([entity.res])
 
     def execute_query(self, query_string: str, triplestore_url: str) -> bool:
         self.repok.new_article()
@@ -326,7 +572,7 @@ class Storer(object):
         return self._query(query_string, triplestore_url)
 
     def _query(self, query_string: str, triplestore_url: str, base_dir: str = None,
-            added_statements: int = 0, removed_statements: int = 0) -> bool:
+            added_statements: int = 0, removed_statements: int = 0, session: SparqlSession = None) -> bool:
         if query_string != "":
             attempt = 0
             max_attempts = 3
@@ -334,11 +580,14 @@ class Storer(object):
 
             while attempt < max_attempts:
                 try:
-                    sparql: SPARQLWrapper = SPARQLWrapper(triplestore_url)
-                    sparql.setQuery(query_string)
-                    sparql.setMethod('POST')
+                    if session is not None:
+                        session.update(query_string)
+                    else:
+                        sparql: SPARQLWrapper = SPARQLWrapper(triplestore_url)
+                        sparql.setQuery(query_string)
+                        sparql.setMethod('POST')
 
-                    sparql.query()
+                        sparql.query()
 
                     self.repok.add_sentence(
                         f"Triplestore updated with {added_statements} added statements and "
@@ -368,4 +617,17 @@ class Storer(object):
                         with open(cur_file_err, 'wt', encoding='utf-8') as f:
                             f.write(query_string)
 
-        return False
\ No newline at end of file
+        return False
+
+
+def _store_changes_in_file_worker(task: Tuple[Dict[str, Any], List[Tuple[URIRef, bool, List[Tuple]]], str, Optional[str]]) \
+        -> Tuple[List[str], List[str]]:
+    # Executed by the worker processes of Storer.store_all: it returns
+    # the sentences reported while storing the file
+    storer_args, changes, cur_file_path, context_path = task
+    storer: Storer = Storer(None, repok=Reporter(print_sentences=False), reperr=Reporter(print_sentences=False),
+                            **storer_args)
+    storer.repok.new_article()
+    storer.reperr.new_article()
+    storer._store_changes_in_file(changes, cur_file_path, context_path)
+    return storer.repok.last_article, storer.reperr.last_article
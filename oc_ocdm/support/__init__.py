@@ -16,7 +16,12 @@
 
 from oc_ocdm.support.support import create_date, get_datatype_from_iso_8601, encode_url, create_literal,\
                                     create_type, is_string_empty, get_short_name, get_prefix, get_count,\
-                                    get_resource_number, find_local_line_id, find_paths, has_supplier_prefix,\
-                                    is_dataset
+                                    get_resource_number, find_local_line_id, find_paths, find_paths_batch,\
+                                    has_supplier_prefix, is_dataset, parse_iri, ParsedIRI, find_stored_files
 from oc_ocdm.support.reporter import Reporter
-from oc_ocdm.support.query_utils import get_update_query, get_insert_query, get_delete_query
+from oc_ocdm.support.query_utils import get_update_query, get_insert_query, get_delete_query, get_graph_diff,\
+    get_entity_delta, get_batch_update_query
+from oc_ocdm.support.tracked_graph import TrackedGraph
+from oc_ocdm.support.json_ld import graph_to_json_ld
+from oc_ocdm.support.sparql_session import SparqlSession
+from oc_ocdm.support.entity_cache import EntityCache
@@ -0,0 +1,198 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Optional, Tuple
+
+    from rdflib import URIRef
+
+
+class EntityCache(object):
+    """
+    A local cache of the entities retrieved from a triplestore, which maps the IRI of each entity
+    to the SPARQL JSON bindings (``?s ?p ?o``) of its triples. It is used by the ``Reader`` when importing
+    entities from a triplestore, so that the entities requested again and again are served locally.
+
+    At most ``max_entities`` entities are kept in memory, evicting the least recently used ones.
+    If a ``database`` is specified, the entities are also persisted in a SQLite database, which acts
+    as a second (unbounded) level of the cache and can be shared by several processes or runs.
+    If a ``ttl`` is specified, the entities stored more than ``ttl`` seconds ago are considered stale.
+
+    The entities modified by ``Storer.upload_all`` are automatically invalidated
+    when the cache is passed to the ``Storer`` too. Instances of this class are thread-safe.
+    """
+
+    def __init__(self, max_entities: int = 10000, ttl: float = None, database: str = None,
+                 timeout: float = 30.0) -> None:
+        """
+        Constructor of the ``EntityCache`` class.
+
+        :param max_entities: The maximum number of entities kept in memory
+        :type max_entities: int
+        :param ttl: The number of seconds after which a cached entity expires, if specified
+        :type ttl: float, optional
+        :param database: The path of the SQLite database where the entities are persisted, if specified
+        :type database: str, optional
+        :param timeout: How many seconds a connection to the database waits for the lock held by another one
+        :type timeout: float
+        :raises ValueError: if ``max_entities`` is not a positive number.
+        """
+        if max_entities <= 0:
+            raise ValueError("max_entities must be a positive non-zero integer number!")
+        self.max_entities: int = max_entities
+        self.ttl: Optional[float] = ttl
+        self._entities: OrderedDict[str, Tuple[float, List[Dict]]] = OrderedDict()
+        self._lock: threading.RLock = threading.RLock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self.con: Optional[sqlite3.Connection] = None
+        if database is not None:
+            # The modifications performed within a 'with self.con' block are committed together
+            self.con = sqlite3.connect(database, timeout=timeout, check_same_thread=False)
+            self.con.execute("PRAGMA journal_mode=WAL")
+            self.con.execute("PRAGMA synchronous=NORMAL")
+            self.con.execute("""CREATE TABLE IF NOT EXISTS entities(
+                iri TEXT NOT NULL PRIMARY KEY,
+                stored_at REAL NOT NULL,
+                bindings TEXT NOT NULL) WITHOUT ROWID""")
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, res: URIRef) -> Optional[List[Dict]]:
+        """
+        It returns the SPARQL JSON bindings of the triples of the given entity, if they are cached
+        and not expired. The returned list must not be modified.
+
+        :param res: The IRI of the entity
+        :type res: URIRef
+        :return: The cached bindings if found, None otherwise
+        """
+        iri: str = str(res)
+        with self._lock:
+            entry: Optional[Tuple[float, List[Dict]]] = self._entities.get(iri)
+            if entry is None and self.con is not None:
+                row = self.con.execute("SELECT stored_at, bindings FROM entities WHERE iri = ?", (iri,)).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    self._store_in_memory(iri, entry)
+            if entry is None or self._is_expired(entry[0]):
+                if entry is not None:
+                    self._invalidate_iris([iri])
+                self.misses += 1
+                return None
+            self._entities.move_to_end(iri)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, res: URIRef, bindings: List[Dict]) -> None:
+        """
+        It stores the SPARQL JSON bindings of the triples of the given entity.
+
+        :param res: The IRI of the entity
+        :type res: URIRef
+        :param bindings: The bindings of the triples of the entity
+        :type bindings: List[Dict]
+        :return: None
+        """
+        self.put_many({res: bindings})
+
+    def put_many(self, res_to_bindings: Dict[URIRef, List[Dict]]) -> None:
+        """
+        It stores the SPARQL JSON bindings of the triples of several entities
+        (within a single transaction, when they are persisted).
+
+        :param res_to_bindings: A dictionary mapping the IRI of each entity to the bindings of its triples
+        :type res_to_bindings: Dict[URIRef, List[Dict]]
+        :return: None
+        """
+        stored_at: float = time.time()
+        with self._lock:
+            for res, bindings in res_to_bindings.items():
+                self._store_in_memory(str(res), (stored_at, bindings))
+            if self.con is not None and res_to_bindings:
+                with self.con:
+                    self.con.executemany("INSERT OR REPLACE INTO entities(iri, stored_at, bindings) VALUES (?, ?, ?)",
+                                         [(str(res), stored_at, json.dumps(bindings, separators=(',', ':')))
+                                          for res, bindings in res_to_bindings.items()])
+
+    def _store_in_memory(self, iri: str, entry: Tuple[float, List[Dict]]) -> None:
+        self._entities[iri] = entry
+        self._entities.move_to_end(iri)
+        while len(self._entities) > self.max_entities:
+            self._entities.popitem(last=False)
+
+    def invalidate(self, res_list: Iterable[URIRef]) -> None:
+        """
+        It removes the given entities from the cache (both from memory and from the database).
+
+        :param res_list: The IRIs of the entities to be removed
+        :type res_list: Iterable[URIRef]
+        :return: None
+        """
+        with self._lock:
+            self._invalidate_iris([str(res) for res in res_list])
+
+    def _invalidate_iris(self, iris: List[str]) -> None:
+        for iri in iris:
+            self._entities.pop(iri, None)
+        if self.con is not None and iris:
+            with self.con:
+                self.con.executemany("DELETE FROM entities WHERE iri = ?", [(iri,) for iri in iris])
+
+    def clear(self) -> None:
+        """
+        It removes every entity from the cache (both from memory and from the database).
+
+        :return: None
+        """
+        with self._lock:
+            self._entities.clear()
+            if self.con is not None:
+                with self.con:
+                    self.con.execute("DELETE FROM entities")
+
+    def close(self) -> None:
+        """
+        It closes the connection to the database, if any.
+
+        :return: None
+        """
+        with self._lock:
+            if self.con is not None:
+                self.con.close()
+                self.con = None
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, res: URIRef) -> bool:
+        return self.get(res) is not None
+
+    def __enter__(self) -> EntityCache:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
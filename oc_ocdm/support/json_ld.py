@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from rdflib import RDF, XSD, BNode, Literal, URIRef
+from rdflib.plugins.serializers.jsonld import from_rdf
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Union
+    from rdflib import ConjunctiveGraph, Graph, term
+
+# Literals having one of these datatypes are written as native JSON values,
+# as done by the JSON-LD serializer of rdflib
+_native_datatypes = {XSD.boolean, XSD.integer, XSD.double, XSD.string}
+
+
+def graph_to_json_ld(graph: ConjunctiveGraph, context: Dict[str, Any] = None) -> Union[List, Dict]:
+    """
+    It converts the given graph into a JSON-LD document, i.e. a JSON-serializable Python object
+    which can be directly dumped with the ``json`` module.
+
+    When no context is given, the expanded form of the document (one object for each named graph,
+    whose ``@graph`` contains one node for each subject) is built with a single pass over the
+    quads, without relying on the general-purpose algorithm used by rdflib. Otherwise, the document
+    is compacted against the given context by rdflib. In both cases the result is the same one
+    obtained by parsing the output of ``graph.serialize(format="json-ld", context=context)``.
+
+    :param graph: The graph to be converted
+    :type graph: ConjunctiveGraph
+    :param context: The JSON-LD context used for compacting the document, if any
+    :type context: Dict[str, Any], optional
+    :return: The requested JSON-LD document
+    """
+    if context:
+        return from_rdf(graph, context_data=context)
+
+    default_nodes: Dict[term.Node, Dict[str, Any]] = {}
+    named_graphs: List[Dict[str, Any]] = []
+    for g in graph.contexts():
+        if isinstance(g.identifier, URIRef):
+            nodes: Dict[term.Node, Dict[str, Any]] = _nodes_from_graph(g, {})
+            if nodes:
+                named_graphs.append({"@id": str(g.identifier), "@graph": list(nodes.values())})
+        else:
+            # Triples which are not inside a named graph belong to the default graph
+            _nodes_from_graph(g, default_nodes)
+
+    result: List[Dict[str, Any]] = []
+    if len(default_nodes) == 1:
+        result.append(next(iter(default_nodes.values())))
+    elif default_nodes:
+        if not named_graphs:
+            return list(default_nodes.values())
+        result.append({"@graph": list(default_nodes.values())})
+    result.extend(named_graphs)
+    return result
+
+
+def _nodes_from_graph(g: Graph, nodes: Dict[term.Node, Dict[str, Any]]) -> Dict[term.Node, Dict[str, Any]]:
+    for s, p, o in g:
+        node: Optional[Dict[str, Any]] = nodes.get(s)
+        if node is None:
+            node = {"@id": str(s) if isinstance(s, URIRef) else s.n3()}
+            nodes[s] = node
+        if p == RDF.type and isinstance(o, URIRef):
+            node.setdefault("@type", []).append(str(o))
+        else:
+            node.setdefault(str(p), []).append(_to_json_ld_value(o))
+    return nodes
+
+
+def _to_json_ld_value(o: term.Node) -> Dict[str, Any]:
+    if isinstance(o, URIRef):
+        return {"@id": str(o)}
+    elif isinstance(o, BNode):
+        return {"@id": o.n3()}
+    elif o.datatype is not None:
+        if o.datatype in _native_datatypes:
+            value: Any = o.toPython()
+            if not isinstance(value, Literal):  # Ill-typed literals are written as strings
+                return {"@value": value}
+        return {"@type": str(o.datatype), "@value": str(o)}
+    elif o.language:
+        return {"@language": o.language, "@value": str(o)}
+    else:
+        return {"@value": str(o)}
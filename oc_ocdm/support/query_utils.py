@@ -18,21 +18,25 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Tuple
+    from typing import Dict, Iterable, List, Optional, Set, Tuple
     from rdflib import URIRef
     from rdflib.compare import IsomorphicGraph
     from oc_ocdm.abstract_entity import AbstractEntity
 
-from rdflib import Graph
+from rdflib import BNode, Graph
 from rdflib.compare import graph_diff, to_isomorphic
 
 
+def _serialize_statements(data: Graph) -> str:
+    return data.serialize(format="nt11").replace('\n', '')
+
+
 def get_delete_query(graph_iri: URIRef, data: Graph) -> Tuple[str, int]:
     num_of_statements: int = len(data)
     if num_of_statements <= 0:
         return "", 0
     else:
-        statements: str = data.serialize(format="nt11").replace('\n', '')
+        statements: str = _serialize_statements(data)
         delete_string: str = f"DELETE DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"
         return delete_string, num_of_statements
 
@@ -42,39 +46,163 @@ def get_insert_query(graph_iri: URIRef, data: Graph) -> Tuple[str, int]:
     if num_of_statements <= 0:
         return "", 0
     else:
-        statements: str = data.serialize(format="nt11").replace('\n', '')
+        statements: str = _serialize_statements(data)
         insert_string: str = f"INSERT DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"
         return insert_string, num_of_statements
 
 
-def get_update_query(entity: AbstractEntity, entity_type: str = "graph") -> Tuple[str, int, int]:
+def get_graph_diff(preexisting_graph: Graph, current_graph: Graph) -> Tuple[Graph, Graph]:
+    """
+    It computes the triples that must be removed from and added to ``preexisting_graph``
+    in order to obtain ``current_graph``.
+
+    OCDM entity graphs never contain blank nodes: in such case the difference is computed
+    with plain set arithmetic over the triples. The (much more expensive) canonicalisation
+    performed by ``rdflib.compare.to_isomorphic`` is used only when blank nodes are found.
+
+    :param preexisting_graph: The graph describing the previous state
+    :type preexisting_graph: Graph
+    :param current_graph: The graph describing the current state
+    :type current_graph: Graph
+    :return: A tuple containing the graph of the removed triples and the graph of the added ones
+    """
+    preexisting_triples: Set[Tuple] = set()
+    current_triples: Set[Tuple] = set()
+    has_bnodes: bool = False
+    for triples, graph in ((preexisting_triples, preexisting_graph), (current_triples, current_graph)):
+        for triple in graph:
+            if isinstance(triple[0], BNode) or isinstance(triple[2], BNode):
+                has_bnodes = True
+                break
+            triples.add(triple)
+        if has_bnodes:
+            break
+
+    if has_bnodes:
+        preexisting_iso: IsomorphicGraph = to_isomorphic(preexisting_graph)
+        current_iso: IsomorphicGraph = to_isomorphic(current_graph)
+        if preexisting_iso == current_iso:
+            # Both graphs have exactly the same content!
+            return Graph(), Graph()
+        in_both, in_first, in_second = graph_diff(preexisting_iso, current_iso)
+        return in_first, in_second
+
+    removed_graph: Graph = Graph()
+    for triple in preexisting_triples - current_triples:
+        removed_graph.add(triple)
+    added_graph: Graph = Graph()
+    for triple in current_triples - preexisting_triples:
+        added_graph.add(triple)
+    return removed_graph, added_graph
+
+
+def get_entity_delta(entity: AbstractEntity, entity_type: str = "graph") -> Tuple[URIRef, str, str, int, int]:
+    """
+    It computes the changes that must be applied to the triplestore in order to store the current
+    state of the given entity, i.e. the triples which must be removed and the ones which must be added
+    to its named graph.
+
+    The result is memoised inside the entity and it is reused until its graph gets modified
+    (for entities whose graph is a ``TrackedGraph``) or until ``commit_changes`` is called, so that
+    generating the provenance and uploading (or saving) the same entity computes its delta only once.
+
+    :param entity: The entity whose delta is requested
+    :type entity: AbstractEntity
+    :param entity_type: The kind of entity (either 'graph', 'prov' or 'metadata')
+    :type entity_type: str
+    :return: A tuple containing the IRI of the named graph, the N-Triples serialization (without newlines)
+      of the removed and of the added triples and, lastly, the number of removed and of added triples
+    """
     if entity_type in ["graph", "metadata"]:
         to_be_deleted: bool = entity.to_be_deleted
-        preexisting_graph: Graph = entity.preexisting_graph
-    elif entity_type == "prov":
+    else:
         to_be_deleted: bool = False
+
+    version: Optional[int] = getattr(entity.g, "version", None)
+    cache_key: Optional[Tuple] = None
+    if version is not None:
+        cache_key = (id(entity.g), version, entity_type, to_be_deleted)
+        cache: Optional[Tuple[Tuple, Tuple]] = entity._delta_cache
+        if cache is not None and cache[0] == cache_key:
+            return cache[1]
+
+    if entity_type in ["graph", "metadata"]:
+        preexisting_graph: Graph = entity.preexisting_graph
+    else:
         preexisting_graph: Graph = Graph(identifier=entity.g.identifier)
 
     if to_be_deleted:
-        delete_string, removed_triples = get_delete_query(entity.g.identifier, preexisting_graph)
-        if delete_string != "":
-            return delete_string, 0, removed_triples
-        else:
-            return "", 0, 0
+        removed_graph: Graph = preexisting_graph
+        added_graph: Graph = Graph()
     else:
-        preexisting_iso: IsomorphicGraph = to_isomorphic(preexisting_graph)
-        current_iso: IsomorphicGraph = to_isomorphic(entity.g)
-        if preexisting_iso == current_iso:
-            # Both graphs have exactly the same content!
-            return "", 0, 0
-        in_both, in_first, in_second = graph_diff(preexisting_iso, current_iso)
-        delete_string, removed_triples = get_delete_query(entity.g.identifier, in_first)
-        insert_string, added_triples = get_insert_query(entity.g.identifier, in_second)
-        if delete_string != "" and insert_string != "":
-            return delete_string + '; ' + insert_string, added_triples, removed_triples
-        elif delete_string != "":
-            return delete_string, 0, removed_triples
-        elif insert_string != "":
-            return insert_string, added_triples, 0
-        else:
-            return "", 0, 0
\ No newline at end of file
+        removed_graph, added_graph = get_graph_diff(preexisting_graph, entity.g)
+
+    num_of_removed: int = len(removed_graph)
+    num_of_added: int = len(added_graph)
+    delta: Tuple[URIRef, str, str, int, int] = (
+        entity.g.identifier,
+        _serialize_statements(removed_graph) if num_of_removed > 0 else "",
+        _serialize_statements(added_graph) if num_of_added > 0 else "",
+        num_of_removed,
+        num_of_added
+    )
+    if cache_key is not None:
+        entity._delta_cache = (cache_key, delta)
+    return delta
+
+
+def get_update_query(entity: AbstractEntity, entity_type: str = "graph") -> Tuple[str, int, int]:
+    graph_iri, removed_statements, added_statements, removed_triples, added_triples = \
+        get_entity_delta(entity, entity_type)
+
+    delete_string: str = ""
+    if removed_triples > 0:
+        delete_string = f"DELETE DATA {{ GRAPH <{graph_iri}> {{ {removed_statements} }} }}"
+    insert_string: str = ""
+    if added_triples > 0:
+        insert_string = f"INSERT DATA {{ GRAPH <{graph_iri}> {{ {added_statements} }} }}"
+
+    if delete_string != "" and insert_string != "":
+        return delete_string + '; ' + insert_string, added_triples, removed_triples
+    elif delete_string != "":
+        return delete_string, 0, removed_triples
+    elif insert_string != "":
+        return insert_string, added_triples, 0
+    else:
+        return "", 0, 0
+
+
+def get_batch_update_query(deltas: Iterable[Tuple[URIRef, str, str, int, int]]) -> Tuple[str, int, int]:
+    """
+    It builds a single SPARQL Update request applying all the given entity deltas (as returned
+    by ``get_entity_delta``). The statements targeting the same named graph are merged in a single
+    ``GRAPH`` block, and every removal is performed by a ``DELETE DATA`` operation preceding the
+    ``INSERT DATA`` one.
+
+    **NOTE: this is correct as long as each entity appears at most once among the given deltas,
+    since the triples of different entities (having different subjects) never overlap.**
+
+    :param deltas: The deltas of the entities
+    :type deltas: Iterable[Tuple[URIRef, str, str, int, int]]
+    :return: A tuple containing the SPARQL Update request, the number of added triples and
+      the number of removed triples
+    """
+    removed_by_graph: Dict[URIRef, List[str]] = {}
+    added_by_graph: Dict[URIRef, List[str]] = {}
+    removed_triples: int = 0
+    added_triples: int = 0
+    for graph_iri, removed_statements, added_statements, num_of_removed, num_of_added in deltas:
+        if num_of_removed > 0:
+            removed_by_graph.setdefault(graph_iri, []).append(removed_statements)
+            removed_triples += num_of_removed
+        if num_of_added > 0:
+            added_by_graph.setdefault(graph_iri, []).append(added_statements)
+            added_triples += num_of_added
+
+    operations: List[str] = []
+    for operation, statements_by_graph in (("DELETE DATA", removed_by_graph), ("INSERT DATA", added_by_graph)):
+        if statements_by_graph:
+            graph_blocks: str = " ".join(f"GRAPH <{graph_iri}> {{ {' '.join(statements)} }}"
+                                         for graph_iri, statements in statements_by_graph.items())
+            operations.append(f"{operation} {{ {graph_blocks} }}")
+    return "; ".join(operations), added_triples, removed_triples
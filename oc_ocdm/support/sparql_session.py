@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected
+from typing import TYPE_CHECKING
+from urllib.parse import urlencode, urlsplit
+
+if TYPE_CHECKING:
+    from typing import Dict, Optional, Tuple
+
+
+class SparqlSession(object):
+    """
+    A client of a SPARQL endpoint which keeps a persistent (keep-alive) HTTP connection open,
+    so that consecutive requests don't pay the cost of establishing a new TCP connection.
+    If the connection was closed by the server, it is transparently re-established.
+
+    **WARNING: instances of this class are not thread-safe. Each thread must use its own session.**
+    """
+
+    def __init__(self, endpoint_url: str, timeout: float = None) -> None:
+        """
+        Constructor of the ``SparqlSession`` class.
+
+        :param endpoint_url: The URL of the SPARQL endpoint
+        :type endpoint_url: str
+        :param timeout: The timeout (in seconds) of the blocking operations on the connection
+        :type timeout: float, optional
+        """
+        url = urlsplit(endpoint_url)
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme in '{endpoint_url}'.")
+        self.endpoint_url: str = endpoint_url
+        self.timeout: Optional[float] = timeout
+        self._is_https: bool = (url.scheme == "https")
+        self._host: str = url.hostname
+        self._port: Optional[int] = url.port
+        self._path: str = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        self._connection: Optional[HTTPConnection] = None
+
+    def update(self, query_string: str) -> None:
+        """
+        It executes a SPARQL Update request.
+
+        :param query_string: The SPARQL Update request
+        :type query_string: str
+        :raises IOError: if the endpoint answers with an error status
+        :return: None
+        """
+        self._post({"update": query_string}, {"Accept": "*/*"})
+
+    def query(self, query_string: str) -> bytes:
+        """
+        It executes a SPARQL query, requesting its results in JSON format.
+
+        :param query_string: The SPARQL query
+        :type query_string: str
+        :raises IOError: if the endpoint answers with an error status
+        :return: The body of the response
+        """
+        return self._post({"query": query_string}, {"Accept": "application/sparql-results+json"})
+
+    def close(self) -> None:
+        """
+        It closes the underlying connection (if any).
+
+        :return: None
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> SparqlSession:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _post(self, params: Dict[str, str], headers: Dict[str, str]) -> bytes:
+        body: bytes = urlencode(params).encode("utf-8")
+        headers = {**headers, "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"}
+        is_reused: bool = self._connection is not None
+        try:
+            try:
+                status, reason, data, will_close = self._send(body, headers)
+            except (RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not is_reused:
+                    raise
+                # The server closed the idle connection: the request is sent again on a new one
+                self.close()
+                status, reason, data, will_close = self._send(body, headers)
+        except Exception:
+            self.close()
+            raise
+
+        if will_close:
+            self.close()
+        if not 200 <= status < 300:
+            raise IOError(f"The SPARQL endpoint '{self.endpoint_url}' answered with status {status} "
+                          f"({reason}): {data[:500].decode('utf-8', 'replace')}")
+        return data
+
+    def _send(self, body: bytes, headers: Dict[str, str]) -> Tuple[int, str, bytes, bool]:
+        if self._connection is None:
+            if self._is_https:
+                self._connection = HTTPSConnection(self._host, self._port, timeout=self.timeout)
+            else:
+                self._connection = HTTPConnection(self._host, self._port, timeout=self.timeout)
+        self._connection.request("POST", self._path, body, headers)
+        response = self._connection.getresponse()
+        data: bytes = response.read()
+        return response.status, response.reason, data, response.will_close
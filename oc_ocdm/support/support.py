@@ -18,11 +18,12 @@ from __future__ import annotations
 import os
 import re
 from datetime import datetime
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
 from rdflib import URIRef, Graph
 
 if TYPE_CHECKING:
-    from typing import Optional, List, Tuple, Match, Dict, Set
+    from typing import Optional, List, Tuple, Match, Dict, Set, Pattern, Iterable, Iterator
     from oc_ocdm.graph.entities.bibliographic.bibliographic_resource import BibliographicResource
     from oc_ocdm.graph.entities.bibliographic.responsible_agent import ResponsibleAgent
     from oc_ocdm.graph.entities.bibliographic.agent_role import AgentRole
@@ -171,92 +172,128 @@ def is_string_empty(string: str) -> bool:
 # Variable used in several functions
 entity_regex: str = r"^(.+)/([a-z][a-z])/(0[1-9]+0)?((?:[1-9][0-9]*)|(?:\d+-\d+))$"
 prov_regex: str = r"^(.+)/([a-z][a-z])/(0[1-9]+0)?((?:[1-9][0-9]*)|(?:\d+-\d+))/prov/([a-z][a-z])/([1-9][0-9]*)$"
+dataset_regex: str = r"^.+/[0-9]+(-[0-9]+)?(/[0-9]+)?$"
 
+_entity_pattern: Pattern = re.compile(entity_regex)
+_prov_pattern: Pattern = re.compile(prov_regex)
+_dataset_pattern: Pattern = re.compile(dataset_regex)
 
-def _get_match(regex: str, group: int, string: str) -> str:
-    match: Match = re.match(regex, string)
+
+class ParsedIRI(NamedTuple):
+    """
+    The components of the IRI of an entity, as extracted by ``parse_iri``.
+
+    For provenance entities, ``short_name``, ``prefix`` and ``count`` refer to their prov subject,
+    while ``prov_short_name`` and ``prov_count`` refer to the provenance entity itself
+    (e.g. ``br``, ``060``, ``1``, ``se`` and ``2`` for ``https://w3id.org/oc/meta/br/0601/prov/se/2``).
+    Any component that cannot be found is an empty string, with the exception of ``prefix``,
+    which is None when a well-formed IRI has no supplier prefix.
+    """
+    base_iri: str
+    short_name: str
+    prefix: Optional[str]
+    count: str
+    prov_short_name: str
+    prov_count: str
+    is_prov: bool
+    is_dataset: bool
+
+
+@lru_cache(maxsize=65536)
+def _parse_iri(string_iri: str) -> ParsedIRI:
+    is_dataset_iri: bool = _dataset_pattern.search(string_iri) is None
+    if "/prov/" in string_iri:
+        match: Optional[Match] = _prov_pattern.match(string_iri)
+        if match is not None:
+            return ParsedIRI(*match.groups(), True, is_dataset_iri)
+        return ParsedIRI("", "", "", "", "", "", True, is_dataset_iri)
+
+    match: Optional[Match] = _entity_pattern.match(string_iri)
     if match is not None:
-        return match.group(group)
-    else:
-        return ""
+        return ParsedIRI(*match.groups(), "", "", False, is_dataset_iri)
+    return ParsedIRI("", "", "", "", "", "", False, is_dataset_iri)
+
+
+def parse_iri(res: URIRef) -> ParsedIRI:
+    """
+    It splits the IRI of an entity into its components with a single match against precompiled patterns.
+    The results are kept in a bounded LRU cache, since the same IRIs are usually parsed several times
+    (e.g. while generating provenance and while storing both entities and snapshots).
+
+    :param res: The IRI to be parsed
+    :type res: URIRef
+    :return: The components of the given IRI
+    """
+    return _parse_iri(str(res))
 
 
 def get_base_iri(res: URIRef) -> str:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 1, string_iri)
-    else:
-        return _get_match(entity_regex, 1, string_iri)
+    return parse_iri(res).base_iri
 
 
 def get_short_name(res: URIRef) -> str:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 5, string_iri)
-    else:
-        return _get_match(entity_regex, 2, string_iri)
+    parsed_iri: ParsedIRI = parse_iri(res)
+    return parsed_iri.prov_short_name if parsed_iri.is_prov else parsed_iri.short_name
 
 
 def get_prov_subject_short_name(prov_res: URIRef) -> str:
-    string_iri: str = str(prov_res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 2, string_iri)
-    else:
-        return ""  # non-provenance entities do not have a prov_subject!
+    # non-provenance entities do not have a prov_subject!
+    parsed_iri: ParsedIRI = parse_iri(prov_res)
+    return parsed_iri.short_name if parsed_iri.is_prov else ""
 
 
 def get_prefix(res: URIRef) -> str:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return ""  # provenance entities cannot have a supplier prefix
-    else:
-        return _get_match(entity_regex, 3, string_iri)
+    # provenance entities cannot have a supplier prefix
+    parsed_iri: ParsedIRI = parse_iri(res)
+    return "" if parsed_iri.is_prov else parsed_iri.prefix
 
 
 def get_prov_subject_prefix(prov_res: URIRef) -> str:
-    string_iri: str = str(prov_res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 3, string_iri)
-    else:
-        return ""  # non-provenance entities do not have a prov_subject!
+    # non-provenance entities do not have a prov_subject!
+    parsed_iri: ParsedIRI = parse_iri(prov_res)
+    return parsed_iri.prefix if parsed_iri.is_prov else ""
 
 
 def get_count(res: URIRef) -> str:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 6, string_iri)
-    else:
-        return _get_match(entity_regex, 4, string_iri)
+    parsed_iri: ParsedIRI = parse_iri(res)
+    return parsed_iri.prov_count if parsed_iri.is_prov else parsed_iri.count
 
 
 def get_prov_subject_count(prov_res: URIRef) -> str:
-    string_iri: str = str(prov_res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 4, string_iri)
-    else:
-        return ""  # non-provenance entities do not have a prov_subject!
+    # non-provenance entities do not have a prov_subject!
+    parsed_iri: ParsedIRI = parse_iri(prov_res)
+    return parsed_iri.count if parsed_iri.is_prov else ""
 
 
 def get_resource_number(res: URIRef) -> int:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return int(_get_match(prov_regex, 4, string_iri))
-    else:
-        return int(_get_match(entity_regex, 4, string_iri))
+    return int(parse_iri(res).count)
+
+
+def _get_bucket(number: int, bucket_size: int) -> int:
+    # The smallest multiple of bucket_size which is not lower than number (0 for non-positive numbers)
+    return max(0, -(-number // bucket_size) * bucket_size)
 
 
 def find_local_line_id(res: URIRef, n_file_item: int = 1) -> int:
     cur_number: int = get_resource_number(res)
+    return cur_number - _get_bucket(cur_number, n_file_item) + n_file_item
 
-    cur_file_split: int = 0
-    while True:
-        if cur_number > cur_file_split:
-            cur_file_split += n_file_item
-        else:
-            cur_file_split -= n_file_item
-            break
 
-    return cur_number - cur_file_split
+def _route_entity(parsed_iri: ParsedIRI, cur_split: Optional[int], cur_file_split: int, base_dir: str,
+                  default_dir: str, is_json: bool, process_id_str: str) -> Tuple[str, str]:
+    # In case no supplier prefix is specified, the default directory is used instead
+    sub_folder: str = parsed_iri.prefix or default_dir or "_"
+    cur_dir_path: str = base_dir + parsed_iri.short_name + os.sep + sub_folder
+    if cur_split is not None:
+        cur_dir_path += os.sep + str(cur_split)
+
+    if parsed_iri.is_prov:  # provenance file of a bibliographic entity
+        cur_dir_path += os.sep + str(cur_file_split) + os.sep + "prov"
+        file_extension: str = '.json' if is_json else '.nq'
+        return cur_dir_path, cur_dir_path + os.sep + parsed_iri.prov_short_name + process_id_str + file_extension
+    else:  # regular bibliographic entity
+        file_extension: str = '.json' if is_json else '.nt'
+        return cur_dir_path, cur_dir_path + os.sep + str(cur_file_split) + process_id_str + file_extension
 
 
 def find_paths(res: URIRef, base_dir: str, base_iri: str, default_dir: str, dir_split: int,
@@ -275,96 +312,101 @@ def find_paths(res: URIRef, base_dir: str, base_iri: str, default_dir: str, dir_
         # In case of dataset, the file path is different from regular files, e.g.
         # /corpus/br/index.json
         cur_file_path: str = cur_dir_path + os.sep + "index" + process_id_str + ".json"
+        return cur_dir_path, cur_file_path
+
+    parsed_iri: ParsedIRI = parse_iri(string_iri)
+    cur_number: int = int(parsed_iri.count)
+    # The number of the file where to save the resources
+    cur_file_split: int = _get_bucket(cur_number, n_file_item)
+
+    # The data have been split in multiple directories and it is not something related
+    # with the provenance data of the whole corpus (e.g. provenance agents)
+    if dir_split and not string_iri.startswith(base_iri + "prov/"):
+        return _route_entity(parsed_iri, _get_bucket(cur_number, dir_split), cur_file_split, base_dir,
+                             default_dir, is_json, process_id_str)
+    # Enter here if no split is needed
+    elif dir_split == 0:
+        return _route_entity(parsed_iri, None, cur_file_split, base_dir, default_dir, is_json, process_id_str)
+    # Enter here if the data is about a provenance agent, e.g. /corpus/prov/
     else:
-        cur_number: int = get_resource_number(res)
+        short_name: str = get_short_name(res)
+        prefix: str = get_prefix(res)
+        count: str = get_count(res)
+        file_extension: str = '.json' if is_json else '.nq'
 
-        # Find the correct file number where to save the resources
-        cur_file_split: int = 0
-        while True:
-            if cur_number > cur_file_split:
-                cur_file_split += n_file_item
-            else:
-                break
-
-        # The data have been split in multiple directories and it is not something related
-        # with the provenance data of the whole corpus (e.g. provenance agents)
-        if dir_split and not string_iri.startswith(base_iri + "prov/"):
-            # Find the correct directory number where to save the file
-            cur_split: int = 0
-            while True:
-                if cur_number > cur_split:
-                    cur_split += dir_split
-                else:
-                    break
-
-            if "/prov/" in string_iri:  # provenance file of a bibliographic entity
-                subj_short_name: str = get_prov_subject_short_name(res)
-                short_name: str = get_short_name(res)
-                sub_folder: str = get_prov_subject_prefix(res)
-                file_extension: str = '.json' if is_json else '.nq'
-                if sub_folder == "":
-                    sub_folder = default_dir
-                if sub_folder == "":
-                    sub_folder = "_"  # enforce default value
-
-                cur_dir_path: str = base_dir + subj_short_name + os.sep + sub_folder + \
-                    os.sep + str(cur_split) + os.sep + str(cur_file_split) + os.sep + "prov"
-                cur_file_path: str = cur_dir_path + os.sep + short_name + process_id_str + file_extension
-            else:  # regular bibliographic entity
-                short_name: str = get_short_name(res)
-                sub_folder: str = get_prefix(res)
-                file_extension: str = '.json' if is_json else '.nt'
-                if sub_folder == "":
-                    sub_folder = default_dir
-                if sub_folder == "":
-                    sub_folder = "_"  # enforce default value
-
-                cur_dir_path: str = base_dir + short_name + os.sep + sub_folder + os.sep + str(cur_split)
-                cur_file_path: str = cur_dir_path + os.sep + str(cur_file_split) + process_id_str + file_extension
-        # Enter here if no split is needed
-        elif dir_split == 0:
-            if "/prov/" in string_iri:
-                subj_short_name: str = get_prov_subject_short_name(res)
-                short_name: str = get_short_name(res)
-                sub_folder: str = get_prov_subject_prefix(res)
-                file_extension: str = '.json' if is_json else '.nq'
-                if sub_folder == "":
-                    sub_folder = default_dir
-                if sub_folder == "":
-                    sub_folder = "_"  # enforce default value
-
-                cur_dir_path: str = base_dir + subj_short_name + os.sep + sub_folder + \
-                    os.sep + str(cur_file_split) + os.sep + "prov"
-                cur_file_path: str = cur_dir_path + os.sep + short_name + process_id_str + file_extension
-            else:
-                short_name: str = get_short_name(res)
-                sub_folder: str = get_prefix(res)
-                file_extension: str = '.json' if is_json else '.nt'
-                if sub_folder == "":
-                    sub_folder = default_dir
-                if sub_folder == "":
-                    sub_folder = "_"  # enforce default value
-
-                cur_dir_path: str = base_dir + short_name + os.sep + sub_folder
-                cur_file_path: str = cur_dir_path + os.sep + str(cur_file_split) + process_id_str + file_extension
-        # Enter here if the data is about a provenance agent, e.g. /corpus/prov/
-        else:
-            short_name: str = get_short_name(res)
-            prefix: str = get_prefix(res)
-            count: str = get_count(res)
-            file_extension: str = '.json' if is_json else '.nq'
+        cur_dir_path: str = base_dir + short_name
+        cur_file_path: str = cur_dir_path + os.sep + prefix + count + process_id_str + file_extension
+        return cur_dir_path, cur_file_path
 
-            cur_dir_path: str = base_dir + short_name
-            cur_file_path: str = cur_dir_path + os.sep + prefix + count + process_id_str + file_extension
 
-    return cur_dir_path, cur_file_path
+def find_paths_batch(resources: Iterable[URIRef], base_dir: str, base_iri: str, default_dir: str, dir_split: int,
+                     n_file_item: int, is_json: bool = True, process_id: int|str = None) -> List[Tuple[str, str]]:
+    """
+    It computes the same paths returned by ``find_paths`` for each of the given resources, in a single pass.
+    The paths are computed once for each combination of type, supplier prefix, directory and file,
+    and then shared by all the resources belonging to it.
+
+    :param resources: The IRIs of the resources
+    :type resources: Iterable[URIRef]
+    :return: The list of the pairs (directory path, file path), in the same order of the given resources
+    """
+    process_id_str: str = f"_{process_id}" if process_id else ""
+    prov_agents_iri: str = base_iri + "prov/"
+    routes: Dict[Tuple, Tuple[str, str]] = {}
+    paths: List[Tuple[str, str]] = []
+    for res in resources:
+        string_iri: str = str(res)
+        parsed_iri: ParsedIRI = parse_iri(string_iri)
+        if parsed_iri.is_dataset or (dir_split != 0 and (not dir_split or string_iri.startswith(prov_agents_iri))):
+            paths.append(find_paths(res, base_dir, base_iri, default_dir, dir_split, n_file_item, is_json, process_id))
+            continue
+
+        cur_number: int = int(parsed_iri.count)
+        cur_split: Optional[int] = _get_bucket(cur_number, dir_split) if dir_split else None
+        cur_file_split: int = _get_bucket(cur_number, n_file_item)
+        route_key: Tuple = (parsed_iri.is_prov, parsed_iri.short_name, parsed_iri.prefix,
+                            parsed_iri.prov_short_name, cur_split, cur_file_split)
+        route: Optional[Tuple[str, str]] = routes.get(route_key)
+        if route is None:
+            route = _route_entity(parsed_iri, cur_split, cur_file_split, base_dir, default_dir, is_json, process_id_str)
+            routes[route_key] = route
+        paths.append(route)
+    return paths
+
+
+# The extensions of the files written by Storer.store_all
+stored_file_extensions: Tuple[str, ...] = (".json", ".nt", ".nq", ".zip")
+journal_extension: str = ".journal"
+
+
+def find_stored_files(base_dir: str) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    """
+    It walks, in alphabetical order, the given folder (typically filled by ``Storer.store_all``)
+    and yields each data file along with the path of its journal, if any. Journals can also
+    exist on their own, in which case None is yielded in place of the data file.
+
+    :param base_dir: The path of the folder to be walked
+    :type base_dir: str
+    :return: An iterator over the pairs (data file path, journal path)
+    """
+    for cur_dir, dir_names, file_names in os.walk(base_dir):
+        dir_names.sort()
+        names: List[str] = sorted(file_names)
+        name_set: Set[str] = set(names)
+        for name in names:
+            path: str = os.path.join(cur_dir, name)
+            if name.endswith(stored_file_extensions):
+                journal_name: str = name + journal_extension
+                yield path, (os.path.join(cur_dir, journal_name) if journal_name in name_set else None)
+            elif name.endswith(journal_extension) and name[:-len(journal_extension)] not in name_set:
+                yield None, path
+
 
 def has_supplier_prefix(res: URIRef, base_iri: str) -> bool:
     string_iri: str = str(res)
     return re.search(r"^%s[a-z][a-z]/0" % base_iri, string_iri) is not None
 
-def build_graph_from_results(results: List[Dict]) -> Graph:
-    graph = Graph()
+def get_triples_from_results(results: List[Dict]) -> Iterator[Tuple[URIRef, URIRef, URIRef|Literal]]:
     for triple in results:
         s = URIRef(triple['s']['value'])
         p = URIRef(triple['p']['value'])
@@ -374,10 +416,15 @@ def build_graph_from_results(results: List[Dict]) -> Graph:
             datatype = triple['o'].get('datatype', None)
             datatype = URIRef(datatype) if datatype is not None else XSD.string
             o = Literal(triple['o']['value'], datatype=datatype)
-        graph.add((s, p, o))
+        yield s, p, o
+
+
+def build_graph_from_results(results: List[Dict]) -> Graph:
+    graph = Graph()
+    for triple in get_triples_from_results(results):
+        graph.add(triple)
     return graph
 
 
 def is_dataset(res: URIRef) -> bool:
-    string_iri: str = str(res)
-    return re.search(r"^.+/[0-9]+(-[0-9]+)?(/[0-9]+)?$", string_iri) is None
+    return parse_iri(res).is_dataset
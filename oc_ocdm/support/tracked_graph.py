@@ -0,0 +1,83 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from rdflib import Graph
+
+if TYPE_CHECKING:
+    from typing import Callable, Iterable, List, Tuple
+    from rdflib import term
+
+    TripleObserver = Callable[[Graph, Tuple[term.Node, term.Node, term.Node], bool], None]
+
+
+class TrackedGraph(Graph):
+    """
+    A ``rdflib.Graph`` that notifies its observers every time a triple gets added to
+    or removed from it. It is used for the graphs of the entities, so that the data structures
+    which depend on their content can be kept up to date whichever method is used to modify them
+    (entity setters and removers, ``add_triples`` or a direct manipulation of ``entity.g``).
+
+    Each observer is a callable receiving the graph, the triple and a boolean flag which is True
+    when the triple was added and False when it was removed.
+
+    Moreover, the ``version`` attribute is incremented after every modification, so that
+    the values computed from the content of the graph can be cached until it changes.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super(TrackedGraph, self).__init__(*args, **kwargs)
+        self.observers: List[TripleObserver] = []
+        self.version: int = 0
+
+    def add(self, triple: Tuple[term.Node, term.Node, term.Node]) -> TrackedGraph:
+        super(TrackedGraph, self).add(triple)
+        self.version += 1
+        for observer in self.observers:
+            observer(self, triple, True)
+        return self
+
+    def addN(self, quads: Iterable[Tuple[term.Node, term.Node, term.Node, Graph]]) -> TrackedGraph:
+        self.version += 1
+        if not self.observers:
+            super(TrackedGraph, self).addN(quads)
+            return self
+
+        # As in rdflib, only the quads whose context is this very graph are taken into account
+        triples: List[Tuple[term.Node, term.Node, term.Node]] = [
+            (s, p, o) for s, p, o, c in quads if isinstance(c, Graph) and c.identifier is self.identifier]
+        super(TrackedGraph, self).addN((s, p, o, self) for s, p, o in triples)
+        for triple in triples:
+            for observer in self.observers:
+                observer(self, triple, True)
+        return self
+
+    def remove(self, triple: Tuple[term.Node, term.Node, term.Node]) -> TrackedGraph:
+        self.version += 1
+        if not self.observers:
+            super(TrackedGraph, self).remove(triple)
+            return self
+
+        # The given triple may be a pattern: the matching triples
+        # must be collected before removing them from the graph
+        removed_triples: List[Tuple[term.Node, term.Node, term.Node]] = list(self.triples(triple))
+        super(TrackedGraph, self).remove(triple)
+        for removed_triple in removed_triples:
+            for observer in self.observers:
+                observer(self, removed_triple, False)
+        return self
@@ -0,0 +1,190 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import time
+import unittest
+from shutil import rmtree
+from unittest.mock import MagicMock, patch
+
+from rdflib import URIRef
+
+from oc_ocdm.counter_handler.cached_counter_handler import CachedCounterHandler
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from oc_ocdm.counter_handler.redis_counter_handler import RedisCounterHandler
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.prov.prov_set import ProvSet
+
+
+class TestCachedCounterHandler(unittest.TestCase):
+    def setUp(self):
+        self.info_dir = os.path.join('.', 'info_dir', 'cached') + os.sep
+        self.backend = FilesystemCounterHandler(self.info_dir)
+        self.counter_handler = CachedCounterHandler(self.backend, flush_at_exit=False)
+
+    def tearDown(self):
+        self.counter_handler.close()
+        if os.path.exists(self.info_dir):
+            rmtree(self.info_dir)
+
+    def test_counters(self):
+        self.backend.set_counter(5, "br", supplier_prefix="060")
+        self.assertEqual(5, self.counter_handler.read_counter("br", supplier_prefix="060"))
+        self.assertEqual(6, self.counter_handler.increment_counter("br", supplier_prefix="060"))
+        self.assertEqual(1, self.counter_handler.increment_counter("br", "se", 6, supplier_prefix="060"))
+        self.counter_handler.set_counter(3, "id")
+        self.assertEqual(3, self.counter_handler.read_counter("id"))
+        self.assertRaises(ValueError, self.counter_handler.set_counter, -1, "br")
+
+        # Nothing is written until the cache gets flushed
+        self.assertEqual(5, self.backend.read_counter("br", supplier_prefix="060"))
+        self.assertEqual(0, self.backend.read_counter("br", "se", 6, supplier_prefix="060"))
+        self.assertEqual(0, self.backend.read_counter("id"))
+
+        self.counter_handler.flush()
+        self.assertEqual(6, self.backend.read_counter("br", supplier_prefix="060"))
+        self.assertEqual(1, self.backend.read_counter("br", "se", 6, supplier_prefix="060"))
+        self.assertEqual(3, self.backend.read_counter("id"))
+
+    def test_read_counters(self):
+        self.backend.set_counters_batch({("br", "se"): {1: 10, 2: 20}}, "")
+        self.counter_handler.set_counter(4, "br", "se", 2)
+        keys = [("br", "se", 1, ""), ("br", "se", 2, ""), ("br", "se", 3, "")]
+        with patch.object(self.backend, "read_counters", wraps=self.backend.read_counters) as read_counters:
+            self.assertEqual([10, 4, 0], self.counter_handler.read_counters(keys))
+            read_counters.assert_called_once_with([("br", "se", 1, ""), ("br", "se", 3, "")])
+            self.assertEqual([11, 5, 1], self.counter_handler.increment_counters(keys))
+            read_counters.assert_called_once()
+        self.counter_handler.flush()
+        self.assertEqual([11, 5, 1], self.backend.read_counters(keys))
+
+    def test_reserve_block(self):
+        self.counter_handler.set_counter(7, "br")
+        self.assertEqual(8, self.counter_handler.reserve_block("br", 10))
+        self.assertEqual(17, self.backend.read_counter("br"))
+        self.assertEqual(18, self.counter_handler.increment_counter("br"))
+
+    def test_metadata_counters(self):
+        dataset_name = "http://dataset/"
+        self.assertEqual(1, self.counter_handler.increment_metadata_counter("di", dataset_name))
+        self.counter_handler.set_metadata_counter(4, "di", dataset_name)
+        self.assertEqual(4, self.counter_handler.read_metadata_counter("di", dataset_name))
+        self.assertRaises(ValueError, self.counter_handler.read_metadata_counter, "di", None)
+        self.assertEqual(0, self.backend.read_metadata_counter("di", dataset_name))
+
+        self.counter_handler.flush()
+        self.assertEqual(4, self.backend.read_metadata_counter("di", dataset_name))
+
+    def test_flush_batches(self):
+        for _ in range(10):
+            self.counter_handler.increment_counter("br", supplier_prefix="060")
+            self.counter_handler.increment_counter("br", "se", 1, supplier_prefix="060")
+            self.counter_handler.increment_counter("br", "se", 2, supplier_prefix="060")
+        with patch.object(self.backend, "set_counters_batch", wraps=self.backend.set_counters_batch) as batch, \
+                patch.object(self.backend, "set_counter") as set_counter:
+            self.counter_handler.flush()
+            batch.assert_called_once_with({("br", ""): {1: 10}, ("br", "se"): {1: 10, 2: 10}}, "060")
+            set_counter.assert_not_called()
+
+            # The values which were not modified are not written again
+            batch.reset_mock()
+            self.counter_handler.flush()
+            batch.assert_not_called()
+        self.assertEqual(10, self.backend.read_counter("br", "se", 2, supplier_prefix="060"))
+
+    def test_failed_flush(self):
+        self.counter_handler.set_counter(7, "br")
+        with patch.object(self.backend, "set_counters_batch", side_effect=IOError):
+            self.assertRaises(IOError, self.counter_handler.flush)
+        self.assertEqual(0, self.backend.read_counter("br"))
+
+        self.counter_handler.flush()
+        self.assertEqual(7, self.backend.read_counter("br"))
+
+    def test_in_memory_backend(self):
+        backend = InMemoryCounterHandler()
+        counter_handler = CachedCounterHandler(backend, flush_at_exit=False)
+        self.assertEqual(1, counter_handler.increment_counter("br"))
+        self.assertEqual(1, counter_handler.increment_counter("br", "se", 1))
+        self.assertEqual(0, backend.read_counter("br"))
+
+        counter_handler.flush()
+        self.assertEqual(1, backend.read_counter("br"))
+        self.assertEqual(1, backend.read_counter("br", "se", 1))
+
+    def test_redis_backend(self):
+        mock_redis = MagicMock()
+        mock_redis.get.return_value = b"4"
+        with patch('redis.Redis', return_value=mock_redis):
+            backend = RedisCounterHandler()
+        counter_handler = CachedCounterHandler(backend, flush_at_exit=False)
+        self.assertEqual(5, counter_handler.increment_counter("br", supplier_prefix="060"))
+        self.assertEqual(6, counter_handler.increment_counter("br", supplier_prefix="060"))
+        self.assertEqual(5, counter_handler.increment_counter("br", "se", 2, supplier_prefix="060"))
+        mock_redis.get.assert_any_call("br:060")
+        self.assertEqual(2, mock_redis.get.call_count)
+        mock_redis.set.assert_not_called()
+        mock_redis.incr.assert_not_called()
+
+        counter_handler.flush()
+        pipeline = mock_redis.pipeline.return_value
+        pipeline.set.assert_any_call("br:060", 6)
+        pipeline.set.assert_any_call("br:060:2:se", 5)
+        pipeline.execute.assert_called_once()
+
+    def test_sqlite_backend(self):
+        os.makedirs(self.info_dir, exist_ok=True)
+        backend = SqliteCounterHandler(os.path.join(self.info_dir, 'counters.db'))
+        counter_handler = CachedCounterHandler(backend, flush_at_exit=False)
+        g_set = GraphSet("http://test/", custom_counter_handler=InMemoryCounterHandler())
+        p_set = ProvSet(g_set, "http://test/", custom_counter_handler=counter_handler)
+        g_set.add_br("http://agent/")
+        p_set.generate_provenance()
+        self.assertEqual(URIRef("http://test/br/1/prov/se/1"), p_set.res_to_entity.popitem()[0])
+        # ProvSet flushes the counters once the snapshots have been created
+        self.assertEqual(1, backend.read_counter("br", "se", 1))
+
+        counter_handler.increment_counter("br")
+        counter_handler.increment_counter("br", "se", 2)
+        with patch.object(backend, "set_counter") as set_counter:
+            counter_handler.flush()
+            set_counter.assert_not_called()
+        self.assertEqual([1, 1], backend.read_counters([("br", "", 1, ""), ("br", "se", 2, "")]))
+        backend.close()
+
+    def test_commit_changes(self):
+        g_set = GraphSet("http://test/", custom_counter_handler=self.counter_handler)
+        g_set.add_br("http://agent/")
+        g_set.add_br("http://agent/")
+        self.assertEqual(0, self.backend.read_counter("br"))
+        g_set.commit_changes()
+        self.assertEqual(2, self.backend.read_counter("br"))
+
+    def test_flush_interval(self):
+        self.assertRaises(ValueError, CachedCounterHandler, self.backend, flush_interval=0)
+        counter_handler = CachedCounterHandler(self.backend, flush_interval=0.05, flush_at_exit=False)
+        counter_handler.set_counter(9, "ra")
+        deadline = time.time() + 5
+        while self.backend.read_counter("ra") != 9 and time.time() < deadline:
+            time.sleep(0.05)
+        counter_handler.close()
+        self.assertEqual(9, self.backend.read_counter("ra"))
+        self.assertIsNone(counter_handler._timer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import unittest
+from shutil import rmtree
+
+from rdflib import URIRef
+
+from oc_ocdm.counter_handler.counter_reconstruction import rebuild_counters
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.prov.prov_set import ProvSet
+from oc_ocdm.storer import Storer
+
+
+class TestCounterReconstruction(unittest.TestCase):
+    resp_agent = 'http://resp_agent.test/'
+    base_iri = 'http://test/'
+
+    def setUp(self):
+        self.test_dir = os.path.join('.', 'info_dir', 'reconstruction') + os.sep
+        self.data_dir = self.test_dir + 'rdf' + os.sep
+        graph_set = GraphSet(self.base_iri, supplier_prefix="060", wanted_label=False)
+        prov_set = ProvSet(graph_set, self.base_iri, wanted_label=False)
+        brs = [graph_set.add_br(self.resp_agent) for _ in range(25)]
+        for _ in range(3):
+            graph_set.add_ra(self.resp_agent)
+        graph_set.add_id(self.resp_agent, res=URIRef("http://test/id/0708"))
+        prov_set.generate_provenance()
+        self._store(graph_set, prov_set, zip_output=True)
+
+        # The second snapshot of the first resource is only available within the journal
+        graph_set.commit_changes()
+        brs[0].has_title("Title")
+        prov_set.generate_provenance()
+        self._store(graph_set, prov_set, output_format="nquads", journaled=True)
+
+    def tearDown(self):
+        rmtree(self.test_dir, ignore_errors=True)
+
+    def _store(self, graph_set: GraphSet, prov_set: ProvSet, **kwargs) -> None:
+        for entity_set in (graph_set, prov_set):
+            storer = Storer(entity_set, context_map={}, dir_split=10000, n_file_item=10, default_dir="_", **kwargs)
+            storer.store_all(self.data_dir, self.base_iri)
+
+    def _assert_counters(self, counter_handler) -> None:
+        self.assertEqual(25, counter_handler.read_counter("br", supplier_prefix="060"))
+        self.assertEqual(3, counter_handler.read_counter("ra", supplier_prefix="060"))
+        self.assertEqual(8, counter_handler.read_counter("id", supplier_prefix="070"))
+        self.assertEqual(2, counter_handler.read_counter("br", "se", 1, supplier_prefix="060"))
+        self.assertEqual(1, counter_handler.read_counter("br", "se", 25, supplier_prefix="060"))
+
+    def test_rebuild_counters(self):
+        counter_handler = FilesystemCounterHandler(self.test_dir + 'counters')
+        counters = rebuild_counters(self.data_dir, counter_handler)
+        self.assertEqual(25, counters[("br", "", 1, "060")])
+        self.assertEqual(2, counters[("br", "se", 1, "060")])
+        self._assert_counters(counter_handler)
+
+        with self.subTest("worker processes"):
+            counter_handler = FilesystemCounterHandler(self.test_dir + 'parallel_counters')
+            self.assertDictEqual(counters, rebuild_counters(self.data_dir, counter_handler, workers=2, chunk_size=2))
+            self._assert_counters(counter_handler)
+
+    def test_overwrite(self):
+        counter_handler = InMemoryCounterHandler()
+        counter_handler.set_counter(100, "br")
+        rebuild_counters(self.data_dir, counter_handler)
+        self.assertEqual(100, counter_handler.read_counter("br"))
+        self.assertEqual(3, counter_handler.read_counter("ra"))
+
+        rebuild_counters(self.data_dir, counter_handler, overwrite=True)
+        self.assertEqual(25, counter_handler.read_counter("br"))
+
+    def test_deleted_entity(self):
+        data_dir = self.test_dir + 'deleted' + os.sep
+        graph_set = GraphSet(self.base_iri, supplier_prefix="060", wanted_label=False)
+        prov_set = ProvSet(graph_set, self.base_iri, wanted_label=False)
+        brs = [graph_set.add_br(self.resp_agent) for _ in range(3)]
+        prov_set.generate_provenance()
+        for entity_set in (graph_set, prov_set):
+            Storer(entity_set, context_map={}, dir_split=10000, n_file_item=10).store_all(data_dir, self.base_iri)
+
+        # The triples of the last resource are removed from the data file, but not its snapshots
+        graph_set.commit_changes()
+        brs[2].mark_as_to_be_deleted()
+        prov_set.generate_provenance()
+        for entity_set in (graph_set, prov_set):
+            Storer(entity_set, context_map={}, dir_split=10000, n_file_item=10).store_all(data_dir, self.base_iri)
+
+        counter_handler = InMemoryCounterHandler()
+        counters = rebuild_counters(data_dir, counter_handler)
+        self.assertEqual(3, counters[("br", "", 1, "060")])
+        new_graph_set = GraphSet(self.base_iri, supplier_prefix="060", wanted_label=False,
+                                 custom_counter_handler=counter_handler)
+        self.assertEqual(URIRef("http://test/br/0604"), new_graph_set.add_br(self.resp_agent).res)
+
+    def test_unreadable_file(self):
+        with open(os.path.join(self.data_dir, "br", "060", "10000", "broken.json"), "w") as f:
+            f.write("{ not json")
+        counter_handler = InMemoryCounterHandler()
+        with self.assertRaises(IOError):
+            rebuild_counters(self.data_dir, counter_handler)
+        self.assertEqual(0, counter_handler.read_counter("br"))
+
+
+if __name__ == '__main__':
+    unittest.main()
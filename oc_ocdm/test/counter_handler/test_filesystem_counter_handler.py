@@ -15,10 +15,17 @@
 # SOFTWARE.
 import os
 import unittest
+from concurrent.futures import ProcessPoolExecutor
+from shutil import rmtree
 
 from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
 
 
+def _reserve_blocks(info_dir: str) -> list:
+    counter_handler = FilesystemCounterHandler(info_dir)
+    return [counter_handler.reserve_block("br", 10, "060") for _ in range(20)]
+
+
 class TestFilesystemCounterHandler(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -71,6 +78,36 @@ class TestFilesystemCounterHandler(unittest.TestCase):
             read_value = self.counter_handler.read_counter("br", "se", line_number)
             self.assertEqual(read_value, expected_value)
 
+    def test_read_counters(self):
+        info_dir = os.path.join('.', 'info_dir', 'read_counters') + os.sep
+        try:
+            counter_handler = FilesystemCounterHandler(info_dir)
+            counter_handler.set_counters_batch({("br", "se"): {1: 10, 3: 30}, ("br", ""): {1: 7}}, "")
+            keys = [("br", "se", 3, ""), ("br", "", 1, ""), ("br", "se", 2, ""), ("br", "se", 1, ""), ("ra", "", 1, "")]
+            self.assertEqual([30, 7, 0, 10, 0], counter_handler.read_counters(keys))
+            self.assertRaises(ValueError, counter_handler.read_counters, [("br", "se", 0, "")])
+        finally:
+            rmtree(info_dir, ignore_errors=True)
+
+    def test_reserve_block(self):
+        info_dir = os.path.join('.', 'info_dir', 'blocks') + os.sep
+        try:
+            counter_handler = FilesystemCounterHandler(info_dir)
+            self.assertEqual(1, counter_handler.reserve_block("br", 100, "060"))
+            self.assertEqual(100, counter_handler.read_counter("br", supplier_prefix="060"))
+            self.assertEqual(101, counter_handler.reserve_block("br", 5, "060"))
+            self.assertEqual(106, counter_handler.increment_counter("br", supplier_prefix="060"))
+            self.assertRaises(ValueError, counter_handler.reserve_block, "br", 0, "060")
+
+            # The blocks reserved by concurrent processes never overlap
+            with ProcessPoolExecutor(max_workers=4) as executor:
+                blocks = [first_value for result in executor.map(_reserve_blocks, [info_dir] * 4)
+                          for first_value in result]
+            self.assertEqual(list(range(107, 107 + 80 * 10, 10)), sorted(blocks))
+            self.assertEqual(906, counter_handler.read_counter("br", supplier_prefix="060"))
+        finally:
+            rmtree(info_dir, ignore_errors=True)
+
     def test_read_metadata_counter(self):
         dataset_name: str = "http://dataset/"
         self.assertRaises(ValueError, self.counter_handler.read_metadata_counter, "xyz", dataset_name)
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import unittest
+from shutil import rmtree
+
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.counter_handler.mmap_counter_handler import MmapCounterHandler
+
+
+class TestMmapCounterHandler(unittest.TestCase):
+    def setUp(self):
+        self.info_dir = os.path.join('.', 'info_dir', 'mmap') + os.sep
+        self.counter_handler = MmapCounterHandler(self.info_dir)
+        self.file_path = self.info_dir + 'test_file.bin'
+
+    def tearDown(self):
+        self.counter_handler.close()
+        if os.path.exists(self.info_dir):
+            rmtree(self.info_dir)
+
+    def test_set_number(self):
+        number = 18
+        num_of_line = 35
+        self.counter_handler._set_number(number, self.file_path, num_of_line)
+        read_number = self.counter_handler._read_number(self.file_path, num_of_line)
+        self.assertEqual(read_number, number)
+        self.assertEqual(0, self.counter_handler._read_number(self.file_path, num_of_line - 1))
+        self.assertRaises(ValueError, self.counter_handler._set_number, -1, self.file_path, 1)
+        self.assertRaises(ValueError, self.counter_handler._set_number, 1, self.file_path, -1)
+
+    def test_read_number(self):
+        self.assertEqual(0, self.counter_handler._read_number(self.file_path, 1))
+        self.assertFalse(os.path.exists(self.file_path))
+
+        self.counter_handler._set_number(18, self.file_path, 35)
+        self.assertEqual(0, self.counter_handler._read_number(self.file_path, 10 ** 6))
+        self.assertRaises(ValueError, self.counter_handler._read_number, self.file_path, -1)
+
+    def test_add_number(self):
+        number = 18
+        num_of_line = 35
+        self.counter_handler._set_number(number, self.file_path, num_of_line)
+
+        read_number = self.counter_handler._add_number(self.file_path, num_of_line)
+        self.assertEqual(read_number, number + 1)
+        self.assertEqual(1, self.counter_handler._add_number(self.file_path, 10 ** 5))
+
+        self.assertRaises(ValueError, self.counter_handler._add_number, self.file_path, -1)
+
+    def test_set_counters_batch(self):
+        updates = {("br", "se"): {1: 10, 2: 20, 3: 30}}
+        self.counter_handler.set_counters_batch(updates, "")
+
+        for line_number, expected_value in updates[("br", "se")].items():
+            read_value = self.counter_handler.read_counter("br", "se", line_number)
+            self.assertEqual(read_value, expected_value)
+
+    def test_persistence(self):
+        self.counter_handler.set_counter(5, "br")
+        self.counter_handler.increment_counter("br", "se", 1000)
+        self.counter_handler.set_metadata_counter(42, "di", "http://dataset/")
+        other_counter_handler = MmapCounterHandler(self.info_dir)
+        with self.subTest("changes are visible to other handlers before being flushed"):
+            self.assertEqual(5, other_counter_handler.read_counter("br"))
+            self.assertEqual(1, other_counter_handler.read_counter("br", "se", 1000))
+        with self.subTest("files enlarged by other handlers are mapped again"):
+            other_counter_handler.set_counter(7, "br", "se", 10 ** 6)
+            self.assertEqual(7, self.counter_handler.read_counter("br", "se", 10 ** 6))
+        other_counter_handler.close()
+        self.counter_handler.close()
+        self.counter_handler = MmapCounterHandler(self.info_dir)
+        self.assertEqual(5, self.counter_handler.read_counter("br"))
+        self.assertEqual(42, self.counter_handler.read_metadata_counter("di", "http://dataset/"))
+
+    def test_convert_text_files(self):
+        text_counter_handler = FilesystemCounterHandler(self.info_dir)
+        text_counter_handler.set_counter(12, "br")
+        text_counter_handler.set_counter(3, "br", "se", 1)
+        text_counter_handler.set_counter(4, "br", "se", 7)
+        text_counter_handler.set_metadata_counter(42, "di", "http://dataset/")
+
+        written_files = MmapCounterHandler.convert_text_files(self.info_dir)
+        self.assertEqual(3, len(written_files))
+        self.assertEqual(12, self.counter_handler.read_counter("br"))
+        self.assertEqual(3, self.counter_handler.read_counter("br", "se", 1))
+        self.assertEqual(0, self.counter_handler.read_counter("br", "se", 2))
+        self.assertEqual(4, self.counter_handler.read_counter("br", "se", 7))
+        self.assertEqual(42, self.counter_handler.read_metadata_counter("di", "http://dataset/"))
+
+
+if __name__ == '__main__':
+    unittest.main()
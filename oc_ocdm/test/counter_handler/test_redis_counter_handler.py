@@ -87,6 +87,37 @@ class TestRedisCounterHandler(unittest.TestCase):
             self.assertEqual(result, 3)
             self.mock_redis.incr.assert_called_with("br:060:1:se")
 
+    def test_read_counters(self):
+        self.mock_redis.mget.return_value = ["5", None]
+        result = self.counter_handler.read_counters([("br", "", 1, "060"), ("br", "se", 5, "060")])
+        self.assertEqual(result, [5, 0])
+        self.mock_redis.mget.assert_called_once_with(["br:060", "br:060:5:se"])
+
+        with patch('redis.Redis', return_value=self.mock_redis):
+            counter_handler = RedisCounterHandler(batch_size=2)
+        self.mock_redis.mget.reset_mock()
+        self.mock_redis.mget.side_effect = lambda keys: [None] * len(keys)
+        result = counter_handler.read_counters([("br", "se", i, "060") for i in range(1, 6)])
+        self.assertEqual(result, [0] * 5)
+        self.assertEqual(3, self.mock_redis.mget.call_count)
+
+    def test_increment_counters(self):
+        pipeline = self.mock_redis.pipeline.return_value
+        pipeline.execute.return_value = [3, 1]
+        result = self.counter_handler.increment_counters([("br", "", 1, "060"), ("br", "se", 5, "060")])
+        self.assertEqual(result, [3, 1])
+        pipeline.incr.assert_any_call("br:060")
+        pipeline.incr.assert_any_call("br:060:5:se")
+        pipeline.execute.assert_called_once()
+        self.mock_redis.incr.assert_not_called()
+
+    def test_reserve_block(self):
+        self.mock_redis.incrby.return_value = 1100
+        result = self.counter_handler.reserve_block("br", 1000, "060")
+        self.assertEqual(result, 101)
+        self.mock_redis.incrby.assert_called_once_with("br:060", 1000)
+        self.assertRaises(ValueError, self.counter_handler.reserve_block, "br", -1, "060")
+
     def test_set_metadata_counter(self):
         with self.subTest("Set metadata counter"):
             self.counter_handler.set_metadata_counter(5, "di", "http://dataset/")
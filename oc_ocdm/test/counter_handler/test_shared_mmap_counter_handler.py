@@ -0,0 +1,105 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import pickle
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from shutil import rmtree
+
+from oc_ocdm.counter_handler.shared_mmap_counter_handler import SharedMmapCounterHandler
+
+
+def _increment_counters(counter_handler: SharedMmapCounterHandler) -> None:
+    for identifier in range(1, 201):
+        counter_handler.increment_counter("br", "se", identifier)
+    for _ in range(200):
+        counter_handler.increment_counter("br")
+
+
+def _reserve_blocks(counter_handler: SharedMmapCounterHandler) -> list:
+    return [counter_handler.reserve_block("ra", 10) for _ in range(20)]
+
+
+class TestSharedMmapCounterHandler(unittest.TestCase):
+    def setUp(self):
+        self.info_dir = os.path.join('.', 'info_dir', 'shared_mmap') + os.sep
+        self.counter_handler = SharedMmapCounterHandler(self.info_dir)
+
+    def tearDown(self):
+        self.counter_handler.close()
+        if os.path.exists(self.info_dir):
+            rmtree(self.info_dir)
+
+    def test_counters(self):
+        self.assertEqual(0, self.counter_handler.read_counter("br"))
+        self.assertEqual(1, self.counter_handler.increment_counter("br"))
+        self.counter_handler.set_counter(5, "br", "se", 3)
+        self.assertEqual(6, self.counter_handler.increment_counter("br", "se", 3))
+        self.counter_handler.set_counters_batch({("br", "se"): {1: 10, 2: 20}}, "")
+        self.assertEqual([10, 20, 6], [self.counter_handler.read_counter("br", "se", i) for i in (1, 2, 3)])
+        self.assertEqual(1, self.counter_handler.increment_metadata_counter("di", "http://dataset/"))
+        self.assertRaises(ValueError, self.counter_handler._set_number, -1, self.info_dir + 'file.bin', 1)
+        self.assertRaises(ValueError, self.counter_handler._add_number, self.info_dir + 'file.bin', -1)
+
+    def test_reserve_block(self):
+        self.assertEqual(1, self.counter_handler.reserve_block("ra", 100))
+        self.assertEqual(101, self.counter_handler.reserve_block("ra", 5))
+        self.assertEqual(106, self.counter_handler.increment_counter("ra"))
+        self.assertRaises(ValueError, self.counter_handler.reserve_block, "ra", 0)
+
+        # The blocks reserved by concurrent processes never overlap
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            blocks = [first_value for result in executor.map(_reserve_blocks, [self.counter_handler] * 4)
+                      for first_value in result]
+        self.assertEqual(list(range(107, 107 + 80 * 10, 10)), sorted(blocks))
+        self.assertEqual(906, self.counter_handler.read_counter("ra"))
+
+    def test_concurrent_increments(self):
+        # The processes enlarge the same files and update the same records without losing any update
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_increment_counters, [self.counter_handler] * 4))
+        self.assertEqual(800, self.counter_handler.read_counter("br"))
+        self.assertEqual([4] * 200, [self.counter_handler.read_counter("br", "se", identifier)
+                                     for identifier in range(1, 201)])
+
+    def test_pickle(self):
+        self.counter_handler.set_counter(7, "br")
+        other_counter_handler = pickle.loads(pickle.dumps(self.counter_handler))
+        try:
+            self.assertEqual(7, other_counter_handler.read_counter("br"))
+            other_counter_handler.increment_counter("br")
+            self.assertEqual(8, self.counter_handler.read_counter("br"))
+        finally:
+            other_counter_handler.close()
+
+    def test_checkpoint_interval(self):
+        self.assertRaises(ValueError, SharedMmapCounterHandler, self.info_dir, "", 0)
+        counter_handler = SharedMmapCounterHandler(self.info_dir, checkpoint_interval=0.05)
+        try:
+            counter_handler.set_counter(3, "br")
+            first_timer = counter_handler._timer
+            time.sleep(0.2)
+            self.assertIsNot(first_timer, counter_handler._timer)
+            with open(counter_handler._get_info_path("br", ""), 'rb') as file:
+                self.assertEqual(3, int.from_bytes(file.read(8), 'little'))
+        finally:
+            counter_handler.close()
+        self.assertIsNone(counter_handler._timer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import sqlite3
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from shutil import rmtree
+
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
+
+
+def _increment_counters(database: str) -> list:
+    counter_handler = SqliteCounterHandler(database)
+    result = [counter_handler.increment_counter("br", "se", 1, "060") for _ in range(50)]
+    counter_handler.close()
+    return result
+
+
+class TestSqliteCounterHandler(unittest.TestCase):
+    def setUp(self):
+        self.info_dir = os.path.join('.', 'info_dir', 'sqlite') + os.sep
+        os.makedirs(self.info_dir, exist_ok=True)
+        self.database = os.path.join(self.info_dir, 'counters.db')
+        self.counter_handler = SqliteCounterHandler(self.database)
+
+    def tearDown(self):
+        self.counter_handler.close()
+        rmtree(self.info_dir, ignore_errors=True)
+
+    def test_counters(self):
+        self.assertEqual(0, self.counter_handler.read_counter("br"))
+        self.counter_handler.set_counter(5, "br", supplier_prefix="060")
+        self.assertEqual(5, self.counter_handler.read_counter("br", supplier_prefix="060"))
+        self.assertEqual(0, self.counter_handler.read_counter("br", supplier_prefix="070"))
+        self.assertEqual(6, self.counter_handler.increment_counter("br", supplier_prefix="060"))
+        self.assertEqual(1, self.counter_handler.increment_counter("br", "se", "6", "060"))
+        self.assertEqual(1, self.counter_handler.read_counter("br", "se", 6, "060"))
+        self.assertEqual(0, self.counter_handler.read_counter("br", "se", 5, "060"))
+
+        self.assertRaises(ValueError, self.counter_handler.set_counter, -1, "br")
+        self.assertRaises(ValueError, self.counter_handler.read_counter, "br", "se", 0)
+        self.assertRaises(ValueError, self.counter_handler.increment_counter, "br", "se", -1)
+
+    def test_batches(self):
+        self.counter_handler.set_counters_batch({("br", "se"): {1: 10, 2: 20}, ("br", ""): {1: 2}}, "060")
+        keys = [("br", "se", 1, "060"), ("br", "se", 2, "060"), ("br", "", 1, "060"), ("ra", "", 1, "060")]
+        self.assertEqual([10, 20, 2, 0], self.counter_handler.read_counters(keys))
+        self.assertEqual([11, 21, 3, 1, 12], self.counter_handler.increment_counters(keys + keys[:1]))
+        self.assertRaises(ValueError, self.counter_handler.set_counters_batch, {("br", "se"): {1: -1}}, "")
+
+        self.assertEqual(4, self.counter_handler.reserve_block("br", 100, "060"))
+        self.assertEqual(103, self.counter_handler.read_counter("br", supplier_prefix="060"))
+        self.assertRaises(ValueError, self.counter_handler.reserve_block, "br", 0)
+
+    def test_transaction(self):
+        with self.counter_handler.transaction():
+            self.counter_handler.set_counter(3, "br")
+            with self.counter_handler.transaction():
+                self.counter_handler.increment_counter("br")
+            # Changes are not visible to other connections until the outermost block ends
+            other = sqlite3.connect(self.database)
+            self.assertEqual([], other.execute("SELECT * FROM counters").fetchall())
+        self.assertEqual([(4,)], other.execute("SELECT count FROM counters").fetchall())
+        other.close()
+
+        with self.assertRaises(KeyError):
+            with self.counter_handler.transaction():
+                self.counter_handler.increment_counter("br")
+                raise KeyError
+        self.assertEqual(4, self.counter_handler.read_counter("br"))
+
+    def test_metadata_counters(self):
+        dataset_name = "http://dataset/"
+        self.assertEqual(0, self.counter_handler.read_metadata_counter("di", dataset_name))
+        self.assertEqual(1, self.counter_handler.increment_metadata_counter("di", dataset_name))
+        self.counter_handler.set_metadata_counter(42, "di", dataset_name)
+        self.assertEqual(43, self.counter_handler.increment_metadata_counter("di", dataset_name))
+        self.assertEqual(0, self.counter_handler.read_metadata_counter("di", "http://other/"))
+        self.assertRaises(ValueError, self.counter_handler.read_metadata_counter, "di", None)
+        self.assertRaises(ValueError, self.counter_handler.set_metadata_counter, -1, "di", dataset_name)
+
+    def test_concurrent_increments(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            results = [value for result in executor.map(_increment_counters, [self.database] * 4)
+                       for value in result]
+        self.assertEqual(list(range(1, 201)), sorted(results))
+
+    def test_legacy_counters(self):
+        legacy_database = os.path.join(self.info_dir, 'legacy.db')
+        con = sqlite3.connect(legacy_database)
+        con.execute("CREATE TABLE info(entity TEXT PRIMARY KEY, count INTEGER)")
+        con.executemany("INSERT INTO info VALUES (?, ?)", [
+            ("https://w3id.org/oc/meta/br/0601", 3), ("https://w3id.org/oc/meta/ra/12", 1), ("not an iri", 7)])
+        con.commit()
+        con.close()
+
+        counter_handler = SqliteCounterHandler(legacy_database)
+        self.assertEqual(3, counter_handler.read_counter("br", "se", 1, "060"))
+        self.assertEqual(1, counter_handler.read_counter("ra", "se", 12, ""))
+        # The rows which cannot be interpreted are kept in the legacy table
+        self.assertEqual([("not an iri", 7)], counter_handler.con.execute("SELECT * FROM info").fetchall())
+        counter_handler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,9 +15,53 @@
 # SOFTWARE.
 import unittest
 
+from rdflib import URIRef
+
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.graph.graph_set import GraphSet
+
 
 class TestGraphEntity(unittest.TestCase):
-    pass
+    resp_agent = 'http://resp_agent.test/'
+
+    def setUp(self):
+        self.graph_set = GraphSet("http://test/", "./info_dir/", "", False)
+
+    def test_merge(self):
+        br_1 = self.graph_set.add_br(self.resp_agent)
+        br_2 = self.graph_set.add_br(self.resp_agent)
+        br_3 = self.graph_set.add_br(self.resp_agent)
+        ar = self.graph_set.add_ar(self.resp_agent)
+        ra = self.graph_set.add_ra(self.resp_agent)
+        br_3.is_part_of(br_2)
+        br_2.has_contributor(ar)
+        ar.is_held_by(ra)
+
+        br_1.merge(br_2)
+
+        self.assertEqual(br_1, br_3.get_is_part_of())
+        self.assertNotIn((br_3.res, GraphEntity.iri_part_of, br_2.res), br_3.g)
+        self.assertTrue(br_2.to_be_deleted)
+        self.assertListEqual([br_3], self.graph_set.get_referencing_entities(br_1.res))
+        self.assertListEqual([], self.graph_set.get_referencing_entities(br_2.res))
+        # The contributors of the merged entity are now referenced by the surviving one, too
+        self.assertSetEqual({br_1, br_2}, set(self.graph_set.get_referencing_entities(ar.res)))
+
+    def test_mark_as_to_be_deleted(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        ar = self.graph_set.add_ar(self.resp_agent)
+        ra = self.graph_set.add_ra(self.resp_agent)
+        br.has_contributor(ar)
+        ar.is_held_by(ra)
+        # Triples added directly to the graph of the entity must be taken into account, too
+        br.g.add((br.res, GraphEntity.iri_relation, ra.res))
+
+        ra.mark_as_to_be_deleted()
+
+        self.assertIsNone(ar.get_is_held_by())
+        self.assertNotIn((br.res, GraphEntity.iri_relation, ra.res), br.g)
+        self.assertIn((br.res, GraphEntity.iri_is_document_context_for, ar.res), br.g)
+        self.assertListEqual([], self.graph_set.get_referencing_entities(ra.res))
 
 
 if __name__ == '__main__':
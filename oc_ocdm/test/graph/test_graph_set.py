@@ -14,9 +14,12 @@
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 import unittest
+from unittest.mock import patch
 
-from rdflib import Graph
+from rdflib import Graph, URIRef
 
+from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.graph.entities.identifier import Identifier
 from oc_ocdm.graph.entities.bibliographic.agent_role import AgentRole
@@ -138,6 +141,62 @@ class TestGraphSet(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertEqual(iri, result)
 
+    def test_get_br(self):
+        br_1 = self.graph_set.add_br(self.resp_agent)
+        self.graph_set.add_ar(self.resp_agent)
+        br_2 = self.graph_set.add_br(self.resp_agent)
+
+        result = self.graph_set.get_br()
+        self.assertTupleEqual((br_1, br_2), result)
+        self.assertTupleEqual(tuple(), self.graph_set.get_ci())
+
+        # Entities removed from the set must not be returned anymore
+        del self.graph_set.res_to_entity[br_1.res]
+        self.assertTupleEqual((br_2,), self.graph_set.get_br())
+
+    def test_commit_changes(self):
+        br_1 = self.graph_set.add_br(self.resp_agent)
+        br_2 = self.graph_set.add_br(self.resp_agent)
+        br_2.mark_as_to_be_deleted()
+
+        self.graph_set.commit_changes()
+
+        self.assertIsNone(self.graph_set.get_entity(br_2.res))
+        self.assertIs(self.graph_set.get_entity(br_1.res), br_1)
+        self.assertTupleEqual((br_1,), self.graph_set.get_br())
+
+    def test_id_block_size(self):
+        counter_handler = InMemoryCounterHandler()
+        graph_set = GraphSet("http://test/", supplier_prefix="060", wanted_label=False,
+                             custom_counter_handler=counter_handler, id_block_size=10)
+        with patch.object(counter_handler, "reserve_block", wraps=counter_handler.reserve_block) as reserve_block:
+            ids = [str(graph_set.add_br(self.resp_agent).res) for _ in range(25)]
+            self.assertEqual(3, reserve_block.call_count)
+        self.assertEqual([f"http://test/br/060{i}" for i in range(1, 26)], ids)
+        self.assertEqual(30, counter_handler.read_counter("br", supplier_prefix="060"))
+
+        # An entity with an explicit IRI consumes the values of the block up to its own
+        graph_set.add_br(self.resp_agent, res=URIRef("http://test/br/06028"))
+        self.assertEqual("http://test/br/06029", str(graph_set.add_br(self.resp_agent).res))
+
+        self.assertRaises(ValueError, GraphSet, "http://test/", id_block_size=0)
+
+    def test_get_referencing_entities(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        ar_1 = self.graph_set.add_ar(self.resp_agent)
+        ar_2 = self.graph_set.add_ar(self.resp_agent)
+        ra = self.graph_set.add_ra(self.resp_agent)
+        br.has_contributor(ar_1)
+        ar_1.is_held_by(ra)
+        ar_2.add_triples([(ar_2.res, GraphEntity.iri_is_held_by, ra.res)])
+
+        self.assertListEqual([br], self.graph_set.get_referencing_entities(ar_1.res))
+        self.assertSetEqual({ar_1, ar_2}, set(self.graph_set.get_referencing_entities(ra.res)))
+        self.assertListEqual([], self.graph_set.get_referencing_entities(br.res))
+
+        ar_1.remove_is_held_by()
+        self.assertListEqual([ar_2], self.graph_set.get_referencing_entities(ra.res))
+
     def test_get_orphans(self):
         br = self.graph_set.add_br(self.resp_agent)
         ar = self.graph_set.add_ar(self.resp_agent)
@@ -51,6 +51,18 @@ class TestMetadataSet(unittest.TestCase):
         self.assertIsInstance(di, Distribution)
         self.assertIsInstance(di.g.identifier, BNode)
 
+    def test_get_di(self):
+        dataset = self.metadata_set.add_dataset("ocdmTest", self.resp_agent)
+        di_1 = self.metadata_set.add_di("ocdmTest", self.resp_agent)
+        di_2 = self.metadata_set.add_di("ocdmTest", self.resp_agent)
+
+        self.assertTupleEqual((di_1, di_2), self.metadata_set.get_di())
+        self.assertTupleEqual((dataset,), self.metadata_set.get_dataset())
+
+        di_2.mark_as_to_be_deleted()
+        self.metadata_set.commit_changes()
+        self.assertTupleEqual((di_1,), self.metadata_set.get_di())
+
     def test_graphs(self):
         count = 10
         for i in range(count):
@@ -16,7 +16,9 @@
 
 import os
 import unittest
+from unittest.mock import MagicMock, patch
 
+from oc_ocdm.counter_handler.redis_counter_handler import RedisCounterHandler
 from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.entities.snapshot_entity import SnapshotEntity
@@ -248,6 +250,50 @@ class TestProvSet(unittest.TestCase):
         prov_subject = URIRef('https://w3id.org/oc/corpus/br/abc')
         self.assertRaises(ValueError, self.prov_set._retrieve_last_snapshot, prov_subject)
 
+    def _redis_prov_set(self, mock_redis):
+        with patch('redis.Redis', return_value=mock_redis):
+            counter_handler = RedisCounterHandler()
+        graph_set = GraphSet("http://test/", supplier_prefix="060", wanted_label=False)
+        prov_set = ProvSet(graph_set, "http://test/", wanted_label=False, custom_counter_handler=counter_handler)
+        for _ in range(50):
+            graph_set.add_br(self.resp_agent)
+        graph_set.get_entity(URIRef("http://test/br/0602")).has_title("Modified")
+        return prov_set
+
+    def test_generate_provenance_shared_counters(self):
+        # By default, each snapshot counter is atomically incremented by the backend
+        mock_redis = MagicMock()
+        mock_redis.get.side_effect = lambda key: "1" if key == "br:060:2:se" else None
+        mock_redis.incr.side_effect = lambda key: 2 if key == "br:060:2:se" else 1
+        prov_set = self._redis_prov_set(mock_redis)
+
+        prov_set.generate_provenance(self.cur_time)
+        self.assertEqual(51, len(prov_set.get_se()))
+        self.assertIsNotNone(prov_set.get_entity(URIRef("http://test/br/0602/prov/se/2")))
+        self.assertEqual(50, mock_redis.incr.call_count)
+        mock_redis.pipeline.return_value.set.assert_not_called()
+
+    def test_generate_provenance_batched_counters(self):
+        mock_redis = MagicMock()
+        mock_redis.mget.side_effect = lambda keys: ["1" if key == "br:060:2:se" else None for key in keys]
+        prov_set = self._redis_prov_set(mock_redis)
+
+        prov_set.generate_provenance(self.cur_time, batch_counters=True)
+        self.assertEqual(51, len(prov_set.get_se()))
+        self.assertIsNotNone(prov_set.get_entity(URIRef("http://test/br/0602/prov/se/2")))
+
+        # One MGET and one pipeline, whatever the number of entities
+        mock_redis.mget.assert_called_once()
+        self.assertEqual(50, len(mock_redis.mget.call_args[0][0]))
+        mock_redis.get.assert_not_called()
+        mock_redis.incr.assert_not_called()
+        pipeline = mock_redis.pipeline.return_value
+        pipeline.execute.assert_called_once()
+        pipeline.set.assert_any_call("br:060:2:se", 2)
+        pipeline.set.assert_any_call("br:060:50:se", 1)
+        self.assertEqual(50, pipeline.set.call_count)
+
+
 class TestProvSetWorkflow(unittest.TestCase):
     def setUp(self):
         self.test_dir = os.path.join('oc_ocdm', 'test', 'prov', 'provset_workflow_data') + os.sep
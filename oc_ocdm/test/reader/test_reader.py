@@ -14,12 +14,20 @@
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 
+import json
 import os
 import unittest
+from shutil import rmtree
+from unittest.mock import patch
+from zipfile import ZipFile
 
 from oc_ocdm.graph import GraphSet
+from oc_ocdm.prov import ProvSet
 from oc_ocdm.reader import Reader
-from rdflib import Graph, URIRef
+from oc_ocdm.storer import Storer
+from oc_ocdm.support.entity_cache import EntityCache
+from oc_ocdm.support.reporter import Reporter
+from rdflib import RDF, ConjunctiveGraph, Graph, URIRef
 from SPARQLWrapper import POST, SPARQLWrapper
 
 
@@ -46,4 +54,265 @@ class TestReader(unittest.TestCase):
         reader = Reader()
         g_set = GraphSet('https://w3id.org/oc/meta')
         reader.import_entity_from_triplestore(g_set, self.endpoint, URIRef('https://w3id.org/oc/meta/br/0605'), 'https://orcid.org/0000-0002-8420-0696', False)
-        self.assertEqual(set(str(s) for s in g_set.res_to_entity.keys()), {'https://w3id.org/oc/meta/br/0605'})
\ No newline at end of file
+        self.assertEqual(set(str(s) for s in g_set.res_to_entity.keys()), {'https://w3id.org/oc/meta/br/0605'})
+
+
+class TestReaderFormats(unittest.TestCase):
+    def setUp(self):
+        self.dir_path = os.path.join('.', 'info_dir', 'reader_formats')
+        os.makedirs(self.dir_path, exist_ok=True)
+        self.nt = '<https://w3id.org/oc/meta/br/0601> <http://purl.org/dc/terms/title> "A title" .\n'
+        self.json_ld = json.dumps({"@graph": [{"@id": "https://w3id.org/oc/meta/br/0601",
+                                               "http://purl.org/dc/terms/title": "A title"}],
+                                   "@id": "https://w3id.org/oc/meta/br/"})
+
+    def tearDown(self):
+        rmtree(self.dir_path)
+
+    def _write(self, file_name: str, content: str) -> str:
+        file_path = os.path.join(self.dir_path, file_name)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return file_path
+
+    def test_get_formats(self):
+        reader = Reader()
+        for file_name, content, expected_format in (('br.nt', '', 'nt11'), ('se.nq', '', 'nquads'),
+                                                    ('br.json', '', 'json-ld'), ('br', self.json_ld, 'json-ld'),
+                                                    ('br', self.nt, 'nquads'), ('br', '@prefix a: <b> .', 'trig'),
+                                                    ('br', '<?xml version="1.0"?>', 'xml')):
+            with self.subTest(file_name=file_name, expected_format=expected_format):
+                file_path = self._write(file_name, content)
+                with open(file_path, 'rt', encoding='utf-8') as f:
+                    formats = reader._get_formats(file_path, f)
+                    self.assertEqual(expected_format, formats[0])
+                    self.assertEqual(sorted(Reader.formats), sorted(formats))
+                    self.assertEqual(0, f.tell())
+                    self.assertEqual([expected_format], Reader(fail_fast=True)._get_formats(file_path, f))
+        with open(self._write('br', 'unknown'), 'rt', encoding='utf-8') as f:
+            self.assertEqual(list(Reader.formats), reader._get_formats('br', f))
+            self.assertEqual([], Reader(fail_fast=True)._get_formats('br', f))
+
+    def test_single_parse(self):
+        zip_path = os.path.join(self.dir_path, 'br.zip')
+        with ZipFile(zip_path, 'w') as archive:
+            archive.writestr('br.json', self.json_ld)
+        for file_path in (self._write('br.nt', self.nt), self._write('br.json', self.json_ld), zip_path):
+            with self.subTest(file_path=file_path):
+                with patch.object(ConjunctiveGraph, 'parse', autospec=True,
+                                  side_effect=ConjunctiveGraph.parse) as mocked_parse:
+                    loaded_graph = Reader().load(file_path)
+                self.assertEqual(1, mocked_parse.call_count)
+                self.assertEqual({URIRef('https://w3id.org/oc/meta/br/0601')}, set(loaded_graph.subjects()))
+
+    def test_fail_fast(self):
+        # N-Triples content stored in a file having the wrong extension
+        file_path = self._write('br.json', self.nt)
+        self.assertEqual(1, len(Reader().load(file_path)))
+        self.assertIsNone(Reader(fail_fast=True).load(file_path))
+        self.assertIsNone(Reader(fail_fast=True).load(self._write('br.nt', self.nt + 'corrupted')))
+
+
+class TestReaderLoadTree(unittest.TestCase):
+    base_iri = 'https://w3id.org/oc/meta/'
+    resp_agent = 'https://orcid.org/0000-0002-8420-0696'
+
+    def setUp(self):
+        self.base_dir = os.path.join('.', 'info_dir', 'load_tree') + os.sep
+        self.silent = Reporter(print_sentences=False)
+        for supplier_prefix in ('060', '0610'):
+            g_set = GraphSet(self.base_iri, supplier_prefix=supplier_prefix, wanted_label=False)
+            for i in range(25):
+                br = g_set.add_br(self.resp_agent)
+                br.has_title(f'Title {i}')
+                br.has_identifier(g_set.add_id(self.resp_agent))
+            prov_set = ProvSet(g_set, self.base_iri, wanted_label=False)
+            prov_set.generate_provenance()
+            for a_set in (g_set, prov_set):
+                Storer(a_set, repok=self.silent, reperr=self.silent, dir_split=100, n_file_item=10,
+                       zip_output=True).store_all(self.base_dir, self.base_iri)
+
+    def tearDown(self):
+        rmtree(self.base_dir)
+
+    @staticmethod
+    def _subjects(graphs):
+        return {str(s) for graph in graphs for s in graph.subjects()}
+
+    def test_load_tree(self):
+        reader = Reader(repok=self.silent, reperr=self.silent)
+        graphs = list(reader.load_tree(self.base_dir, chunk_size=4))
+        # 3 files for each short name and supplier prefix
+        self.assertEqual(3, len(graphs))
+        subjects = self._subjects(graphs)
+        self.assertEqual(100, len(subjects))
+        self.assertFalse(any('/prov/' in subject for subject in subjects))
+
+        with self.subTest("process pool"):
+            parallel_graphs = list(reader.load_tree(self.base_dir, workers=2, chunk_size=1, max_in_flight=1))
+            self.assertEqual(12, len(parallel_graphs))
+            self.assertEqual(subjects, self._subjects(parallel_graphs))
+        with self.subTest("filters"):
+            filtered_subjects = self._subjects(reader.load_tree(self.base_dir, short_names=['br'],
+                                                                supplier_prefixes=['0610']))
+            self.assertEqual({f'{self.base_iri}br/0610{i}' for i in range(1, 26)}, filtered_subjects)
+        with self.subTest("provenance"):
+            self.assertEqual(200, len(self._subjects(reader.load_tree(self.base_dir, include_prov=True))))
+
+        g_set = GraphSet(self.base_iri, wanted_label=False)
+        for graph in reader.load_tree(self.base_dir, workers=2):
+            Reader.import_entities_from_graph(g_set, graph, self.resp_agent)
+        self.assertEqual(50, len(g_set.get_br()))
+        self.assertEqual(50, len(g_set.get_id()))
+
+    def test_load_tree_errors(self):
+        with open(os.path.join(self.base_dir, 'br', '060', '100', '10.zip'), 'wb') as f:
+            f.write(b'corrupted')
+        reperr = Reporter(print_sentences=False)
+        reader = Reader(repok=self.silent, reperr=reperr)
+        self.assertEqual(90, len(self._subjects(reader.load_tree(self.base_dir, workers=2, chunk_size=2))))
+        self.assertEqual(1, len(reperr.last_article))
+        self.assertRaises(ValueError, next, reader.load_tree(self.base_dir, chunk_size=0))
+        self.assertEqual([], list(reader.load_tree(os.path.join(self.base_dir, 'missing'))))
+
+
+class TestReaderImport(unittest.TestCase):
+    base_iri = 'https://w3id.org/oc/meta/'
+    resp_agent = 'https://orcid.org/0000-0002-8420-0696'
+
+    def setUp(self):
+        source_set = GraphSet(self.base_iri, supplier_prefix='060', wanted_label=False)
+        br = source_set.add_br(self.resp_agent)
+        br.create_journal_article()
+        br.has_title('A title')
+        br.has_identifier(source_set.add_id(self.resp_agent))
+        ar = source_set.add_ar(self.resp_agent)
+        ar.create_author()
+        br.has_contributor(ar)
+        self.graph = Graph()
+        for entity in source_set.res_to_entity.values():
+            for triple in entity.g:
+                self.graph.add(triple)
+        # A subject whose type is not handled by the OCDM
+        self.graph.add((URIRef('https://example.org/other'), RDF.type, URIRef('https://example.org/Other')))
+
+    def _check_import(self, results):
+        g_set = GraphSet(self.base_iri, wanted_label=False)
+        imported_entities = Reader.import_entities_from_graph(g_set, results, self.resp_agent)
+        self.assertEqual({'br', 'id', 'ar'}, {entity.short_name for entity in imported_entities})
+        br = g_set.get_entity(URIRef(self.base_iri + 'br/0601'))
+        self.assertEqual('A title', str(br.get_title()))
+        self.assertEqual(URIRef(self.base_iri + 'id/0601'), br.get_identifiers()[0].res)
+        for entity in imported_entities:
+            self.assertEqual(set(self.graph.triples((entity.res, None, None))), set(entity.g))
+            self.assertEqual(set(entity.g), set(entity.preexisting_graph))
+
+    def test_import_entities_from_graph(self):
+        self._check_import(self.graph)
+
+    def test_import_entities_from_results(self):
+        results = []
+        for s, p, o in self.graph:
+            if isinstance(o, URIRef):
+                binding = {'type': 'uri', 'value': str(o)}
+            else:
+                binding = {'type': 'literal', 'value': str(o), 'datatype': str(o.datatype)}
+            results.append({'s': {'type': 'uri', 'value': str(s)}, 'p': {'type': 'uri', 'value': str(p)},
+                            'o': binding})
+        self._check_import(results)
+
+class TestReaderImportFromTriplestore(unittest.TestCase):
+    base_iri = 'https://w3id.org/oc/meta/'
+    resp_agent = 'https://orcid.org/0000-0002-8420-0696'
+
+    def setUp(self):
+        source_set = GraphSet(self.base_iri, supplier_prefix='060', wanted_label=False)
+        self.brs = []
+        for i in range(3):
+            br = source_set.add_br(self.resp_agent)
+            br.has_title(f'Title {i}')
+            ra = source_set.add_ra(self.resp_agent)
+            ra.has_identifier(source_set.add_id(self.resp_agent))
+            ar = source_set.add_ar(self.resp_agent)
+            ar.create_author()
+            ar.is_held_by(ra)
+            br.has_contributor(ar)
+            self.brs.append(br.res)
+        self.graph = Graph()
+        for entity in source_set.res_to_entity.values():
+            for triple in entity.g:
+                self.graph.add(triple)
+        self.queries = []
+
+    def _query(self, session, query_string):
+        self.queries.append(query_string)
+        return self.graph.query(query_string).serialize(format='json')
+
+    def _import(self, g_set, res_list, **kwargs):
+        with patch('oc_ocdm.reader.SparqlSession.query', autospec=True, side_effect=self._query):
+            return Reader.import_entities_from_triplestore(g_set, 'http://localhost:9999/sparql', res_list,
+                                                           self.resp_agent, **kwargs)
+
+    def test_import_entities(self):
+        g_set = GraphSet(self.base_iri, wanted_label=False)
+        imported_entities = self._import(g_set, self.brs + [self.brs[0], URIRef(self.base_iri + 'br/0609')])
+        self.assertEqual(1, len(self.queries))
+        self.assertEqual(set(self.brs), {entity.res for entity in imported_entities})
+        for entity in imported_entities:
+            self.assertEqual(set(self.graph.triples((entity.res, None, None))), set(entity.g))
+        self.assertEqual(3, len(g_set.res_to_entity))
+
+    def test_import_entities_depth(self):
+        g_set = GraphSet(self.base_iri, wanted_label=False)
+        imported_entities = self._import(g_set, self.brs[:1], max_depth=2)
+        self.assertEqual(['br', 'ar', 'ra'], [entity.short_name for entity in imported_entities])
+        self.assertEqual(3, len(self.queries))
+
+        g_set = GraphSet(self.base_iri, wanted_label=False)
+        imported_entities = self._import(g_set, self.brs, max_depth=3)
+        self.assertEqual(12, len(imported_entities))
+        self.assertEqual(len(self.graph), sum(len(entity.g) for entity in imported_entities))
+        for entity in imported_entities:
+            self.assertEqual(set(self.graph.triples((entity.res, None, None))), set(entity.g))
+
+    def test_import_entities_batches(self):
+        g_set = GraphSet(self.base_iri, wanted_label=False)
+        imported_entities = self._import(g_set, self.brs, batch_size=1, workers=2, max_depth=3)
+        self.assertEqual(12, len(imported_entities))
+        self.assertEqual(12, len(self.queries))
+        self.assertRaises(ValueError, self._import, g_set, self.brs, batch_size=0)
+
+    def test_import_entities_already_in_set(self):
+        g_set = GraphSet(self.base_iri, wanted_label=False)
+        self._import(g_set, self.brs[:1])
+        existing_entity = g_set.get_entity(self.brs[0])
+        self.queries.clear()
+        imported_entities = self._import(g_set, self.brs[:2])
+        self.assertEqual(1, len(self.queries))
+        self.assertNotIn(self.brs[0].n3(), self.queries[0])
+        self.assertIs(existing_entity, imported_entities[0])
+        self.assertEqual(self.brs[:2], [entity.res for entity in imported_entities])
+
+    def test_import_entities_cache(self):
+        entity_cache = EntityCache()
+        imported_entities = self._import(GraphSet(self.base_iri, wanted_label=False), self.brs, max_depth=3,
+                                         entity_cache=entity_cache)
+        self.assertEqual(12, len(entity_cache))
+        self.queries.clear()
+
+        entity_cache.invalidate([self.brs[0]])
+        g_set = GraphSet(self.base_iri, wanted_label=False)
+        cached_entities = self._import(g_set, self.brs, max_depth=3, entity_cache=entity_cache)
+        # Only the invalidated entity is retrieved from the triplestore
+        self.assertEqual(1, len(self.queries))
+        self.assertIn(self.brs[0].n3(), self.queries[0])
+        self.assertEqual({(entity.res, frozenset(entity.g)) for entity in imported_entities},
+                         {(entity.res, frozenset(entity.g)) for entity in cached_entities})
+
+        self.queries.clear()
+        with patch('oc_ocdm.reader.SPARQLWrapper') as sparql_mock:
+            entity = Reader.import_entity_from_triplestore(GraphSet(self.base_iri, wanted_label=False),
+                                                           'http://localhost:9999/sparql', self.brs[1],
+                                                           self.resp_agent, entity_cache=entity_cache)
+        sparql_mock.assert_not_called()
+        self.assertEqual(set(self.graph.triples((self.brs[1], None, None))), set(entity.g))
@@ -15,17 +15,26 @@
 # SOFTWARE.
 import json
 import os
+import re
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs
 from zipfile import ZipFile
 from multiprocessing import Pool
 from SPARQLWrapper import POST, SPARQLWrapper
 
-from rdflib import ConjunctiveGraph, URIRef, compare
+from rdflib import XSD, ConjunctiveGraph, Literal, URIRef, compare
 
+from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.prov.prov_entity import ProvEntity
 from oc_ocdm.prov.prov_set import ProvSet
 from oc_ocdm.storer import Storer
 from oc_ocdm.reader import Reader
+from oc_ocdm.support.entity_cache import EntityCache
+from oc_ocdm.support.reporter import Reporter
 
 from shutil import rmtree
 
@@ -230,5 +239,309 @@ def process_entity(entity):
     storer.upload_all(ts, base_dir)
 
 
+class TestStorerFiles(unittest.TestCase):
+    # Unlike TestStorer, these tests only write files and don't require a running triplestore
+
+    def setUp(self):
+        self.resp_agent = "http://resp_agent.test/"
+        self.base_iri = "http://test/"
+        self.graph_set = GraphSet(self.base_iri, "", "060", False)
+        self.data_dir = os.path.join("oc_ocdm", "test", "storer", "data_files")
+
+    def tearDown(self):
+        if os.path.exists(self.data_dir):
+            rmtree(self.data_dir)
+
+    def _read_stored_files(self, base_dir: str, stored_paths: list) -> dict:
+        result = dict()
+        for path in stored_paths:
+            with open(path, "rt", encoding="utf-8") as f:
+                result[os.path.relpath(path, base_dir)] = f.read()
+        return result
+
+    @staticmethod
+    def _named_quads(g: ConjunctiveGraph) -> set:
+        return {(s, p, o, c.identifier) for s, p, o, c in g.quads() if isinstance(c.identifier, URIRef)}
+
+    def test_store_all_workers(self):
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(25)]
+        for idx, br in enumerate(brs):
+            br.has_title(f"Title {idx}")
+
+        for output_format in ("json-ld", "nquads"):
+            with self.subTest(output_format=output_format):
+                sequential_dir = os.path.join(self.data_dir, output_format, "sequential") + os.sep
+                parallel_dir = os.path.join(self.data_dir, output_format, "parallel") + os.sep
+                storer = Storer(self.graph_set, context_map={}, dir_split=10000, n_file_item=10,
+                                default_dir="_", output_format=output_format)
+                sequential_paths = storer.store_all(sequential_dir, self.base_iri)
+                parallel_paths = storer.store_all(parallel_dir, self.base_iri, workers=2)
+                self.assertEqual(3, len(parallel_paths))
+                self.assertListEqual([os.path.relpath(path, sequential_dir) for path in sequential_paths],
+                                     [os.path.relpath(path, parallel_dir) for path in parallel_paths])
+                self.assertDictEqual(self._read_stored_files(sequential_dir, sequential_paths),
+                                     self._read_stored_files(parallel_dir, parallel_paths))
+
+        self.graph_set.commit_changes()
+        brs[0].has_title("New title")
+        brs[24].mark_as_to_be_deleted()
+        with self.subTest("files already stored are updated"):
+            sequential_dir = os.path.join(self.data_dir, "json-ld", "sequential") + os.sep
+            parallel_dir = os.path.join(self.data_dir, "json-ld", "parallel") + os.sep
+            storer = Storer(self.graph_set, context_map={}, dir_split=10000, n_file_item=10, default_dir="_")
+            sequential_paths = storer.store_all(sequential_dir, self.base_iri)
+            parallel_paths = storer.store_all(parallel_dir, self.base_iri, workers=2)
+            sequential_files = self._read_stored_files(sequential_dir, sequential_paths)
+            self.assertDictEqual(sequential_files, self._read_stored_files(parallel_dir, parallel_paths))
+            stored_g = Reader().load(parallel_paths[0])
+            self.assertListEqual(["New title"], [str(o) for o in stored_g.objects(brs[0].res, GraphEntity.iri_title)])
+            stored_g = Reader().load(parallel_paths[-1])
+            self.assertEqual(0, len(list(stored_g.triples((brs[24].res, None, None)))))
+
+    def test_store_all_provenance(self):
+        # Every provenance quad must be written in the stored files, in its named graph
+        prov_set = ProvSet(self.graph_set, self.base_iri, "", False)
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(3)]
+        prov_set.generate_provenance()
+        self.graph_set.commit_changes()
+        brs[0].has_title("Title")
+        brs[1].mark_as_to_be_deleted()
+        brs[2].merge(self.graph_set.add_br(self.resp_agent))
+        prov_set.generate_provenance()
+
+        def normalize(o):
+            # JSON-LD doesn't distinguish simple literals from xsd:string ones
+            return Literal(str(o)) if isinstance(o, Literal) and o.datatype == XSD.string else o
+
+        expected_quads = set()
+        for g in prov_set.graphs():
+            expected_quads.update((s, p, normalize(o), g.identifier) for s, p, o in g)
+        for output_format in ("json-ld", "nquads"):
+            with self.subTest(output_format=output_format):
+                base_dir = os.path.join(self.data_dir, "prov", output_format) + os.sep
+                prov_storer = Storer(prov_set, dir_split=10000, n_file_item=1000, output_format=output_format)
+                stored_quads = set()
+                for file_path in prov_storer.store_all(base_dir, self.base_iri):
+                    stored_g = Reader().load(file_path)
+                    stored_quads.update((s, p, normalize(o), c.identifier) for s, p, o, c in stored_g.quads())
+                self.assertEqual(5, len([1 for s, p, o, c in expected_quads if p == ProvEntity.iri_description]))
+                self.assertSetEqual(expected_quads, stored_quads)
+
+    def test_store_all_journaled(self):
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(3)]
+        journaled_dir = os.path.join(self.data_dir, "journaled") + os.sep
+        rewritten_dir = os.path.join(self.data_dir, "rewritten") + os.sep
+        storer = Storer(self.graph_set, dir_split=10000, n_file_item=1000, output_format="nquads")
+        journaled_storer = Storer(self.graph_set, dir_split=10000, n_file_item=1000, output_format="nquads",
+                                  journaled=True)
+
+        with self.assertRaises(ValueError):
+            Storer(self.graph_set, output_format="json-ld", journaled=True)
+
+        # The first batch is stored in the base file, the following ones only in the journal
+        [file_path] = storer.store_all(journaled_dir, self.base_iri)
+        storer.store_all(rewritten_dir, self.base_iri)
+        self.graph_set.commit_changes()
+        with open(file_path, "rt", encoding="utf-8") as f:
+            base_content = f.read()
+
+        brs[0].has_title("Title")
+        brs[1].mark_as_to_be_deleted()
+        journaled_storer.store_all(journaled_dir, self.base_iri)
+        storer.store_all(rewritten_dir, self.base_iri)
+        self.graph_set.commit_changes()
+        brs[0].has_title("New title")
+        journaled_storer.store_all(journaled_dir, self.base_iri)
+        storer.store_all(rewritten_dir, self.base_iri)
+
+        with open(file_path, "rt", encoding="utf-8") as f:
+            self.assertEqual(base_content, f.read())
+        self.assertTrue(os.path.exists(Storer.get_journal_path(file_path)))
+
+        [rewritten_file_path] = storer.store_all(rewritten_dir, self.base_iri)
+        expected_g = Reader().load(rewritten_file_path)
+        self.assertEqual(3, len(self._named_quads(expected_g)))
+        with self.subTest("replay of the journal"):
+            replayed_g = Reader.apply_journal(Reader().load(file_path, with_journal=False),
+                                              Storer.get_journal_path(file_path))
+            self.assertSetEqual(self._named_quads(expected_g), self._named_quads(replayed_g))
+            self.assertSetEqual(self._named_quads(expected_g), self._named_quads(Reader().load(file_path)))
+        with self.subTest("compaction"):
+            self.assertListEqual([file_path], journaled_storer.compact_all_journals(journaled_dir))
+            self.assertFalse(os.path.exists(Storer.get_journal_path(file_path)))
+            self.assertSetEqual(self._named_quads(expected_g), self._named_quads(Reader().load(file_path)))
+            self.assertListEqual([], journaled_storer.compact_all_journals(journaled_dir))
+
+    def test_store_all_journaled_new_file(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        br.has_title("Title")
+        journaled_dir = os.path.join(self.data_dir, "journaled") + os.sep
+        journaled_storer = Storer(self.graph_set, dir_split=10000, n_file_item=1000, output_format="nquads",
+                                  journaled=True)
+        # Only the journal of the returned file is written, but the file can be loaded anyway
+        [file_path] = journaled_storer.store_all(journaled_dir, self.base_iri)
+        self.assertFalse(os.path.exists(file_path))
+        self.assertListEqual(["Title"], [str(o) for o in Reader().load(file_path).objects(br.res, GraphEntity.iri_title)])
+        self.assertIsNone(Reader(reperr=Reporter(print_sentences=False)).load(file_path, with_journal=False))
+
+    def test_replace_journaled_file(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        other_br = self.graph_set.add_br(self.resp_agent)
+        journaled_dir = os.path.join(self.data_dir, "journaled") + os.sep
+        storer = Storer(self.graph_set, dir_split=10000, n_file_item=1000, output_format="nquads")
+        journaled_storer = Storer(self.graph_set, dir_split=10000, n_file_item=1000, output_format="nquads",
+                                  journaled=True)
+        [file_path] = storer.store_all(journaled_dir, self.base_iri)
+        self.graph_set.commit_changes()
+        br.has_title("Old title")
+        journaled_storer.store_all(journaled_dir, self.base_iri)
+        self.graph_set.commit_changes()
+
+        # The whole file is replaced, so its stale journal must not be applied anymore
+        br.has_title("New title")
+        storer.store_graphs_in_file(file_path)
+        self.assertFalse(os.path.exists(Storer.get_journal_path(file_path)))
+        self.graph_set.commit_changes()
+        other_br.has_title("Other title")
+        storer.store_all(journaled_dir, self.base_iri)
+        self.assertListEqual(["New title"], [str(o) for o in Reader().load(file_path).objects(br.res, GraphEntity.iri_title)])
+
+        with self.subTest("store"):
+            br.has_title("Old title")
+            journaled_storer.store_all(journaled_dir, self.base_iri)
+            self.graph_set.commit_changes()
+            br.has_title("New title")
+            storer.store(br, Reader().load(file_path), file_path)
+            self.assertFalse(os.path.exists(Storer.get_journal_path(file_path)))
+            self.assertListEqual(["New title"],
+                                 [str(o) for o in Reader().load(file_path).objects(br.res, GraphEntity.iri_title)])
+
+
+class _SparqlStandInHandler(BaseHTTPRequestHandler):
+    # A minimal SPARQL endpoint which records the update requests it receives and applies them
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        with self.server.lock:
+            update = parse_qs(body)["update"][0]
+            self.server.updates.append(update)
+            self.server.client_ports.add(self.client_address[1])
+            self.server.dataset.update(update)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestStorerUpload(unittest.TestCase):
+    def setUp(self):
+        self.resp_agent = "http://resp_agent.test/"
+        self.base_iri = "http://test/"
+        self.graph_set = GraphSet(self.base_iri, "", "060", False)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SparqlStandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.updates = []
+        self.server.client_ports = set()
+        self.server.dataset = ConjunctiveGraph()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.endpoint = f"http://127.0.0.1:{self.server.server_address[1]}/sparql"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _graph_set_quads(self) -> set:
+        return {(s, p, o, g.identifier) for g in self.graph_set.graphs() for s, p, o in g}
+
+    def _stored_quads(self) -> set:
+        return {(s, p, o, c.identifier) for s, p, o, c in self.server.dataset.quads()}
+
+    def test_upload_all(self):
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(20)]
+        storer = Storer(self.graph_set)
+        with self.subTest("sequential upload on a single connection"):
+            self.assertTrue(storer.upload_all(self.endpoint, batch_size=3))
+            self.assertEqual(7, len(self.server.updates))
+            self.assertEqual(1, len(self.server.client_ports))
+            self.assertSetEqual(self._graph_set_quads(), self._stored_quads())
+
+        self.server.updates.clear()
+        self.server.client_ports.clear()
+        with self.subTest("concurrent upload"):
+            self.assertTrue(storer.upload_all(self.endpoint, batch_size=3, workers=4))
+            self.assertLessEqual(len(self.server.client_ports), 4)
+            self.assertSetEqual(self._graph_set_quads(), self._stored_quads())
+
+        self.graph_set.commit_changes()
+        self.server.updates.clear()
+        with self.subTest("the updates of an entity are sent in order"):
+            brs[0].has_title("Title")
+            storer.upload_all(self.endpoint, workers=4)
+            self.graph_set.commit_changes()
+            brs[0].has_title("New title")
+            storer.upload_all(self.endpoint, workers=4)
+            self.assertEqual(2, len(self.server.updates))
+            self.assertIn('"Title"', self.server.updates[0])
+            self.assertIn('"New title"', self.server.updates[1])
+            self.assertSetEqual(self._graph_set_quads(), self._stored_quads())
+
+    def test_upload_all_budget(self):
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(10)]
+        for idx in range(30):
+            brs[0].has_identifier(self.graph_set.add_id(self.resp_agent))
+        storer = Storer(self.graph_set)
+        self.assertTrue(storer.upload_all(self.endpoint, batch_size=100, max_triples=20))
+        with self.subTest("statements of the same graph are merged"):
+            for update in self.server.updates:
+                self.assertEqual(1, update.count("INSERT DATA"))
+                graphs = re.findall(r"GRAPH <([^>]+)>", update)
+                self.assertEqual(len(graphs), len(set(graphs)))
+        with self.subTest("the budget of triples is respected"):
+            # brs[0] alone has 31 triples, hence it is sent in its own request
+            triples_per_update = [len(re.findall(r" \.", update)) for update in self.server.updates]
+            self.assertIn(31, triples_per_update)
+            self.assertTrue(all(n_triples <= 20 for n_triples in triples_per_update if n_triples != 31))
+            self.assertSetEqual(self._graph_set_quads(), self._stored_quads())
+
+        self.server.updates.clear()
+        self.server.dataset = ConjunctiveGraph()
+        with self.subTest("the budget of bytes is respected"):
+            self.assertTrue(storer.upload_all(self.endpoint, batch_size=100, max_bytes=1000))
+            self.assertGreater(len(self.server.updates), 2)
+            self.assertTrue(all(len(update.encode("utf-8")) < 1500 for update in self.server.updates[1:]))
+            self.assertSetEqual(self._graph_set_quads(), self._stored_quads())
+
+    def test_upload_all_entity_cache(self):
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(2)]
+        other_res = URIRef(self.base_iri + "br/0609")
+        entity_cache = EntityCache()
+        entity_cache.put_many({res: [] for res in [brs[0].res, brs[1].res, other_res]})
+        storer = Storer(self.graph_set, entity_cache=entity_cache)
+        self.assertTrue(storer.upload_all(self.endpoint))
+        self.assertNotIn(brs[0].res, entity_cache)
+        self.assertNotIn(brs[1].res, entity_cache)
+        self.assertIn(other_res, entity_cache)
+
+        self.graph_set.commit_changes()
+        entity_cache.put(brs[0].res, [])
+        entity_cache.put(brs[1].res, [])
+        brs[1].has_title("Title")
+        self.assertTrue(storer.upload_all(self.endpoint))
+        self.assertIn(brs[0].res, entity_cache)
+        self.assertNotIn(brs[1].res, entity_cache)
+
+    def test_upload_all_unreachable_endpoint(self):
+        self.graph_set.add_br(self.resp_agent)
+        storer = Storer(self.graph_set, reperr=Reporter(print_sentences=False))
+        self.server.shutdown()
+        self.server.server_close()
+        with patch("oc_ocdm.storer.time.sleep") as sleep_mock:
+            self.assertFalse(storer.upload_all(self.endpoint, workers=2))
+        self.assertEqual(2, sleep_mock.call_count)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from rdflib import URIRef
+
+from oc_ocdm.support.entity_cache import EntityCache
+
+
+class TestEntityCache(unittest.TestCase):
+    def setUp(self):
+        self.res = [URIRef(f"http://test/br/060{i}") for i in range(1, 5)]
+        self.bindings = [[{'s': {'type': 'uri', 'value': str(res)},
+                           'p': {'type': 'uri', 'value': 'http://purl.org/dc/terms/title'},
+                           'o': {'type': 'literal', 'value': f'Title {i}'}}] for i, res in enumerate(self.res)]
+
+    def test_get_put(self):
+        cache = EntityCache()
+        self.assertIsNone(cache.get(self.res[0]))
+        cache.put(self.res[0], self.bindings[0])
+        self.assertEqual(self.bindings[0], cache.get(self.res[0]))
+        self.assertIn(self.res[0], cache)
+        self.assertNotIn(self.res[1], cache)
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(2, cache.misses)
+        self.assertRaises(ValueError, EntityCache, 0)
+
+    def test_lru(self):
+        cache = EntityCache(max_entities=2)
+        cache.put(self.res[0], self.bindings[0])
+        cache.put(self.res[1], self.bindings[1])
+        # The first entity becomes the most recently used one
+        cache.get(self.res[0])
+        cache.put(self.res[2], self.bindings[2])
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(self.res[1]))
+        self.assertEqual(self.bindings[0], cache.get(self.res[0]))
+        self.assertEqual(self.bindings[2], cache.get(self.res[2]))
+
+    def test_ttl(self):
+        cache = EntityCache(ttl=10)
+        with patch("oc_ocdm.support.entity_cache.time.time", return_value=1000.0):
+            cache.put(self.res[0], self.bindings[0])
+        with patch("oc_ocdm.support.entity_cache.time.time", return_value=1005.0):
+            self.assertEqual(self.bindings[0], cache.get(self.res[0]))
+        with patch("oc_ocdm.support.entity_cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get(self.res[0]))
+        self.assertEqual(0, len(cache))
+
+    def test_invalidate(self):
+        cache = EntityCache()
+        cache.put_many(dict(zip(self.res, self.bindings)))
+        cache.invalidate(self.res[:2])
+        self.assertIsNone(cache.get(self.res[0]))
+        self.assertIsNone(cache.get(self.res[1]))
+        self.assertEqual(self.bindings[2], cache.get(self.res[2]))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_database(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database = os.path.join(tmp_dir, "entities.db")
+            with EntityCache(max_entities=1, database=database) as cache:
+                cache.put_many(dict(zip(self.res, self.bindings)))
+                self.assertEqual(1, len(cache))
+                # The entities evicted from memory are retrieved from the database
+                self.assertEqual(self.bindings[0], cache.get(self.res[0]))
+                cache.invalidate([self.res[1]])
+
+            with EntityCache(database=database) as cache:
+                self.assertEqual(0, len(cache))
+                self.assertIsNone(cache.get(self.res[1]))
+                for res, bindings in zip(self.res, self.bindings):
+                    if res != self.res[1]:
+                        self.assertEqual(bindings, cache.get(res))
+                cache.clear()
+
+            with EntityCache(database=database) as cache:
+                self.assertIsNone(cache.get(self.res[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import json
+import unittest
+
+from rdflib import RDF, XSD, BNode, ConjunctiveGraph, Literal, URIRef
+
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.support.json_ld import graph_to_json_ld
+
+
+def _canonical(json_ld):
+    # The order of graphs, nodes and values is not relevant in JSON-LD
+    if isinstance(json_ld, dict):
+        return tuple(sorted((key, _canonical(value)) for key, value in json_ld.items()))
+    elif isinstance(json_ld, list):
+        return tuple(sorted((_canonical(item) for item in json_ld), key=repr))
+    else:
+        return json_ld
+
+
+class TestJsonLd(unittest.TestCase):
+    def setUp(self):
+        self.br_graph = URIRef("http://test/br/")
+        self.id_graph = URIRef("http://test/id/")
+        self.br = URIRef("http://test/br/0601")
+        self.cg = ConjunctiveGraph()
+        self.cg.addN([
+            (self.br, RDF.type, GraphEntity.iri_expression, self.br_graph),
+            (self.br, RDF.type, GraphEntity.iri_journal_article, self.br_graph),
+            (self.br, GraphEntity.iri_title, Literal("Title", datatype=XSD.string), self.br_graph),
+            (self.br, GraphEntity.iri_has_subtitle, Literal("Sottotitolo", lang="it"), self.br_graph),
+            (self.br, GraphEntity.iri_has_publication_date, Literal("2020-05", datatype=XSD.gYearMonth), self.br_graph),
+            (self.br, GraphEntity.iri_has_sequence_identifier, Literal("1", datatype=XSD.integer), self.br_graph),
+            (self.br, GraphEntity.iri_has_identifier, URIRef("http://test/id/0601"), self.br_graph),
+            (URIRef("http://test/br/0602"), GraphEntity.iri_part_of, self.br, self.br_graph),
+            (URIRef("http://test/id/0601"), GraphEntity.iri_has_literal_value, Literal("10.1/x"), self.id_graph),
+        ])
+
+    def test_graph_to_json_ld(self):
+        expected = json.loads(self.cg.serialize(format="json-ld"))
+        self.assertEqual(_canonical(expected), _canonical(graph_to_json_ld(self.cg)))
+        with self.subTest("the result is parsed as the output of rdflib"):
+            expected_g = ConjunctiveGraph()
+            expected_g.parse(data=self.cg.serialize(format="json-ld"), format="json-ld")
+            parsed_g = ConjunctiveGraph()
+            parsed_g.parse(data=json.dumps(graph_to_json_ld(self.cg)), format="json-ld")
+            self.assertEqual(len(self.cg), len(parsed_g))
+            self.assertSetEqual({(s, p, o, c.identifier) for s, p, o, c in expected_g.quads()},
+                                {(s, p, o, c.identifier) for s, p, o, c in parsed_g.quads()})
+
+    def test_graph_to_json_ld_default_graph(self):
+        with self.subTest("single node"):
+            cg = ConjunctiveGraph()
+            cg.add((self.br, GraphEntity.iri_title, Literal("Title")))
+            self.assertEqual(_canonical(json.loads(cg.serialize(format="json-ld"))),
+                             _canonical(graph_to_json_ld(cg)))
+        with self.subTest("blank nodes and named graphs"):
+            cg = self.cg
+            cg.add((BNode("b0"), GraphEntity.iri_title, Literal("Title")))
+            cg.add((self.br, GraphEntity.iri_relation, BNode("b0")))
+            self.assertEqual(_canonical(json.loads(cg.serialize(format="json-ld"))),
+                             _canonical(graph_to_json_ld(cg)))
+
+    def test_graph_to_json_ld_with_context(self):
+        context = {"@context": {"title": {"@id": str(GraphEntity.iri_title)}, "br": "http://test/br/"}}
+        expected = json.loads(self.cg.serialize(format="json-ld", context=context))
+        self.assertEqual(_canonical(expected), _canonical(json.loads(json.dumps(graph_to_json_ld(self.cg, context)))))
+
+
+if __name__ == '__main__':
+    unittest.main()
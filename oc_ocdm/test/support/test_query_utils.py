@@ -0,0 +1,115 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import unittest
+
+from rdflib import BNode, Graph, Literal, URIRef
+
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.support.query_utils import get_entity_delta, get_graph_diff, get_update_query
+
+
+class TestQueryUtils(unittest.TestCase):
+    resp_agent = 'http://resp_agent.test/'
+
+    def setUp(self):
+        self.graph_set = GraphSet("http://test/", "", "", False)
+        self.res = URIRef("http://test/br/1")
+
+    def test_get_graph_diff(self):
+        preexisting_graph = Graph()
+        preexisting_graph.add((self.res, GraphEntity.iri_title, Literal("Old title")))
+        preexisting_graph.add((self.res, GraphEntity.iri_part_of, URIRef("http://test/br/2")))
+        current_graph = Graph()
+        current_graph.add((self.res, GraphEntity.iri_title, Literal("New title")))
+        current_graph.add((self.res, GraphEntity.iri_part_of, URIRef("http://test/br/2")))
+
+        removed_graph, added_graph = get_graph_diff(preexisting_graph, current_graph)
+        self.assertSetEqual({(self.res, GraphEntity.iri_title, Literal("Old title"))}, set(removed_graph))
+        self.assertSetEqual({(self.res, GraphEntity.iri_title, Literal("New title"))}, set(added_graph))
+
+        removed_graph, added_graph = get_graph_diff(preexisting_graph, preexisting_graph)
+        self.assertEqual(0, len(removed_graph))
+        self.assertEqual(0, len(added_graph))
+
+    def test_get_graph_diff_with_blank_nodes(self):
+        # Graphs which only differ in the name of their blank nodes are isomorphic
+        preexisting_graph = Graph()
+        preexisting_graph.add((self.res, GraphEntity.iri_relation, BNode("a")))
+        current_graph = Graph()
+        current_graph.add((self.res, GraphEntity.iri_relation, BNode("b")))
+
+        removed_graph, added_graph = get_graph_diff(preexisting_graph, current_graph)
+        self.assertEqual(0, len(removed_graph))
+        self.assertEqual(0, len(added_graph))
+
+        current_graph.add((self.res, GraphEntity.iri_title, Literal("Title")))
+        removed_graph, added_graph = get_graph_diff(preexisting_graph, current_graph)
+        self.assertEqual(0, len(removed_graph))
+        self.assertSetEqual({(self.res, GraphEntity.iri_title, Literal("Title"))}, set(added_graph))
+
+    def test_get_update_query(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        with self.subTest("creation"):
+            query, n_added, n_removed = get_update_query(br, entity_type="graph")
+            self.assertTrue(query.startswith(f"INSERT DATA {{ GRAPH <{br.g.identifier}>"))
+            self.assertEqual((1, 0), (n_added, n_removed))
+
+        br.commit_changes()
+        with self.subTest("no modification"):
+            self.assertTupleEqual(("", 0, 0), get_update_query(br, entity_type="graph"))
+
+        br.has_title("Title")
+        br.remove_type()
+        br.create_journal()
+        with self.subTest("modification"):
+            query, n_added, n_removed = get_update_query(br, entity_type="graph")
+            self.assertTrue(query.startswith(f"INSERT DATA {{ GRAPH <{br.g.identifier}>"))
+            self.assertEqual((2, 0), (n_added, n_removed))
+
+        br.commit_changes()
+        br.mark_as_to_be_deleted()
+        with self.subTest("deletion"):
+            query, n_added, n_removed = get_update_query(br, entity_type="graph")
+            self.assertTrue(query.startswith(f"DELETE DATA {{ GRAPH <{br.g.identifier}>"))
+            self.assertEqual((0, 3), (n_added, n_removed))
+
+    def test_get_entity_delta(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        br.has_title("Title")
+        delta = get_entity_delta(br, entity_type="graph")
+        self.assertEqual(br.g.identifier, delta[0])
+        self.assertEqual("", delta[1])
+        self.assertTupleEqual((0, 2), delta[3:])
+
+        with self.subTest("the delta is reused until the entity gets modified"):
+            self.assertIs(delta, get_entity_delta(br, entity_type="graph"))
+
+        with self.subTest("a modification invalidates the delta"):
+            br.has_title("New title")
+            new_delta = get_entity_delta(br, entity_type="graph")
+            self.assertIsNot(delta, new_delta)
+            self.assertIn('"New title"', new_delta[2])
+
+        with self.subTest("marking the entity as to be deleted invalidates the delta"):
+            br.commit_changes()
+            self.assertTupleEqual(("", 0, 0), get_update_query(br, entity_type="graph"))
+            br.mark_as_to_be_deleted()
+            self.assertTupleEqual((2, 0), get_entity_delta(br, entity_type="graph")[3:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,8 +20,14 @@ from rdflib import Namespace, URIRef
 
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.prov_set import ProvSet
-from oc_ocdm.support.support import (find_paths,
-                                     get_ordered_contributors_from_br)
+from oc_ocdm.support.support import (find_local_line_id, find_paths,
+                                     find_paths_batch, get_count, get_prefix,
+                                     get_ordered_contributors_from_br,
+                                     get_prov_subject_count,
+                                     get_prov_subject_prefix,
+                                     get_prov_subject_short_name,
+                                     get_resource_number, get_short_name,
+                                     is_dataset, parse_iri)
 
 
 class TestSupport(unittest.TestCase):
@@ -125,6 +131,59 @@ class TestSupport(unittest.TestCase):
             is_json = True)
         self.assertEqual((cur_dir_path, cur_file_path), (os.path.join('support', 'test', 'data', 'rdfbr', '060', '10000', '1000', 'prov'), os.path.join('support', 'test', 'data', 'rdfbr', '060', '10000', '1000', 'prov', 'se.json')))
 
+    def test_find_paths_buckets(self):
+        base_iri = 'https://w3id.org/oc/meta/'
+        base_dir = 'rdf' + os.sep
+        self.assertEqual((os.path.join('rdf', 'br', '060', '90000000'),
+                          os.path.join('rdf', 'br', '060', '90000000', '90000000.nt')),
+                         find_paths(URIRef(base_iri + 'br/06090000000'), base_dir, base_iri, '_', 10000, 1000, False))
+        self.assertEqual((os.path.join('rdf', 'br', '_', '20000'), os.path.join('rdf', 'br', '_', '20000', '11000.json')),
+                         find_paths(URIRef(base_iri + 'br/10001'), base_dir, base_iri, '_', 10000, 1000))
+        self.assertEqual((os.path.join('rdf', 'ra', '0610', '1000', 'prov'),
+                          os.path.join('rdf', 'ra', '0610', '1000', 'prov', 'se_2.nq')),
+                         find_paths(URIRef(base_iri + 'ra/0610999/prov/se/3'), base_dir, base_iri, '_', 0, 1000,
+                                    False, 2))
+        self.assertEqual(1, find_local_line_id(URIRef(base_iri + 'br/0601001'), 1000))
+        self.assertEqual(1000, find_local_line_id(URIRef(base_iri + 'br/0601000'), 1000))
+
+    def test_find_paths_batch(self):
+        base_iri = 'https://w3id.org/oc/meta/'
+        resources = [URIRef(base_iri + 'br/'), URIRef(base_iri + 'br/0601'), URIRef(base_iri + 'br/0602'),
+                     URIRef(base_iri + 'br/0602/prov/se/1'), URIRef(base_iri + 'id/06101001'),
+                     URIRef(base_iri + 'br/0601/prov/se/1')]
+        for dir_split in (0, 10000):
+            with self.subTest(dir_split=dir_split):
+                paths = find_paths_batch(resources, 'rdf' + os.sep, base_iri, '_', dir_split, 1000)
+                self.assertEqual([find_paths(res, 'rdf' + os.sep, base_iri, '_', dir_split, 1000)
+                                  for res in resources], paths)
+                # The entities stored in the same file share the same paths
+                self.assertIs(paths[1], paths[2])
+                self.assertIs(paths[3], paths[5])
+
+    def test_parse_iri(self):
+        parsed_iri = parse_iri(URIRef('https://w3id.org/oc/meta/br/060169/prov/se/2'))
+        self.assertEqual(('https://w3id.org/oc/meta', 'br', '060', '169', 'se', '2', True, False), parsed_iri)
+        self.assertIs(parsed_iri, parse_iri('https://w3id.org/oc/meta/br/060169/prov/se/2'))
+
+        self.assertEqual(('https://w3id.org/oc/meta', 'br', None, '169', '', '', False, False),
+                         parse_iri(URIRef('https://w3id.org/oc/meta/br/169')))
+        self.assertEqual(('', '', '', '', '', '', False, True), parse_iri(URIRef('https://w3id.org/oc/meta/br/')))
+        self.assertEqual(('', '', '', '', '', '', True, False), parse_iri(URIRef('https://w3id.org/oc/meta/prov/pa/1')))
+
+    def test_iri_components(self):
+        res = URIRef('https://w3id.org/oc/meta/br/060169')
+        prov_res = URIRef('https://w3id.org/oc/meta/br/060169/prov/se/2')
+        self.assertEqual(('br', '060', '169', 169), (get_short_name(res), get_prefix(res), get_count(res),
+                                                     get_resource_number(res)))
+        self.assertEqual(('se', '', '2', 169), (get_short_name(prov_res), get_prefix(prov_res), get_count(prov_res),
+                                                get_resource_number(prov_res)))
+        self.assertEqual(('', '', ''), (get_prov_subject_short_name(res), get_prov_subject_prefix(res),
+                                        get_prov_subject_count(res)))
+        self.assertEqual(('br', '060', '169'), (get_prov_subject_short_name(prov_res),
+                                                get_prov_subject_prefix(prov_res), get_prov_subject_count(prov_res)))
+        self.assertFalse(is_dataset(res))
+        self.assertTrue(is_dataset(URIRef('https://w3id.org/oc/meta/br/')))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file